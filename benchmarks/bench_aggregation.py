@@ -0,0 +1,79 @@
+"""
+Бенчмарк параллельных агрегаций (src.aggregation) на синтетическом снимке операций.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_aggregation.py --rows 10000000 --workers 1 2 4 8
+
+Для каждого количества процессов замеряется время сумм по картам, по дням недели, «Инвесткопилки»
+по месяцам и крупнейших трат за весь период, выводится ускорение относительно одного процесса.
+Ускорение близко к линейному при количестве процессов не больше количества физических ядер.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.aggregation import ParallelStorage  # noqa: E402
+from src.snapshot import write_snapshot  # noqa: E402
+
+
+def make_transactions(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Синтетические операции за 10 лет по убыванию даты, как в выписке"""
+
+    generator = np.random.default_rng(seed)
+    seconds = np.sort(generator.integers(0, 10 * 365 * 24 * 60 * 60, rows))[::-1]
+    cards = pd.Index([f"*{n:04}" for n in range(8)])
+    categories = pd.Index([f"cat{n}" for n in range(40)])
+    failed = (generator.random(rows) < 0.02).astype(np.int8)
+    return pd.DataFrame(
+        {
+            "Дата операции": np.datetime64("2015-01-01", "ns") + seconds.astype("timedelta64[s]"),
+            "Номер карты": pd.Categorical.from_codes(generator.integers(0, len(cards), rows), cards),
+            "Статус": pd.Categorical.from_codes(failed, pd.Index(["OK", "FAILED"])),
+            "Сумма операции": -np.round(generator.lognormal(6, 1.2, rows), 2),
+            "Категория": pd.Categorical.from_codes(generator.integers(0, len(categories), rows), categories),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"ядер: {os.cpu_count()}, строк: {args.rows}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path_to_snapshot = os.path.join(tmp_dir, "operations.snapshot")
+        write_snapshot(make_transactions(args.rows), path_to_snapshot)
+
+        print(f"{'процессов':>10} {'время, с':>10} {'ускорение':>10}")
+        base_time = None
+        for workers in args.workers:
+            storage = ParallelStorage(path_to_snapshot, max_workers=workers, min_rows=0)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                storage.get_spends_by_card()
+                storage.get_sums_by_weekday()
+                storage.get_investment_savings(50)
+                storage.get_top_spends(5)
+                timings.append(time.perf_counter() - start)
+
+            best = min(timings)
+            base_time = base_time or best
+            print(f"{workers:>10} {best:>10.2f} {base_time / best:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк потоковой проверки бюджетов (src.budgets) на синтетическом потоке трат.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_budgets.py --events 1000000 --budgets 100
+
+Бюджеты задаются на все траты, на категории (по месяцам), на карты (по неделям) и на пары
+категория - карта (по дням). Траты подаются по одной методом BudgetMonitor.add, выводится количество
+обработанных трат в секунду в одном потоке.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.budgets import Budget, BudgetMonitor  # noqa: E402
+
+
+def make_budgets(count: int, categories: list[str], cards: list[str]) -> list[Budget]:
+    """Бюджет на все траты и count бюджетов по категориям, картам и парам категория - карта"""
+
+    budgets = [Budget("Все траты", 300_000.0)]
+    for number in range(count):
+        category, card = categories[number % len(categories)], cards[number % len(cards)]
+        if number % 3 == 0:
+            budgets.append(Budget(f"category{number}", 20_000.0, "month", category=category))
+        elif number % 3 == 1:
+            budgets.append(Budget(f"card{number}", 30_000.0, "week", card=card))
+        else:
+            budgets.append(Budget(f"pair{number}", 2_000.0, "day", category=category, card=card))
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--budgets", type=int, default=100)
+    args = parser.parse_args()
+
+    generator = random.Random(0)
+    categories = [f"cat{number}" for number in range(40)]
+    cards = [f"*{number:04}" for number in range(8)]
+    start = datetime(2020, 1, 1)
+    events = [
+        (
+            start + timedelta(minutes=number),
+            generator.uniform(10, 2000),
+            generator.choice(categories),
+            generator.choice(cards),
+        )
+        for number in range(args.events)
+    ]
+
+    monitor = BudgetMonitor(make_budgets(args.budgets, categories, cards))
+    add = monitor.add
+    alerts = 0
+    started = time.perf_counter()
+    for operation_date, amount, category, card in events:
+        alerts += len(add(operation_date, amount, category, card))
+    elapsed = time.perf_counter() - started
+
+    print(f"трат: {args.events}, бюджетов: {len(monitor.budgets)}, предупреждений: {alerts}")
+    print(f"время: {elapsed:.2f} с, трат в секунду: {args.events / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
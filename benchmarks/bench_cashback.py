@@ -0,0 +1,85 @@
+"""
+Бенчмарк сравнения программ кэшбэка (src.cashback) на синтетической истории операций.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_cashback.py --rows 1000000 --programs 50
+
+Генерируется история трат за 10 лет и набор программ со ставками по категориям и MCC,
+лимитами и порогами. Замеряется время расчета кэшбэка всех программ за всю историю.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.cashback import CashbackProgram, simulate_cashback  # noqa: E402
+
+
+def make_transactions(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Синтетические траты за 10 лет по убыванию даты, как в выписке"""
+
+    generator = np.random.default_rng(seed)
+    seconds = np.sort(generator.integers(0, 10 * 365 * 24 * 60 * 60, rows))[::-1]
+    categories = pd.Index([f"cat{n}" for n in range(40)])
+    return pd.DataFrame(
+        {
+            "Дата операции": np.datetime64("2015-01-01", "ns") + seconds.astype("timedelta64[s]"),
+            "Статус": pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), pd.Index(["OK"])),
+            "Сумма операции": -np.round(generator.lognormal(4, 1.2, rows), 2),
+            "Категория": pd.Categorical.from_codes(generator.integers(0, len(categories), rows), categories),
+            "MCC": generator.integers(5000, 5100, rows).astype(float),
+        }
+    )
+
+
+def make_programs(count: int, seed: int = 0) -> list[CashbackProgram]:
+    """Программы с 3 повышенными категориями, 2 MCC, лимитом и порогом"""
+
+    generator = np.random.default_rng(seed)
+    return [
+        CashbackProgram(
+            f"program{n}",
+            base_rate=float(generator.choice([0.005, 0.01, 0.015])),
+            category_rates={
+                f"cat{category}": float(generator.choice([0.03, 0.05, 0.1]))
+                for category in generator.integers(0, 40, 3)
+            },
+            mcc_rates={int(mcc): 0.07 for mcc in generator.integers(5000, 5100, 2)},
+            monthly_cap=float(generator.choice([3000, 10000, 30000])),
+            min_monthly_spend=float(generator.choice([0, 10000, 30000])),
+            min_amount=float(generator.choice([0, 100])),
+        )
+        for n in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--programs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.rows)
+    programs = make_programs(args.programs)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = simulate_cashback(transactions, programs)
+        timings.append(time.perf_counter() - start)
+
+    print(f"операций: {args.rows}, программ: {args.programs}, лучшее время: {min(timings):.2f} с")
+    print(result.head(5).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
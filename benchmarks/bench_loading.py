@@ -0,0 +1,73 @@
+"""
+Бенчмарк загрузки операций из EXCEL - файла: полная загрузка без явных типов (как до выбора колонок)
+против загрузки с типами category и загрузки только колонок, нужных функции.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_loading.py --repeat 3 --scale 1
+
+Для каждого варианта выводится лучшее время загрузки с нормализацией и память дата фрейма
+(memory_usage(deep=True)). При scale > 1 операции файла повторяются scale раз во временном файле.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Optional, Sequence
+
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.reports import SPENDING_BY_WEEKDAY_COLUMNS  # noqa: E402
+from src.schema import normalize_transactions  # noqa: E402
+from src.services import INVESTMENT_BANK_COLUMNS  # noqa: E402
+from src.utils import get_operations_path, get_transactions_df  # noqa: E402
+
+
+def load_untyped(path: str) -> pd.DataFrame:
+    """Загрузка всех колонок с выводом типов pandas"""
+    return normalize_transactions(pd.read_excel(path))[0]
+
+
+def load_columns(columns: Optional[Sequence[str]]) -> Callable[[str], pd.DataFrame]:
+    """Загрузка колонок с явными типами"""
+    return lambda path: get_transactions_df(path, columns=columns)
+
+
+def run(name: str, loader: Callable[[str], pd.DataFrame], path: str, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transactions = loader(path)
+        timings.append(time.perf_counter() - start)
+
+    memory_mb = transactions.memory_usage(deep=True).sum() / 2**20
+    print(f"{name:<36} {len(transactions.columns):>8} {min(timings) * 1000:>12.1f} {memory_mb:>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=1, help="во сколько раз увеличить данные файла")
+    args = parser.parse_args()
+
+    path_to_operations = get_operations_path()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.scale > 1:
+            scaled = pd.concat([pd.read_excel(path_to_operations)] * args.scale, ignore_index=True)
+            path_to_operations = os.path.join(tmp_dir, "operations.xlsx")
+            scaled.to_excel(path_to_operations, index=False)
+
+        print(f"{'загрузка':<36} {'колонок':>8} {'время, мс':>12} {'память, МБ':>14}")
+        run("все колонки, типы pandas", load_untyped, path_to_operations, args.repeat)
+        run("все колонки, явные типы", load_columns(None), path_to_operations, args.repeat)
+        run("investment_bank", load_columns(INVESTMENT_BANK_COLUMNS), path_to_operations, args.repeat)
+        run("spending_by_weekday", load_columns(SPENDING_BY_WEEKDAY_COLUMNS), path_to_operations, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Бенчмарк страницы «Главная» (views.get_main_page_request) с сервером-заглушкой ЦБ РФ и Alpha Vantage.
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_main_page.py --repeat 5
+
+Для каждого сценария (без задержки, задержка сети, ошибки сервера, превышение лимита запросов)
+запускается локальный src.stub_server, на него перенаправляются CBR_BASE_URL и ALPHA_VANTAGE_BASE_URL,
+и замеряется время ответа страницы и ее сетевой части (курсы валют и стоимость акций).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.stub_server import StubServer  # noqa: E402
+from src.utils import get_currency_rates, get_stock_prices, get_user_settings  # noqa: E402
+from src.views import get_main_page_request  # noqa: E402
+
+SCENARIOS: dict[str, dict[str, Any]] = {
+    "без задержки": {},
+    "задержка 100 мс": {"latency": 0.1},
+    "ошибки 30%": {"error_rate": 0.3, "seed": 1},
+    "лимит 5 запросов": {"rate_limit": 5},
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> tuple[list[float], int]:
+    """Замер времени вызовов функции, возвращает времена в секундах и количество исключений"""
+
+    timings = []
+    errors = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+        timings.append(time.perf_counter() - start)
+    return timings, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--date", default="2021-12-31 16:44:00")
+    args = parser.parse_args()
+
+    user_settings = get_user_settings()
+
+    def network_part() -> None:
+        get_currency_rates(user_settings)
+        get_stock_prices(user_settings)
+
+    print(f"{'сценарий':<20} {'часть':<10} {'медиана, мс':>12} {'макс, мс':>10} {'исключений':>11}")
+    for name, options in SCENARIOS.items():
+        with StubServer(**options) as stub_server:
+            os.environ["CBR_BASE_URL"] = stub_server.url
+            os.environ["ALPHA_VANTAGE_BASE_URL"] = stub_server.url
+
+            for part, func in (("сеть", network_part), ("страница", lambda: get_main_page_request(args.date))):
+                timings, errors = measure(func, args.repeat)
+                print(
+                    f"{name:<20} {part:<10} {statistics.median(timings) * 1000:>12.1f} "
+                    f"{max(timings) * 1000:>10.1f} {errors:>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Бенчмарк чтения выписок разных форматов: операции EXCEL - файла сохраняются во временные CSV и OFX - файлы,
+каждый файл читается функцией get_transactions_df (чтение и нормализация).
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_parsers.py --repeat 3 --scale 1
+
+Для каждого формата выводится размер файла и лучшее время загрузки.
+При scale > 1 операции файла повторяются scale раз.
+"""
+
+import argparse
+import html
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.parsers import write_csv  # noqa: E402
+from src.utils import get_operations_path, get_transactions_df  # noqa: E402
+
+
+def write_ofx(transactions: pd.DataFrame, path: str) -> None:
+    """Сохранение операций в OFX 1.x (SGML), как в выгрузке банка: одна карта и валюта на файл"""
+
+    dates = pd.to_datetime(transactions["Дата операции"], dayfirst=True).dt.strftime("%Y%m%d%H%M%S")
+    lines = ["OFXHEADER:100", "DATA:OFXSGML", "VERSION:102", "CHARSET:UTF-8", "", "<OFX>", "<CURDEF>RUB"]
+    lines.append("<BANKACCTFROM><ACCTID>40817810000000007197</BANKACCTFROM>")
+    for date, amount, mcc, description in zip(
+        dates, transactions["Сумма операции"], transactions["MCC"], transactions["Описание"]
+    ):
+        lines.extend(["<STMTTRN>", f"<DTPOSTED>{date}", f"<TRNAMT>{amount}", f"<NAME>{html.escape(str(description))}"])
+        if pd.notna(mcc):
+            lines.append(f"<SIC>{int(mcc)}")
+        lines.append("</STMTTRN>")
+    lines.append("</OFX>")
+    with open(path, "w", encoding="utf-8") as ofx_file:
+        ofx_file.write("\n".join(lines))
+
+
+def run(name: str, path: str, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transactions = get_transactions_df(path)
+        timings.append(time.perf_counter() - start)
+
+    size_mb = os.path.getsize(path) / 2**20
+    print(f"{name:<8} {len(transactions):>10} {size_mb:>12.2f} {min(timings) * 1000:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=1, help="во сколько раз увеличить данные файла")
+    args = parser.parse_args()
+
+    path_to_operations = get_operations_path()
+    transactions = pd.read_excel(path_to_operations)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.scale > 1:
+            transactions = pd.concat([transactions] * args.scale, ignore_index=True)
+            path_to_operations = os.path.join(tmp_dir, "operations.xlsx")
+            transactions.to_excel(path_to_operations, index=False)
+
+        path_to_csv = os.path.join(tmp_dir, "operations.csv")
+        path_to_ofx = os.path.join(tmp_dir, "operations.ofx")
+        write_csv(transactions, path_to_csv)
+        write_ofx(transactions, path_to_ofx)
+
+        print(f"{'формат':<8} {'операций':>10} {'размер, МБ':>12} {'время, мс':>12}")
+        run("xlsx", path_to_operations, args.repeat)
+        run("csv", path_to_csv, args.repeat)
+        run("ofx", path_to_ofx, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк запуска рабочих процессов: загрузка операций из EXCEL - файла в каждом процессе
+против открытия общего снимка, отображенного в память (src.snapshot).
+
+Запуск из корня проекта:
+
+    python benchmarks/bench_snapshot.py --workers 4 --scale 100
+
+Каждый процесс загружает данные и считает сумму операций. Для снимка дополнительно замеряется
+открытие снимка, увеличенного в scale раз: время открытия не зависит от объема данных,
+а страницы файлов колонок разделяются процессами через кэш страниц ОС
+(RSS процесса учитывает и разделяемые страницы снимка).
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from src.snapshot import get_snapshot, open_snapshot, write_snapshot  # noqa: E402
+from src.utils import get_operations_path, get_transactions_df  # noqa: E402
+
+
+def load_excel(path: str) -> tuple[float, float, int]:
+    """Загрузка операций в рабочем процессе из EXCEL - файла"""
+
+    start = time.perf_counter()
+    total = float(get_transactions_df(path)["Сумма операции"].sum())
+    return time.perf_counter() - start, total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def load_snapshot(path: str) -> tuple[float, float, int]:
+    """Открытие снимка в рабочем процессе"""
+
+    start = time.perf_counter()
+    total = float(open_snapshot(path, ["Сумма операции"])["Сумма операции"].sum())
+    return time.perf_counter() - start, total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(name: str, loader: Callable[[str], tuple[float, float, int]], path: str, workers: int) -> None:
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(executor.map(loader, [path] * workers))
+
+    timings = [result[0] for result in results]
+    max_rss_mb = max(result[2] for result in results) / 1024
+    print(f"{name:<28} {max(timings) * 1000:>14.1f} {sum(timings) / workers * 1000:>14.1f} {max_rss_mb:>14.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=100, help="во сколько раз увеличить данные снимка")
+    args = parser.parse_args()
+
+    path_to_operations = get_operations_path()
+    transactions = get_snapshot(path_to_operations)
+
+    print(f"{'источник':<28} {'макс, мс':>14} {'среднее, мс':>14} {'макс RSS, МБ':>14}")
+    run("EXCEL", load_excel, path_to_operations, args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path_to_snapshot = os.path.join(tmp_dir, "operations.snapshot")
+        write_snapshot(transactions, path_to_snapshot)
+        run(f"снимок, {len(transactions)} строк", load_snapshot, path_to_snapshot, args.workers)
+
+        scaled = pd.concat([transactions] * args.scale, ignore_index=True)
+        write_snapshot(scaled, path_to_snapshot)
+        run(f"снимок, {len(scaled)} строк", load_snapshot, path_to_snapshot, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import heapq
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.query import get_period_bounds
+from src.snapshot import get_snapshot_version_path, open_snapshot, read_snapshot_manifest
+from src.storage import TransactionStorage
+
+logger = logging.getLogger("aggregation")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "aggregation.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Меньше этого количества строк агрегация выполняется в текущем процессе: запуск пула дороже расчета
+PARALLEL_MIN_ROWS = 1_000_000
+
+# Количество частей на один процесс, чтобы выровнять нагрузку
+CHUNKS_PER_WORKER = 4
+
+
+def get_chunks(
+    dates: np.ndarray, start: Optional[datetime], stop: Optional[datetime], chunks: int
+) -> list[tuple[int, int]]:
+    """
+    Функция делит строки снимка на непрерывные диапазоны (части) для параллельной обработки.
+    Если операции упорядочены по дате (по возрастанию или убыванию), границы периода находятся бинарным поиском
+    и делятся только строки периода - каждая часть соответствует своему диапазону дат.
+
+    :param dates: Массив дат операций
+    :param start: Начало периода (включительно), None - без ограничения
+    :param stop: Конец периода (включительно), None - без ограничения
+    :param chunks: Количество частей
+    :return: Список диапазонов строк (начало, конец)
+    """
+
+    row_start, row_stop = 0, len(dates)
+    if start is not None or stop is not None:
+        period_bounds = get_period_bounds(dates, start, stop)
+        if period_bounds is not None:
+            row_start, row_stop = period_bounds
+
+    if row_stop <= row_start:
+        return []
+
+    bounds = np.linspace(row_start, row_stop, min(chunks, row_stop - row_start) + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _period_mask(frame: pd.DataFrame, start: Optional[datetime], stop: Optional[datetime]) -> np.ndarray:
+    """Маска успешных операций периода"""
+
+    mask = (frame["Статус"] == "OK").to_numpy()
+    dates = frame["Дата операции"].to_numpy()
+    if start is not None:
+        mask &= dates >= np.datetime64(start, "ns")
+    if stop is not None:
+        mask &= dates <= np.datetime64(stop, "ns")
+    return mask
+
+
+def map_spends_by_category_codes(
+    frame: pd.DataFrame, column: str, start: Optional[datetime], stop: Optional[datetime]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Частичный агрегат: сумма и количество расходов по кодам категорий колонки.
+    Категории снимка общие для всех частей, поэтому частичные массивы складываются поэлементно.
+    """
+
+    amounts = frame["Сумма операции"].to_numpy(dtype=float)
+    codes = frame[column].cat.codes.to_numpy()
+    mask = _period_mask(frame, start, stop) & (amounts < 0) & (codes >= 0)
+    size = len(frame[column].cat.categories)
+    return (
+        np.bincount(codes[mask], weights=amounts[mask], minlength=size),
+        np.bincount(codes[mask], minlength=size),
+    )
+
+
+def map_sums_by_weekday(
+    frame: pd.DataFrame, start: Optional[datetime], stop: Optional[datetime]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Частичный агрегат: сумма и количество успешных операций по дням недели (0 - понедельник)"""
+
+    mask = _period_mask(frame, start, stop)
+    amounts = frame["Сумма операции"].to_numpy(dtype=float)[mask]
+    # 1970-01-01 - четверг, поэтому день недели = (дни от эпохи + 3) % 7
+    weekdays = (frame["Дата операции"].to_numpy()[mask].astype("datetime64[D]").astype(np.int64) + 3) % 7
+    return np.bincount(weekdays, weights=amounts, minlength=7), np.bincount(weekdays, minlength=7)
+
+
+def map_investment_savings(
+    frame: pd.DataFrame, limit: int, start: Optional[datetime], stop: Optional[datetime]
+) -> Counter:
+    """Частичный агрегат: сумма округлений трат до limit («Инвесткопилка») по месяцам"""
+
+    amounts = frame["Сумма операции"].to_numpy(dtype=float)
+    mask = _period_mask(frame, start, stop) & (amounts < 0)
+    remainders = np.abs(amounts[mask]) % limit
+    savings = np.where(remainders != 0, limit - remainders, 0.0)
+
+    months, inverse = np.unique(frame["Дата операции"].to_numpy()[mask].astype("datetime64[M]"), return_inverse=True)
+    totals = np.bincount(inverse, weights=savings, minlength=len(months))
+    return Counter({str(month): float(total) for month, total in zip(months, totals)})
+
+
+def map_top_spends(
+    frame: pd.DataFrame, k: int, start: Optional[datetime], stop: Optional[datetime]
+) -> list[tuple[float, int]]:
+    """Частичный агрегат: k крупнейших трат части в виде пар (сумма траты, номер строки снимка)"""
+
+    amounts = frame["Сумма операции"].to_numpy(dtype=float)
+    rows = np.flatnonzero(_period_mask(frame, start, stop) & (amounts < 0))
+    spends = -amounts[rows]
+    if len(rows) > k:
+        top = np.argpartition(spends, -k)[-k:]
+        rows, spends = rows[top], spends[top]
+    offset = int(frame.index[0]) if len(frame) else 0
+    return [(float(spend), offset + int(row)) for spend, row in zip(spends, rows)]
+
+
+def reduce_arrays(partials: list[tuple[np.ndarray, ...]]) -> tuple[np.ndarray, ...]:
+    """Объединение частичных агрегатов - кортежей массивов одинаковой формы"""
+    return tuple(np.sum(arrays, axis=0) for arrays in zip(*partials))
+
+
+def reduce_counters(partials: list[Counter]) -> Counter:
+    """Объединение частичных агрегатов - словарей сумм по ключам"""
+    return sum(partials, Counter())
+
+
+def _map_chunk(task: tuple[str, list[str], int, int, Callable, dict[str, Any]]) -> Any:
+    """Выполнение частичного агрегата в рабочем процессе над диапазоном строк снимка"""
+
+    path_to_snapshot, columns, row_start, row_stop, mapper, kwargs = task
+    frame = open_snapshot(path_to_snapshot, columns).iloc[row_start:row_stop]
+    return mapper(frame, **kwargs)
+
+
+def map_reduce(
+    path_to_snapshot: str,
+    mapper: Callable,
+    reducer: Callable[[list], Any],
+    columns: list[str],
+    start: Optional[datetime] = None,
+    stop: Optional[datetime] = None,
+    max_workers: Optional[int] = None,
+    min_rows: int = PARALLEL_MIN_ROWS,
+    **kwargs: Any,
+) -> Any:
+    """
+    Функция выполняет агрегацию снимка операций по схеме map-reduce.
+    Строки периода делятся на части, для каждой части в пуле процессов считается частичный агрегат
+    (mapper), частичные агрегаты объединяются (reducer). Рабочие процессы открывают снимок отображением в память,
+    данные между процессами не копируются - передаются только путь и границы части.
+
+    :param path_to_snapshot: Путь к папке снимка (модуль snapshot)
+    :param mapper: Функция частичного агрегата mapper(frame, start=..., stop=..., **kwargs)
+    :param reducer: Функция объединения списка частичных агрегатов
+    :param columns: Колонки снимка, нужные mapper
+    :param start: Начало периода (включительно)
+    :param stop: Конец периода (включительно)
+    :param max_workers: Количество процессов, None - по количеству ядер
+    :param min_rows: Минимальное количество строк для параллельного расчета
+    :return: Результат reducer
+    """
+
+    logger.info(f"Вызов функции {map_reduce.__name__} для {mapper.__name__}")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    columns = list(dict.fromkeys(["Дата операции", "Статус", *columns]))
+    # Все части считаются по одной версии снимка, даже если во время расчета записывается новая
+    path_to_snapshot = get_snapshot_version_path(path_to_snapshot)
+    dates = open_snapshot(path_to_snapshot, ["Дата операции"])["Дата операции"].to_numpy()
+    chunks = get_chunks(dates, start, stop, max_workers * CHUNKS_PER_WORKER)
+
+    kwargs = {**kwargs, "start": start, "stop": stop}
+    tasks = [(path_to_snapshot, columns, row_start, row_stop, mapper, kwargs) for row_start, row_stop in chunks]
+    if not tasks:
+        tasks = [(path_to_snapshot, columns, 0, 0, mapper, kwargs)]
+
+    rows = sum(row_stop - row_start for row_start, row_stop in chunks)
+    if max_workers == 1 or rows < min_rows:
+        partials = [_map_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            partials = list(executor.map(_map_chunk, tasks))
+
+    logger.info(f"Обработано {rows} строк, частей {len(tasks)}, процессов {max_workers}")
+    return reducer(partials)
+
+
+class ParallelStorage(TransactionStorage):
+    """
+    Хранилище операций на снимке (модуль snapshot) с параллельными агрегациями:
+    суммы по картам, категориям и дням недели, «Инвесткопилка» по месяцам и крупнейшие траты
+    считаются map-reduce в пуле процессов. Каждый вызов метода определяет версию снимка один раз
+    и выполняет все шаги по ней, даже если снимок одновременно перестраивается.
+    """
+
+    def __init__(
+        self, path_to_snapshot: str, max_workers: Optional[int] = None, min_rows: int = PARALLEL_MIN_ROWS
+    ) -> None:
+        self.path_to_snapshot = path_to_snapshot
+        self.max_workers = max_workers
+        self.min_rows = min_rows
+
+    def _map_reduce(
+        self,
+        mapper: Callable,
+        reducer: Callable,
+        columns: list[str],
+        path_to_version: str,
+        **kwargs: Any,
+    ) -> Any:
+        return map_reduce(
+            path_to_version,
+            mapper,
+            reducer,
+            columns,
+            max_workers=self.max_workers,
+            min_rows=self.min_rows,
+            **kwargs,
+        )
+
+    def get_transactions(
+        self,
+        start: Optional[datetime] = None,
+        stop: Optional[datetime] = None,
+        status: Optional[str] = "OK",
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> pd.DataFrame:
+        transactions = open_snapshot(get_snapshot_version_path(self.path_to_snapshot))
+        mask = np.ones(len(transactions), dtype=bool)
+        if start is not None:
+            mask &= (transactions["Дата операции"] >= start).to_numpy()
+        if stop is not None:
+            mask &= (transactions["Дата операции"] <= stop).to_numpy()
+        for column, value in (("Статус", status), ("Номер карты", card), ("Категория", category)):
+            if value is not None:
+                mask &= (transactions[column] == value).to_numpy()
+
+        selected = transactions[mask].reset_index(drop=True)
+        return selected.astype({column: object for column in selected.select_dtypes("category").columns})
+
+    def _get_spends_by(self, column: str, start: Optional[datetime], stop: Optional[datetime]) -> pd.DataFrame:
+        # Коды и список категорий берутся из одной версии снимка
+        path_to_version = get_snapshot_version_path(self.path_to_snapshot)
+        totals, counts = self._map_reduce(
+            map_spends_by_category_codes,
+            reduce_arrays,
+            ["Сумма операции", column],
+            path_to_version,
+            column=column,
+            start=start,
+            stop=stop,
+        )
+        categories = read_snapshot_manifest(path_to_version)["columns"][column]["categories"]
+        spends = pd.DataFrame({column: categories, "total_spent": totals, "count": counts.astype(int)})
+        return spends[spends["count"] > 0].sort_values(column, ignore_index=True)
+
+    def get_spends_by_card(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        return self._get_spends_by("Номер карты", start, stop)
+
+    def get_spends_by_category(
+        self, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        return self._get_spends_by("Категория", start, stop)
+
+    def get_sums_by_weekday(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        path_to_version = get_snapshot_version_path(self.path_to_snapshot)
+        totals, counts = self._map_reduce(
+            map_sums_by_weekday, reduce_arrays, ["Сумма операции"], path_to_version, start=start, stop=stop
+        )
+        sums = pd.DataFrame({"weekday": np.arange(7), "total": totals, "count": counts.astype(int)})
+        return sums[sums["count"] > 0].reset_index(drop=True)
+
+    def get_investment_savings(
+        self, limit: int, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> dict[str, float]:
+        """
+        Метод возвращает суммы «Инвесткопилки» (округление трат до limit) по месяцам.
+
+        :return: Словарь {"YYYY-MM": сумма}, отсортированный по месяцу
+        """
+
+        path_to_version = get_snapshot_version_path(self.path_to_snapshot)
+        savings = self._map_reduce(
+            map_investment_savings,
+            reduce_counters,
+            ["Сумма операции"],
+            path_to_version,
+            limit=limit,
+            start=start,
+            stop=stop,
+        )
+        return {month: round(total, 2) for month, total in sorted(savings.items())}
+
+    def get_top_spends(
+        self, k: int = 5, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Метод возвращает k крупнейших трат периода: в каждой части отбираются k трат, затем k лучших из них.
+
+        :return: Дата фрейм операций, отсортированный по убыванию траты
+        """
+
+        # Номера строк и сами строки берутся из одной версии снимка
+        path_to_version = get_snapshot_version_path(self.path_to_snapshot)
+        partials = self._map_reduce(
+            map_top_spends, list, ["Сумма операции"], path_to_version, k=k, start=start, stop=stop
+        )
+        top = heapq.nlargest(k, (item for partial in partials for item in partial))
+        transactions = open_snapshot(path_to_version).iloc[[row for _, row in top]].reset_index(drop=True)
+        return transactions.astype({column: object for column in transactions.select_dtypes("category").columns})
@@ -0,0 +1,173 @@
+import logging
+import math
+import os
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("anomalies")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "anomalies.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Колонки, в разрезе которых считается статистика трат
+ANOMALY_GROUP_COLUMNS = ("Номер карты", "Категория")
+
+
+@dataclass
+class RunningStats:
+    """
+    Потоковая статистика: количество, среднее и сумма квадратов отклонений (алгоритм Уэлфорда).
+    Хранит O(1) данных независимо от количества обработанных значений.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, value: float) -> None:
+        """Добавление одного значения"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, count: int, mean: float, m2: float) -> None:
+        """Объединение со статистикой другой выборки (формула Чана)"""
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        """Стандартное отклонение генеральной совокупности"""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+def get_spends(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция возвращает успешные расходные операции с колонкой "Сумма траты" (модуль суммы операции).
+
+    :param transactions: Дата фрейм с транзакциями
+    :return: Дата фрейм трат
+    """
+
+    spends = transactions[(transactions["Статус"] == "OK") & (transactions["Сумма операции"] < 0)].copy()
+    spends["Сумма траты"] = spends["Сумма операции"].abs().astype(float)
+    return spends
+
+
+class AnomalyDetector:
+    """
+    Класс для поиска аномально крупных трат по каждой карте и каждой категории.
+    Для каждой группы хранится только потоковая статистика RunningStats,
+    поэтому память ограничена количеством групп, а не длиной истории.
+
+    Трата считается аномальной, если ее z-оценка относительно статистики группы
+    больше threshold и в группе накоплено не меньше min_count трат.
+    """
+
+    def __init__(self, threshold: float = 3.0, min_count: int = 10) -> None:
+        self.threshold = threshold
+        self.min_count = min_count
+        self.stats: dict[str, dict[Any, RunningStats]] = {column: {} for column in ANOMALY_GROUP_COLUMNS}
+
+    def update(self, transactions: pd.DataFrame) -> None:
+        """
+        Метод обновляет статистику групп новыми транзакциями.
+        Статистика пачки считается векторно по группам и объединяется с накопленной за O(количество групп).
+
+        :param transactions: Дата фрейм с новыми транзакциями
+        """
+
+        spends = get_spends(transactions)
+        if spends.empty:
+            return
+
+        for column in ANOMALY_GROUP_COLUMNS:
+            grouped = spends.groupby(column, observed=True)["Сумма траты"].agg(["count", "mean", "var"])
+            grouped["m2"] = grouped["var"].fillna(0.0) * (grouped["count"] - 1)
+
+            column_stats = self.stats[column]
+            for key, count, mean, m2 in zip(grouped.index, grouped["count"], grouped["mean"], grouped["m2"]):
+                column_stats.setdefault(key, RunningStats()).merge(int(count), float(mean), float(m2))
+
+        logger.info(f"Статистика обновлена по {len(spends)} тратам")
+
+    def add(self, transaction: dict) -> None:
+        """
+        Метод обновляет статистику одной транзакцией за O(1).
+
+        :param transaction: Словарь с данными транзакции
+        """
+
+        if transaction["Статус"] != "OK" or transaction["Сумма операции"] >= 0:
+            return
+
+        for column in ANOMALY_GROUP_COLUMNS:
+            self.stats[column].setdefault(transaction[column], RunningStats()).update(
+                abs(float(transaction["Сумма операции"]))
+            )
+
+    def detect(self, transactions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Метод возвращает аномальные траты по текущей статистике групп.
+        Трата, аномальная в нескольких группах, возвращается один раз: с наибольшей z-оценкой
+        и списком групп, в которых она аномальна (по убыванию z-оценки).
+
+        :param transactions: Дата фрейм с транзакциями
+        :return anomalies: Дата фрейм аномальных трат с колонками "Группы" (колонки, по которым трата аномальна)
+            и "z-оценка", упорядоченный по убыванию z-оценки
+        """
+
+        spends = get_spends(transactions)
+        # z-оценки трат по каждой колонке группировки, NaN - трата в группе не аномальна
+        z_scores = np.full((len(spends), len(ANOMALY_GROUP_COLUMNS)), np.nan)
+
+        for position, column in enumerate(ANOMALY_GROUP_COLUMNS):
+            column_stats = self.stats[column]
+            keys = spends[column].astype(object)
+            means = keys.map({key: stats.mean for key, stats in column_stats.items()}).astype(float)
+            stds = keys.map({key: stats.std for key, stats in column_stats.items()}).astype(float)
+            counts = keys.map({key: stats.count for key, stats in column_stats.items()}).fillna(0)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                column_z_scores = ((spends["Сумма траты"] - means) / stds).to_numpy(dtype=float)
+
+            mask = ((counts >= self.min_count) & (stds > 0)).to_numpy(dtype=bool) & (column_z_scores > self.threshold)
+            z_scores[mask, position] = column_z_scores[mask]
+
+        flagged = ~np.isnan(z_scores).all(axis=1)
+        anomalies = spends.iloc[np.flatnonzero(flagged)].copy()
+        flagged_z_scores = z_scores[flagged]
+        groups_order = np.argsort(-np.nan_to_num(flagged_z_scores, nan=-np.inf), axis=1, kind="stable")
+        anomalies["Группы"] = [
+            [ANOMALY_GROUP_COLUMNS[position] for position in row_order if not np.isnan(row[position])]
+            for row, row_order in zip(flagged_z_scores, groups_order)
+        ]
+        anomalies["z-оценка"] = np.round(np.nanmax(flagged_z_scores, axis=1), 2)
+
+        return anomalies.sort_values("z-оценка", ascending=False, kind="stable")
+
+    def process(self, transactions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Метод для потоковой обработки: новые транзакции проверяются по статистике истории,
+        после чего добавляются в статистику.
+
+        :param transactions: Дата фрейм с новыми транзакциями
+        :return anomalies: Дата фрейм аномальных трат среди новых транзакций
+        """
+
+        anomalies = self.detect(transactions)
+        self.update(transactions)
+        return anomalies
@@ -0,0 +1,290 @@
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from src.schema import get_operation_dates
+from src.settings import SettingsError, get_settings_path, path_to_data_dir
+
+logger = logging.getLogger("budgets")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "budgets.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Бюджеты пользователя по умолчанию, рядом с файлом настроек
+path_to_budgets = os.path.join(path_to_data_dir, "budgets.json")
+
+BUDGET_PERIODS = ("day", "week", "month")
+
+# Доли лимита, при достижении которых выдается предупреждение
+DEFAULT_THRESHOLDS = (0.8, 1.0)
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    Бюджет: лимит трат за день, неделю (с понедельника) или месяц по категории и/или карте
+    (None - все категории или все карты).
+    """
+
+    name: str
+    limit: float
+    period: str = "month"
+    category: Optional[str] = None
+    card: Optional[str] = None
+    thresholds: tuple[float, ...] = DEFAULT_THRESHOLDS
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "Budget":
+        """
+        Метод проверяет словарь бюджета из JSON - файла.
+
+        :param data: Словарь в формате {"name": "str", "limit": 1000, "period": "month",
+            "category": "str", "card": "str", "thresholds": [0.8, 1.0]}
+        :return: Бюджет
+        :raises SettingsError: Если данные бюджета некорректны
+        """
+
+        if not isinstance(data, dict) or "name" not in data or "limit" not in data:
+            raise SettingsError("Бюджет должен быть JSON - объектом с ключами name и limit")
+        period = data.get("period", "month")
+        if period not in BUDGET_PERIODS:
+            raise SettingsError(f"Неизвестный период бюджета {period}")
+        try:
+            limit = float(data["limit"])
+            thresholds = tuple(sorted(float(threshold) for threshold in data.get("thresholds", DEFAULT_THRESHOLDS)))
+        except (TypeError, ValueError) as ex:
+            raise SettingsError(f"Некорректный лимит бюджета {data['name']}: {ex}") from ex
+        if limit <= 0 or not thresholds or thresholds[0] <= 0:
+            raise SettingsError(f"Лимит и пороги бюджета {data['name']} должны быть положительными")
+        return cls(str(data["name"]), limit, period, data.get("category"), data.get("card"), thresholds)
+
+
+@dataclass(frozen=True)
+class BudgetAlert:
+    """Предупреждение о достижении доли лимита бюджета"""
+
+    budget: str
+    period_start: str
+    threshold: float
+    spent: float
+    limit: float
+    operation_date: str
+
+    def to_dict(self) -> dict[str, Any]:
+        """Словарь для JSON - ответа"""
+        return {
+            "budget": self.budget,
+            "period_start": self.period_start,
+            "threshold": self.threshold,
+            "spent": round(self.spent, 2),
+            "limit": self.limit,
+            "date": self.operation_date,
+        }
+
+
+def get_budgets_path(user_id: Optional[str] = None) -> str:
+    """
+    Функция возвращает путь к файлу бюджетов пользователя рядом с файлом его настроек.
+
+    :param user_id: Идентификатор пользователя, None - пользователь по умолчанию ("/data/budgets.json")
+    :return: Путь к файлу "/data/users/<user_id>.budgets.json"
+    """
+
+    if user_id is None:
+        return path_to_budgets
+    return os.path.splitext(get_settings_path(user_id))[0] + ".budgets.json"
+
+
+def load_budgets(user_id: Optional[str] = None) -> list[Budget]:
+    """
+    Функция загружает бюджеты пользователя из JSON - файла.
+
+    :param user_id: Идентификатор пользователя, None - пользователь по умолчанию
+    :return: Список бюджетов, при отсутствии файла - пустой список
+    :raises SettingsError: Если файл содержит некорректные бюджеты
+    """
+
+    logger.info(f"Вызов функции {load_budgets.__name__}")
+
+    try:
+        with open(get_budgets_path(user_id), "r", encoding="utf-8") as budgets_file:
+            data = json.load(budgets_file)
+    except FileNotFoundError as ex:
+        logger.error(f"Файл по заданному пути отсутствует {ex}")
+        return []
+
+    if not isinstance(data, list):
+        raise SettingsError("Файл бюджетов должен содержать список")
+    return [Budget.from_dict(budget) for budget in data]
+
+
+def _get_period_key(period: str, operation_date: date) -> int:
+    """Номер периода операции: день и неделя - по порядковому номеру дня, месяц - год * 12 + месяц"""
+
+    if period == "month":
+        return operation_date.year * 12 + operation_date.month - 1
+    if period == "week":
+        # Порядковый номер 1 (01.01.0001) - понедельник
+        return (operation_date.toordinal() - 1) // 7
+    return operation_date.toordinal()
+
+
+def _get_period_start(period: str, key: int) -> date:
+    if period == "month":
+        return date(key // 12, key % 12 + 1, 1)
+    if period == "week":
+        return date.fromordinal(key * 7 + 1)
+    return date.fromordinal(key)
+
+
+class BudgetMonitor:
+    """
+    Класс потоковой проверки бюджетов.
+    Для каждого бюджета хранятся только номер текущего периода, сумма трат в нем и индекс следующего порога,
+    бюджеты разложены по ключам (категория, карта), поэтому каждая трата обрабатывается за O(1):
+    четыре поиска в словаре и обновление счетчиков подходящих бюджетов.
+
+    Трата, относящаяся к новому периоду бюджета, начинает период заново; траты прошедших периодов
+    (пришедшие с опозданием) на текущий период не влияют.
+    """
+
+    def __init__(self, budgets: list[Budget], on_alert: Optional[Callable[[BudgetAlert], None]] = None) -> None:
+        self.budgets = list(budgets)
+        self.on_alert = on_alert
+        self._periods = [0] * len(self.budgets)
+        self._spent = [0.0] * len(self.budgets)
+        self._next_threshold = [0] * len(self.budgets)
+        self._period_types = [budget.period for budget in self.budgets]
+        # Лимиты порогов бюджета в рублях по возрастанию и сумма следующего порога текущего периода
+        self._threshold_limits = [[budget.limit * threshold for threshold in budget.thresholds] for budget in budgets]
+        self._next_limits = [limits[0] for limits in self._threshold_limits]
+
+        self._index: dict[tuple[Optional[str], Optional[str]], list[int]] = {}
+        for position, budget in enumerate(self.budgets):
+            self._index.setdefault((budget.category, budget.card), []).append(position)
+
+    def get_spent(self) -> dict[str, float]:
+        """Суммы трат в текущих периодах бюджетов"""
+        return {budget.name: spent for budget, spent in zip(self.budgets, self._spent)}
+
+    def add(
+        self, operation_date: date, amount: float, category: Optional[str], card: Optional[str]
+    ) -> list[BudgetAlert]:
+        """
+        Метод учитывает одну трату.
+
+        :param operation_date: Дата операции
+        :param amount: Сумма траты (положительная)
+        :param category: Категория операции
+        :param card: Номер карты
+        :return: Список предупреждений о пересеченных порогах
+        """
+
+        alerts: list[BudgetAlert] = []
+        index, periods, current_periods = self._index, self._period_types, self._periods
+        spent_list, next_limits = self._spent, self._next_limits
+        keys: tuple[tuple[Optional[str], Optional[str]], ...] = (
+            (category, card),
+            (category, None),
+            (None, card),
+            (None, None),
+        )
+        if category is None or card is None:
+            keys = tuple(dict.fromkeys(keys))
+        for key in keys:
+            positions = index.get(key)
+            if positions is None:
+                continue
+            for position in positions:
+                period_key = _get_period_key(periods[position], operation_date)
+                if period_key != current_periods[position]:
+                    if period_key < current_periods[position]:
+                        continue
+                    current_periods[position] = period_key
+                    spent_list[position] = 0.0
+                    self._next_threshold[position] = 0
+                    next_limits[position] = self._threshold_limits[position][0]
+
+                spent = spent_list[position] = spent_list[position] + amount
+                if spent >= next_limits[position]:
+                    alerts.extend(self._cross(position, operation_date))
+        return alerts
+
+    def _cross(self, position: int, operation_date: date) -> list[BudgetAlert]:
+        """Предупреждения по всем порогам, пересеченным суммой трат бюджета"""
+
+        budget = self.budgets[position]
+        limits = self._threshold_limits[position]
+        period_start = _get_period_start(budget.period, self._periods[position]).isoformat()
+        spent = self._spent[position]
+        alerts = []
+        while self._next_threshold[position] < len(limits) and spent >= limits[self._next_threshold[position]]:
+            threshold = budget.thresholds[self._next_threshold[position]]
+            alert = BudgetAlert(budget.name, period_start, threshold, spent, budget.limit, operation_date.isoformat())
+            if self.on_alert is not None:
+                self.on_alert(alert)
+            alerts.append(alert)
+            self._next_threshold[position] += 1
+
+        following = self._next_threshold[position]
+        self._next_limits[position] = limits[following] if following < len(limits) else math.inf
+        return alerts
+
+    def process(self, transaction: dict) -> list[BudgetAlert]:
+        """
+        Метод учитывает одну операцию, если это успешная трата.
+
+        :param transaction: Словарь с данными операции, "Дата операции" - datetime
+        :return: Список предупреждений
+        """
+
+        if transaction["Статус"] != "OK" or transaction["Сумма операции"] >= 0:
+            return []
+        return self.add(
+            transaction["Дата операции"],
+            -float(transaction["Сумма операции"]),
+            transaction["Категория"],
+            transaction["Номер карты"],
+        )
+
+    def process_transactions(self, transactions: pd.DataFrame) -> list[BudgetAlert]:
+        """
+        Метод учитывает траты дата фрейма в порядке даты операции.
+
+        :param transactions: Дата фрейм с новыми транзакциями
+        :return: Список предупреждений
+        """
+
+        logger.info(f"Вызов метода {self.process_transactions.__name__}")
+
+        if len(transactions) == 0:
+            return []
+        spends_mask = (transactions["Статус"] == "OK") & (transactions["Сумма операции"] < 0)
+        spends = pd.DataFrame(
+            {
+                "date": get_operation_dates(transactions)[spends_mask],
+                "amount": -transactions.loc[spends_mask, "Сумма операции"].astype(float),
+                "category": transactions.loc[spends_mask, "Категория"].astype(object),
+                "card": transactions.loc[spends_mask, "Номер карты"].astype(object),
+            }
+        ).sort_values("date", kind="stable")
+
+        alerts = []
+        add = self.add
+        for operation_date, amount, category, card in zip(
+            spends["date"].tolist(), spends["amount"].tolist(), spends["category"].tolist(), spends["card"].tolist()
+        ):
+            alerts.extend(add(operation_date, amount, category, card))
+
+        logger.info(f"Обработано {len(spends)} трат, предупреждений: {len(alerts)}")
+        return alerts
@@ -0,0 +1,186 @@
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.query import TransactionQuery
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("cashback")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "cashback.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+path_to_cashback_programs = os.path.abspath(
+    os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "cashback_programs.json")
+)
+
+
+@dataclass
+class CashbackProgram:
+    """
+    Программа кэшбэка карты. Ставка операции берется по MCC, если он задан в mcc_rates,
+    иначе по категории из category_rates, иначе базовая ставка base_rate.
+    Кэшбэк начисляется за траты не меньше min_amount, за месяц - только если траты месяца
+    не меньше min_monthly_spend, и ограничивается monthly_cap в месяц.
+    """
+
+    name: str
+    base_rate: float = 0.01
+    category_rates: dict[str, float] = field(default_factory=dict)
+    mcc_rates: dict[int, float] = field(default_factory=dict)
+    monthly_cap: Optional[float] = None
+    min_monthly_spend: float = 0.0
+    min_amount: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CashbackProgram":
+        """Программа из словаря JSON - файла, ключи MCC - строки"""
+
+        return cls(
+            name=str(data["name"]),
+            base_rate=float(data.get("base_rate", 0.01)),
+            category_rates={str(key): float(value) for key, value in data.get("category_rates", {}).items()},
+            mcc_rates={int(key): float(value) for key, value in data.get("mcc_rates", {}).items()},
+            monthly_cap=None if data.get("monthly_cap") is None else float(data["monthly_cap"]),
+            min_monthly_spend=float(data.get("min_monthly_spend", 0.0)),
+            min_amount=float(data.get("min_amount", 0.0)),
+        )
+
+
+def load_cashback_programs(path: Optional[str] = None) -> list[CashbackProgram]:
+    """
+    Функция загружает программы кэшбэка из JSON - файла "/data/cashback_programs.json".
+
+    :param path: Путь к файлу, None - файл по умолчанию
+    :return: Список программ, при отсутствии файла - пустой список
+    """
+
+    logger.info(f"Вызов функции {load_cashback_programs.__name__}")
+
+    try:
+        with open(path or path_to_cashback_programs, "r", encoding="utf-8") as programs_file:
+            return [CashbackProgram.from_dict(program) for program in json.load(programs_file)]
+    except FileNotFoundError as ex:
+        logger.error(f"Файл по заданному пути отсутствует {ex}")
+        return []
+
+
+def _get_rate_table(programs: list[CashbackProgram], attribute: str, keys: pd.Index) -> np.ndarray:
+    """Таблица ставок программы x ключ (категория или MCC), NaN - ставка не задана"""
+
+    table = np.full((len(programs), len(keys) + 1), np.nan)
+    for row, program in enumerate(programs):
+        rates = getattr(program, attribute)
+        positions = keys.get_indexer(pd.Index(list(rates)))
+        found = positions >= 0
+        table[row, positions[found]] = np.array(list(rates.values()), dtype=float)[found]
+    return table
+
+
+def simulate_cashback_by_month(transactions: pd.DataFrame, programs: list[CashbackProgram]) -> pd.DataFrame:
+    """
+    Функция считает кэшбэк каждой программы за каждый месяц истории операций.
+    Траты один раз суммируются по месяцам и категориям, кэшбэк всех программ считается произведением
+    матрицы ставок программы x категории на суммы месяцы x категории; правила MCC добавляют разницу ставок
+    по суммам трат своих MCC. Пороги и лимиты применяются к матрице программы x месяцы.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param programs: Список программ кэшбэка
+    :return: Дата фрейм кэшбэка: строки - программы (по имени), колонки - месяцы "YYYY-MM"
+    """
+
+    logger.info(f"Вызов функции {simulate_cashback_by_month.__name__}")
+
+    names = [program.name for program in programs]
+    spends = (
+        TransactionQuery(transactions)
+        .status("OK")
+        .spends()
+        .select("Дата операции", "Сумма операции", "Категория", "MCC")
+        .collect()
+    )
+    if len(spends) == 0 or len(programs) == 0:
+        return pd.DataFrame(index=pd.Index(names, name="program"), dtype=float)
+
+    amounts = -spends["Сумма операции"].to_numpy(dtype=float)
+    month_codes, months = pd.factorize(get_operation_dates(spends).to_numpy(dtype="datetime64[M]"), sort=True)
+    category_codes, categories = pd.factorize(spends["Категория"].astype(object))
+    mccs = pd.to_numeric(spends["MCC"], errors="coerce").to_numpy(dtype=float)
+
+    # Траты за месяц по категориям (последняя колонка - без категории) отдельно для каждого порога min_amount
+    thresholds, threshold_codes = np.unique([program.min_amount for program in programs], return_inverse=True)
+    threshold_amounts = [np.where(amounts >= threshold, amounts, 0.0) for threshold in thresholds]
+    shape = (len(months), len(categories) + 1)
+    groups = month_codes * shape[1] + np.where(category_codes < 0, len(categories), category_codes)
+    category_amounts = np.stack(
+        [
+            np.bincount(groups, weights=weights, minlength=shape[0] * shape[1]).reshape(shape)
+            for weights in threshold_amounts
+        ]
+    )
+
+    # Ставки программы x категории: ставка категории или базовая ставка, кэшбэк программы x месяцы - одним einsum
+    category_table = _get_rate_table(programs, "category_rates", pd.Index(categories))
+    base_rates = np.array([program.base_rate for program in programs])[:, np.newaxis]
+    rates = np.where(np.isnan(category_table), base_rates, category_table)
+    monthly_cashback = np.einsum("pmc,pc->pm", category_amounts[threshold_codes], rates)
+
+    # Ставки MCC заменяют ставку категории только для MCC из правил программ:
+    # траты по этим MCC суммируются по месяцам и категориям, и к кэшбэку прибавляется разница ставок
+    rule_mccs = pd.Index(sorted({mcc for program in programs for mcc in program.mcc_rates}), dtype=float)
+    rule_codes = rule_mccs.get_indexer(pd.Index(mccs))
+    matched = rule_codes >= 0
+    if matched.any():
+        mcc_shape = (shape[0] * shape[1], len(rule_mccs))
+        mcc_groups = groups[matched] * mcc_shape[1] + rule_codes[matched]
+        mcc_amounts = [
+            np.bincount(mcc_groups, weights=weights[matched], minlength=mcc_shape[0] * mcc_shape[1])
+            .reshape(shape + (mcc_shape[1],))
+            for weights in threshold_amounts
+        ]
+        for row, program in enumerate(programs):
+            for mcc, rate in program.mcc_rates.items():
+                position = rule_mccs.get_loc(float(mcc))
+                monthly_cashback[row] += mcc_amounts[threshold_codes[row]][:, :, position] @ (rate - rates[row])
+
+    monthly_spend = np.bincount(month_codes, weights=amounts, minlength=len(months))
+    min_monthly_spends = np.array([program.min_monthly_spend for program in programs])[:, np.newaxis]
+    caps = np.array([math.inf if program.monthly_cap is None else program.monthly_cap for program in programs])
+    monthly_cashback = np.where(monthly_spend >= min_monthly_spends, monthly_cashback, 0.0)
+    monthly_cashback = np.minimum(monthly_cashback, caps[:, np.newaxis])
+
+    columns = pd.DatetimeIndex(months).strftime("%Y-%m")
+    return pd.DataFrame(monthly_cashback, index=pd.Index(names, name="program"), columns=list(columns))
+
+
+def simulate_cashback(transactions: pd.DataFrame, programs: list[CashbackProgram]) -> pd.DataFrame:
+    """
+    Функция сравнивает программы кэшбэка на истории операций.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param programs: Список программ кэшбэка
+    :return: Дата фрейм с колонками "program", "cashback" (за всю историю), "capped_months"
+        (месяцев, в которых сработал лимит), отсортированный по убыванию кэшбэка
+    """
+
+    logger.info(f"Вызов функции {simulate_cashback.__name__}")
+
+    by_month = simulate_cashback_by_month(transactions, programs)
+    caps = pd.Series([program.monthly_cap for program in programs], index=by_month.index, dtype=float)
+    result = pd.DataFrame(
+        {
+            "cashback": by_month.sum(axis=1).round(2),
+            "capped_months": by_month.ge(caps, axis=0).sum(axis=1).astype(int),
+        }
+    )
+    return result.reset_index().sort_values("cashback", ascending=False, kind="stable", ignore_index=True)
@@ -0,0 +1,254 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+from typing import Any, Optional
+
+import pandas as pd
+
+from src.portfolio import get_monthly_savings
+from src.query import TransactionQuery
+from src.schema import get_operation_dates, is_normalized, normalize_transactions
+from src.services import PERSONS_PATTERN
+
+logger = logging.getLogger("export")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "export.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Папка для выгрузки наборов данных
+path_to_export_dir = os.path.abspath(os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "exports"))
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# Пакеты, которыми pandas записывает parquet (optional extra "parquet" в pyproject.toml)
+PARQUET_ENGINES = ("pyarrow", "fastparquet")
+
+# Файл с хэшами записанных партиций набора данных
+EXPORT_MANIFEST = "_manifest.json"
+
+# Колонка месяца "YYYY-MM", по которой наборы данных разбиваются на партиции
+PARTITION_COLUMN = "month"
+
+# Пороги округления «Инвесткопилки»
+INVESTMENT_LIMITS = (10, 50, 100)
+
+
+def get_available_export_formats() -> tuple[str, ...]:
+    """
+    Функция возвращает форматы выгрузки, доступные в окружении: parquet - только если установлен
+    pyarrow или fastparquet.
+
+    :return: Кортеж форматов
+    """
+
+    has_parquet_engine = any(importlib.util.find_spec(engine) is not None for engine in PARQUET_ENGINES)
+    return tuple(file_format for file_format in EXPORT_FORMATS if file_format != "parquet" or has_parquet_engine)
+
+
+def _check_export_format(file_format: str) -> None:
+    """Проверка формата выгрузки до записи файлов"""
+
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки {file_format}")
+    if file_format not in get_available_export_formats():
+        raise ValueError(f"Для формата {file_format} установите pyarrow: pip install \".[parquet]\"")
+
+
+def get_partition_hash(partition: pd.DataFrame) -> str:
+    """
+    Функция возвращает хэш содержимого партиции: колонок, типов и значений всех строк.
+
+    :param partition: Дата фрейм партиции
+    :return: Шестнадцатеричная строка SHA-256
+    """
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in partition.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(partition, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _write_partition_file(partition: pd.DataFrame, path: str, file_format: str) -> None:
+    """Запись файла партиции через временный файл, чтобы читатели не видели недописанный файл"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    path_to_tmp = path + ".tmp"
+    if file_format == "csv":
+        partition.to_csv(path_to_tmp, index=False, encoding="utf-8")
+    else:
+        partition.to_parquet(path_to_tmp, index=False)
+    os.replace(path_to_tmp, path)
+
+
+def _read_manifest(path_to_dataset: str) -> dict[str, Any]:
+    try:
+        with open(os.path.join(path_to_dataset, EXPORT_MANIFEST), "r", encoding="utf-8") as manifest_file:
+            manifest: dict[str, Any] = json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return manifest
+
+
+def write_partitions(
+    data: pd.DataFrame, dataset: str, file_format: str = "csv", path: Optional[str] = None
+) -> dict[str, list[str]]:
+    """
+    Функция записывает набор данных по партициям месяцев "<dataset>/month=YYYY-MM/part.<формат>".
+    Колонка месяца определяет партицию и в файлы не записывается. Хэши записанных партиций хранятся
+    в файле "_manifest.json" набора, при повторной выгрузке перезаписываются только партиции с изменившимся
+    содержимым, а партиции месяцев, которых больше нет в данных, удаляются.
+
+    :param data: Дата фрейм с колонкой "month" в формате YYYY-MM
+    :param dataset: Имя набора данных (папка в папке выгрузки)
+    :param file_format: Формат файлов: "csv" или "parquet" (требует pyarrow или fastparquet)
+    :param path: Папка выгрузки, по умолчанию "/exports"
+    :return: Списки месяцев {"written": [...], "unchanged": [...], "removed": [...]}
+    :raises ValueError: Если формат неизвестен или для parquet не установлен pyarrow/fastparquet
+    """
+
+    logger.info(f"Вызов функции {write_partitions.__name__} для набора {dataset}")
+
+    _check_export_format(file_format)
+
+    path_to_dataset = os.path.join(path or path_to_export_dir, dataset)
+    manifest = _read_manifest(path_to_dataset)
+    old_hashes = manifest.get("partitions", {}) if manifest.get("format") == file_format else {}
+    file_name = f"part.{file_format}"
+
+    hashes: dict[str, str] = {}
+    result: dict[str, list[str]] = {"written": [], "unchanged": [], "removed": []}
+    for month, partition in data.groupby(PARTITION_COLUMN, sort=True):
+        partition = partition.drop(columns=PARTITION_COLUMN).reset_index(drop=True)
+        partition_path = os.path.join(path_to_dataset, f"{PARTITION_COLUMN}={month}", file_name)
+        hashes[str(month)] = get_partition_hash(partition)
+        if old_hashes.get(str(month)) == hashes[str(month)] and os.path.exists(partition_path):
+            result["unchanged"].append(str(month))
+            continue
+        _write_partition_file(partition, partition_path, file_format)
+        result["written"].append(str(month))
+
+    for month in sorted(set(old_hashes) - set(hashes)):
+        partition_dir = os.path.join(path_to_dataset, f"{PARTITION_COLUMN}={month}")
+        for name in os.listdir(partition_dir) if os.path.isdir(partition_dir) else []:
+            os.remove(os.path.join(partition_dir, name))
+        if os.path.isdir(partition_dir):
+            os.rmdir(partition_dir)
+        result["removed"].append(month)
+
+    os.makedirs(path_to_dataset, exist_ok=True)
+    path_to_manifest = os.path.join(path_to_dataset, EXPORT_MANIFEST)
+    with open(path_to_manifest + ".tmp", "w", encoding="utf-8") as manifest_file:
+        json.dump({"format": file_format, "partitions": hashes}, manifest_file, indent=4)
+    os.replace(path_to_manifest + ".tmp", path_to_manifest)
+
+    logger.info(
+        f"Набор {dataset}: записано {len(result['written'])}, без изменений {len(result['unchanged'])}, "
+        f"удалено {len(result['removed'])} партиций"
+    )
+    return result
+
+
+def get_export_datasets(
+    transactions: pd.DataFrame, limits: tuple[int, ...] = INVESTMENT_LIMITS
+) -> dict[str, pd.DataFrame]:
+    """
+    Функция формирует наборы данных выгрузки с колонкой месяца "month" (YYYY-MM):
+    - "operations" - нормализованные операции (без операций с пустой датой);
+    - "card_spends" - траты и кэшбэк по картам за месяц, как в get_cards_spends_list;
+    - "weekday" - сумма и количество успешных операций по дням недели (0 - понедельник), как в spending_by_weekday;
+    - "investment_bank" - сумма «Инвесткопилки» за месяц для каждого порога округления, как в investment_bank;
+    - "persons_transfers" - переводы физическим лицам, как в get_transactions_to_persons.
+
+    :param transactions: Нормализованный дата фрейм с транзакциями
+    :param limits: Пороги округления «Инвесткопилки»
+    :return: Словарь имя набора -> дата фрейм
+    """
+
+    logger.info(f"Вызов функции {get_export_datasets.__name__}")
+
+    dates = get_operation_dates(transactions)
+    has_date = dates.notna().to_numpy()
+    if not has_date.all():
+        logger.warning(f"Операции без даты не выгружаются: {int((~has_date).sum())}")
+    operations = transactions[has_date].reset_index(drop=True)
+    operations.insert(0, PARTITION_COLUMN, dates[has_date].dt.strftime("%Y-%m").to_numpy())
+    query = TransactionQuery(operations)
+
+    card_spends = (
+        query.spends()
+        .group_by(PARTITION_COLUMN, "Номер карты")
+        .agg(total_spent=("Сумма операции", "sum"))
+        .collect()
+        .rename(columns={"Номер карты": "card"})
+    )
+    card_spends["card"] = card_spends["card"].astype(str)
+    card_spends["total_spent"] = card_spends["total_spent"].round(2)
+    card_spends["cashback"] = (card_spends["total_spent"] / 100).round(2).abs()
+
+    successful = query.status("OK").select(PARTITION_COLUMN, "Дата операции", "Сумма операции").collect()
+    weekday = (
+        successful.groupby([successful[PARTITION_COLUMN], successful["Дата операции"].dt.weekday.rename("weekday")])[
+            "Сумма операции"
+        ]
+        .agg(total="sum", count="count")
+        .reset_index()
+    )
+
+    # Суммы «Инвесткопилки» только за месяцы с операциями, по строке на (месяц, порог)
+    savings = get_monthly_savings(operations, limits)
+    savings.index = pd.DatetimeIndex(savings.index).strftime("%Y-%m")
+    investment_bank = (
+        savings[savings.index.isin(operations[PARTITION_COLUMN].unique())]
+        .rename_axis(PARTITION_COLUMN)
+        .melt(ignore_index=False, var_name="limit", value_name="amount_saved")
+        .reset_index()
+        .sort_values([PARTITION_COLUMN, "limit"], ignore_index=True)
+    )
+    investment_bank["amount_saved"] = investment_bank["amount_saved"].round(2)
+
+    persons_transfers = query.category("Переводы").matches("Описание", PERSONS_PATTERN).collect()
+
+    return {
+        "operations": operations,
+        "card_spends": card_spends,
+        "weekday": weekday,
+        "investment_bank": investment_bank,
+        "persons_transfers": persons_transfers,
+    }
+
+
+def export_transactions(
+    transactions: pd.DataFrame,
+    file_format: str = "csv",
+    path: Optional[str] = None,
+    limits: tuple[int, ...] = INVESTMENT_LIMITS,
+) -> dict[str, dict[str, list[str]]]:
+    """
+    Функция выгружает операции и агрегаты отчетов по партициям месяцев для внешних систем (BI).
+    При повторной выгрузке перезаписываются только месяцы, данные которых изменились.
+
+    :param transactions: Дата фрейм с транзакциями (ненормализованный нормализуется)
+    :param file_format: Формат файлов: "csv" или "parquet"
+    :param path: Папка выгрузки, по умолчанию "/exports"
+    :param limits: Пороги округления «Инвесткопилки»
+    :return: Результат write_partitions для каждого набора данных
+    :raises ValueError: Если формат неизвестен или для parquet не установлен pyarrow/fastparquet
+    """
+
+    logger.info(f"Вызов функции {export_transactions.__name__}")
+
+    _check_export_format(file_format)
+    if len(transactions) == 0:
+        logger.warning("Данные для выгрузки отсутствуют")
+        return {}
+    if not is_normalized(transactions):
+        transactions = normalize_transactions(transactions)[0]
+
+    datasets = get_export_datasets(transactions, limits)
+    return {name: write_partitions(data, name, file_format, path) for name, data in datasets.items()}
@@ -0,0 +1,168 @@
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.query import TransactionQuery
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("forecast")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "forecast.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Колонки, в разрезе которых строится прогноз
+FORECAST_COLUMNS = ("Категория", "Номер карты")
+
+
+def get_monthly_spends(transactions: pd.DataFrame, column: str) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    """
+    Функция возвращает траты успешных операций по месяцам для каждого значения колонки.
+    Операции без значения колонки не учитываются.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param column: Колонка рядов ("Категория" или "Номер карты")
+    :return keys, months, spends: Значения колонки, непрерывный ряд месяцев datetime64[M]
+        и матрица трат значения x месяцы
+    """
+
+    spends = TransactionQuery(transactions).status("OK").spends().select("Дата операции", "Сумма операции", column)
+    spends_df = spends.collect()
+    spends_df = spends_df[spends_df[column].notna()]
+    if len(spends_df) == 0:
+        return pd.Index([], dtype=object), np.array([], dtype="datetime64[M]"), np.zeros((0, 0))
+
+    key_codes, keys = pd.factorize(spends_df[column].astype(object))
+    operation_months = get_operation_dates(spends_df).to_numpy(dtype="datetime64[M]")
+    months = np.arange(operation_months.min(), operation_months.max() + 1)
+    month_codes = (operation_months - months[0]).astype(int)
+
+    matrix = np.bincount(
+        key_codes * len(months) + month_codes,
+        weights=-spends_df["Сумма операции"].to_numpy(dtype=float),
+        minlength=len(keys) * len(months),
+    ).reshape(len(keys), len(months))
+    return pd.Index(keys, dtype=object), months, matrix
+
+
+class SpendingForecaster:
+    """
+    Класс прогноза трат на следующий месяц по каждой категории или карте.
+    Все ряды хранятся одной матрицей значения x месяцы и обрабатываются вместе векторными операциями NumPy:
+    - сезонный наивный прогноз - траты того же месяца season месяцев назад
+      (если истории меньше сезона - траты последнего месяца);
+    - простое экспоненциальное сглаживание - уровень ряда level = alpha * траты + (1 - alpha) * level.
+
+    Уровни сглаживания кэшируются для каждого месяца, при добавлении новых транзакций методом update
+    пересчитываются только месяцы, начиная с первого затронутого.
+    """
+
+    def __init__(
+        self,
+        column: str = "Категория",
+        alpha: float = 0.3,
+        season: int = 12,
+        transactions: Optional[pd.DataFrame] = None,
+    ) -> None:
+        if column not in FORECAST_COLUMNS:
+            raise ValueError(f"Неизвестная колонка прогноза {column}")
+        if not 0 < alpha <= 1:
+            raise ValueError("Параметр сглаживания должен быть в интервале (0, 1]")
+        if season < 1:
+            raise ValueError("Длина сезона должна быть положительной")
+
+        self.column = column
+        self.alpha = alpha
+        self.season = season
+        self.keys: pd.Index = pd.Index([], dtype=object)
+        self.months = np.array([], dtype="datetime64[M]")
+        self._spends = np.zeros((0, 0))
+        self._levels = np.zeros((0, 0))
+
+        if transactions is not None:
+            self.update(transactions)
+
+    @property
+    def spends(self) -> pd.DataFrame:
+        """Траты по месяцам: строки - значения колонки, колонки - месяцы"""
+        columns = [str(month) for month in self.months]
+        return pd.DataFrame(self._spends, index=self.keys.rename(self.column), columns=columns)
+
+    def update(self, transactions: pd.DataFrame) -> None:
+        """
+        Метод добавляет траты транзакций в ряды.
+        Новые значения колонки и месяцы добавляются в матрицу, траты уже известных месяцев суммируются.
+
+        :param transactions: Дата фрейм с новыми транзакциями
+        """
+
+        logger.info(f"Вызов метода {self.update.__name__}")
+
+        keys, months, matrix = get_monthly_spends(transactions, self.column)
+        if len(months) == 0:
+            logger.warning("Новые траты отсутствуют")
+            return
+
+        all_keys = self.keys.append(keys[~keys.isin(self.keys)])
+        if len(self.months) == 0:
+            first, last = months[0], months[-1]
+        else:
+            first, last = min(months[0], self.months[0]), max(months[-1], self.months[-1])
+        all_months = np.arange(first, last + 1)
+
+        spends = np.zeros((len(all_keys), len(all_months)))
+        levels = np.zeros_like(spends)
+        offset = int((self.months[0] - first).astype(int)) if len(self.months) else 0
+        known = np.s_[: len(self.keys), offset: offset + len(self.months)]
+        spends[known] = self._spends
+        levels[known] = self._levels
+        columns = (months - first).astype(int)
+        spends[np.ix_(all_keys.get_indexer(keys), columns)] += matrix
+
+        # Пересчет с первого месяца новых трат или первого месяца, которого не было в рядах
+        dirty_from = min(int(columns[0]), offset + len(self.months)) if offset == 0 else 0
+
+        self.keys, self.months, self._spends, self._levels = all_keys, all_months, spends, levels
+        self._fit(dirty_from)
+        logger.info(f"Ряды обновлены начиная с {all_months[dirty_from]}")
+
+    def _fit(self, start: int) -> None:
+        """Экспоненциальное сглаживание всех рядов с месяца start: цикл по месяцам, вектор по рядам"""
+
+        for position in range(start, len(self.months)):
+            values = self._spends[:, position]
+            if position == 0:
+                self._levels[:, position] = values
+            else:
+                self._levels[:, position] = self.alpha * values + (1 - self.alpha) * self._levels[:, position - 1]
+
+    @property
+    def next_month(self) -> Optional[str]:
+        """Месяц прогноза в формате YYYY-MM"""
+        return str(self.months[-1] + 1) if len(self.months) else None
+
+    def forecast(self) -> pd.DataFrame:
+        """
+        Метод возвращает прогноз трат на месяц, следующий за последним месяцем рядов.
+
+        :return: Дата фрейм с индексом по значениям колонки и колонками "seasonal_naive", "ses",
+            отсортированный по убыванию прогноза "ses"
+        """
+
+        logger.info(f"Вызов метода {self.forecast.__name__}")
+
+        if len(self.months) == 0:
+            return pd.DataFrame(columns=["seasonal_naive", "ses"], index=pd.Index([], name=self.column), dtype=float)
+
+        seasonal_position = len(self.months) - self.season if len(self.months) >= self.season else -1
+        forecast_df = pd.DataFrame(
+            {"seasonal_naive": self._spends[:, seasonal_position], "ses": self._levels[:, -1]},
+            index=self.keys.rename(self.column),
+        )
+        return forecast_df.sort_values("ses", ascending=False, kind="stable")
@@ -0,0 +1,277 @@
+import logging
+import os
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("fx")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "fx.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+BASE_CURRENCY = "RUB"
+
+# Архив курсов ЦБ РФ по датам, адрес сервиса задается переменной окружения CBR_BASE_URL
+CBR_ARCHIVE_PATH = "/archive/{date:%Y/%m/%d}/daily_json.js"
+
+# Время ожидания ответа ЦБ РФ в секундах (подключение, чтение)
+CBR_TIMEOUT = (5.0, 30.0)
+
+# На сколько дней назад искать курс на дату: в выходные и праздники ЦБ курсы не устанавливает
+CBR_MAX_DAYS_BACK = 7
+
+path_to_fx_rates = os.path.abspath(
+    os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "fx_rates.csv")
+)
+
+
+def get_cbr_base_url() -> str:
+    """
+    Функция возвращает адрес сервиса курсов ЦБ РФ из переменной окружения CBR_BASE_URL
+    (например, адрес локального сервера-заглушки src/stub_server.py), по умолчанию https://www.cbr-xml-daily.ru
+
+    :return: Адрес сервиса без завершающего "/"
+    """
+
+    return (os.getenv("CBR_BASE_URL") or "https://www.cbr-xml-daily.ru").rstrip("/")
+
+
+class FxRateStore:
+    """
+    Таблица исторических курсов валют к рублю: колонки "date", "currency", "rate" (рублей за 1 единицу валюты).
+    Курсы загружаются из CSV - файла, при необходимости догружаются из архива ЦБ РФ и сохраняются обратно.
+    Пересчет сумм выполняется векторно: для каждой операции берется последний известный курс
+    на дату операции (as-of join).
+    """
+
+    def __init__(self, rates: Optional[pd.DataFrame] = None) -> None:
+        self.rates = pd.DataFrame(
+            {
+                "date": pd.Series(dtype="datetime64[ns]"),
+                "currency": pd.Series(dtype=object),
+                "rate": pd.Series(dtype=float),
+            }
+        )
+        if rates is not None:
+            self.add_rates(rates)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "FxRateStore":
+        """Метод загружает курсы из CSV - файла, при отсутствии файла возвращает пустую таблицу"""
+
+        try:
+            return cls(pd.read_csv(path, parse_dates=["date"]))
+        except FileNotFoundError:
+            logger.warning(f"Файл курсов {path} отсутствует")
+            return cls()
+
+    def to_csv(self, path: str) -> None:
+        """Метод сохраняет курсы в CSV - файл"""
+        self.rates.to_csv(path, index=False, date_format="%Y-%m-%d")
+
+    def add_rates(self, rates: pd.DataFrame) -> None:
+        """
+        Метод добавляет курсы в таблицу, при совпадении даты и валюты сохраняется новый курс.
+
+        :param rates: Дата фрейм с колонками "date", "currency", "rate"
+        """
+
+        new_rates = rates[["date", "currency", "rate"]].astype({"currency": str, "rate": float})
+        new_rates["date"] = pd.to_datetime(new_rates["date"]).astype("datetime64[ns]")
+        self.rates = (
+            pd.concat([self.rates, new_rates], ignore_index=True)
+            .drop_duplicates(["date", "currency"], keep="last")
+            .sort_values(["date", "currency"], ignore_index=True)
+        )
+
+    def fetch(self, dates: Iterable[date], currencies: Optional[list[str]] = None) -> None:
+        """
+        Метод догружает из архива ЦБ РФ курсы за даты, которых нет в таблице.
+        В выходные и праздники архив отвечает 404, такие даты пропускаются - для них используется предыдущий курс.
+
+        :param dates: Даты курсов
+        :param currencies: Список валют, None - все валюты из ответа
+        """
+
+        logger.info(f"Вызов метода {self.fetch.__name__}")
+
+        known_dates = set(self.rates["date"].dt.date)
+        fetched = []
+
+        for rate_date in sorted(set(dates) - known_dates):
+            try:
+                response = requests.get(
+                    get_cbr_base_url() + CBR_ARCHIVE_PATH.format(date=rate_date), timeout=CBR_TIMEOUT
+                )
+            except requests.RequestException as ex:
+                logger.error(f"Ошибка запроса курсов за {rate_date}: {ex}")
+                continue
+            if response.status_code != 200:
+                logger.warning(f"Курсы за {rate_date} отсутствуют. Ответ {response.status_code}")
+                continue
+
+            for currency, data in response.json()["Valute"].items():
+                if currencies is None or currency in currencies:
+                    fetched.append({"date": rate_date, "currency": currency, "rate": data["Value"] / data["Nominal"]})
+
+        if fetched:
+            self.add_rates(pd.DataFrame(fetched))
+        logger.info(f"Загружено {len(fetched)} курсов")
+
+    def has_rate(self, currency: str, rate_date: date, max_days_back: int = CBR_MAX_DAYS_BACK) -> bool:
+        """Метод проверяет, есть ли курс валюты на дату или не раньше чем за max_days_back дней до нее"""
+
+        dates = self.rates.loc[self.rates["currency"] == currency, "date"]
+        day = pd.Timestamp(rate_date)
+        return bool(((dates <= day) & (dates >= day - pd.Timedelta(days=max_days_back))).any())
+
+    def fetch_as_of(
+        self, dates: Iterable[date], currencies: list[str], max_days_back: int = CBR_MAX_DAYS_BACK
+    ) -> None:
+        """
+        Метод догружает курсы валют, действующие на даты: если курса на дату нет (выходной или праздник),
+        запрашиваются предыдущие дни, но не больше max_days_back дней назад.
+
+        :param dates: Даты курсов
+        :param currencies: Список валют
+        :param max_days_back: Сколько дней назад искать курс
+        """
+
+        logger.info(f"Вызов метода {self.fetch_as_of.__name__}")
+
+        for rate_date in sorted(set(dates)):
+            for days_back in range(max_days_back + 1):
+                if all(self.has_rate(currency, rate_date, max_days_back) for currency in currencies):
+                    break
+                self.fetch([rate_date - timedelta(days=days_back)], currencies)
+
+    def get_rates(self, currencies: pd.Series, dates: pd.Series) -> np.ndarray:
+        """
+        Метод возвращает курсы к рублю для пар (валюта, дата): последний известный курс на дату.
+        Для рубля курс равен 1, для валют без известного курса - NaN.
+
+        :param currencies: Ряд кодов валют
+        :param dates: Ряд дат
+        :return: Массив курсов в порядке входных рядов
+        """
+
+        left = pd.DataFrame(
+            {
+                "date": pd.to_datetime(dates.to_numpy(), dayfirst=True).astype("datetime64[ns]"),
+                "currency": currencies.astype(str).to_numpy(),
+                "position": np.arange(len(currencies)),
+            }
+        ).sort_values("date", kind="stable")
+
+        merged = pd.merge_asof(left, self.rates, on="date", by="currency", direction="backward")
+        rates = np.empty(len(currencies))
+        rates[merged["position"].to_numpy()] = merged["rate"].to_numpy(dtype=float)
+        rates[currencies.astype(str).to_numpy() == BASE_CURRENCY] = 1.0
+        return rates
+
+
+def get_fx_rate_store(path: Optional[str] = None) -> FxRateStore:
+    """
+    Функция возвращает таблицу курсов из файла "/data/fx_rates.csv".
+
+    :param path: Путь к CSV - файлу курсов
+    :return: Таблица курсов
+    """
+
+    return FxRateStore.from_csv(path or path_to_fx_rates)
+
+
+def update_fx_rates(transactions: pd.DataFrame, path: Optional[str] = None) -> FxRateStore:
+    """
+    Функция догружает из архива ЦБ РФ курсы валют операций за даты операций, которых нет в файле курсов,
+    и сохраняет обновленную таблицу в файл.
+
+    :param transactions: Дата фрейм операций
+    :param path: Путь к CSV - файлу курсов
+    :return fx_rates: Обновленная таблица курсов
+    """
+
+    logger.info(f"Вызов функции {update_fx_rates.__name__}")
+
+    fx_rates = get_fx_rate_store(path)
+    foreign = transactions[transactions["Валюта операции"] != BASE_CURRENCY]
+    if len(foreign) == 0:
+        return fx_rates
+
+    operation_dates = get_operation_dates(foreign).dt.date
+    fx_rates.fetch(set(operation_dates), sorted(set(foreign["Валюта операции"].astype(str))))
+    fx_rates.to_csv(path or path_to_fx_rates)
+    return fx_rates
+
+
+def update_fx_rates_as_of(dates: Iterable[date], currencies: list[str], path: Optional[str] = None) -> FxRateStore:
+    """
+    Функция догружает из архива ЦБ РФ курсы валют, действующие на даты (например, на концы месяцев),
+    и сохраняет обновленную таблицу в файл.
+
+    :param dates: Даты курсов
+    :param currencies: Список валют
+    :param path: Путь к CSV - файлу курсов
+    :return fx_rates: Обновленная таблица курсов
+    """
+
+    logger.info(f"Вызов функции {update_fx_rates_as_of.__name__}")
+
+    fx_rates = get_fx_rate_store(path)
+    fx_rates.fetch_as_of(dates, currencies)
+    fx_rates.to_csv(path or path_to_fx_rates)
+    return fx_rates
+
+
+def convert_transactions_to_rub(transactions: pd.DataFrame, fx_rates: FxRateStore) -> pd.DataFrame:
+    """
+    Функция пересчитывает суммы операций в рубли по курсу на дату операции.
+    Возвращает копию дата фрейма, в которой "Сумма операции" и "Сумма операции с округлением" в рублях,
+    а исходные значения сохранены в колонках "Сумма операции (исходная)" и "Валюта операции (исходная)".
+    Если курса нет, используется "Сумма платежа", если платеж проведен в рублях.
+
+    :param transactions: Дата фрейм операций
+    :param fx_rates: Таблица курсов
+    :return converted: Дата фрейм операций с суммами в рублях
+    """
+
+    logger.info(f"Вызов функции {convert_transactions_to_rub.__name__}")
+
+    converted = transactions.copy()
+    if len(converted) == 0:
+        return converted
+
+    rates = fx_rates.get_rates(converted["Валюта операции"], converted["Дата операции"])
+    operation_amounts = converted["Сумма операции"].to_numpy(dtype=float)
+
+    # Без курса берем сумму платежа, если она в рублях
+    missing = np.isnan(rates)
+    if "Сумма платежа" in converted.columns and "Валюта платежа" in converted.columns:
+        payment_in_rub = missing & (converted["Валюта платежа"] == BASE_CURRENCY).to_numpy() & (operation_amounts != 0)
+        payment_amounts = converted["Сумма платежа"].to_numpy(dtype=float)
+        rates[payment_in_rub] = payment_amounts[payment_in_rub] / operation_amounts[payment_in_rub]
+        missing &= ~payment_in_rub
+
+    if missing.any():
+        logger.warning(f"Нет курса для {int(missing.sum())} операций, суммы оставлены в исходной валюте")
+        rates[missing] = 1.0
+
+    converted["Сумма операции (исходная)"] = converted["Сумма операции"]
+    converted["Валюта операции (исходная)"] = converted["Валюта операции"]
+    converted["Сумма операции"] = (operation_amounts * rates).round(2)
+    converted["Валюта операции"] = np.where(missing, converted["Валюта операции"], BASE_CURRENCY)
+    if "Сумма операции с округлением" in converted.columns:
+        converted["Сумма операции с округлением"] = (
+            converted["Сумма операции с округлением"].to_numpy(dtype=float) * rates
+        ).round(2)
+
+    return converted
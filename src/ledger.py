@@ -0,0 +1,178 @@
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("ledger")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "ledger.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Колонки операций, которые нужны журналу остатков
+LEDGER_COLUMNS = ("Дата операции", "Номер карты", "Статус", "Сумма платежа")
+
+
+def get_ledger_entries(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция отбирает из транзакций движения по картам: успешные операции (Статус == "OK") с номером карты.
+    Движение по карте - "Сумма платежа" (сумма, списанная со счета карты или зачисленная на него).
+
+    :param transactions: Дата фрейм с транзакциями
+    :return entries: Дата фрейм с колонками "date", "card", "amount", упорядоченный по дате операции
+    """
+
+    if len(transactions) == 0:
+        return pd.DataFrame(
+            {
+                "date": pd.Series(dtype="datetime64[ns]"),
+                "card": pd.Series(dtype=object),
+                "amount": pd.Series(dtype=float),
+            }
+        )
+
+    mask = ((transactions["Статус"] == "OK") & transactions["Номер карты"].notna()).to_numpy()
+    entries = pd.DataFrame(
+        {
+            "date": get_operation_dates(transactions).to_numpy(dtype="datetime64[ns]")[mask],
+            "card": transactions["Номер карты"].astype(object).to_numpy()[mask],
+            "amount": transactions["Сумма платежа"].to_numpy(dtype=float)[mask],
+        }
+    )
+    entries = entries[entries["date"].notna()]
+    return entries.sort_values("date", kind="stable", ignore_index=True)
+
+
+class CardLedger:
+    """
+    Класс журнала остатков по картам.
+    Хранит движения по картам в порядке даты операции и остаток карты после каждого движения,
+    посчитанный накопленной суммой по группам карт. Остаток - сумма входящего остатка (если задан)
+    и всех движений по карте, выгрузка банка входящих остатков не содержит.
+
+    Остаток на момент времени ищется бинарным поиском по датам движений карты.
+    При добавлении операций методом update пересчитываются только движения,
+    начиная с даты первой новой операции.
+    """
+
+    def __init__(
+        self, transactions: Optional[pd.DataFrame] = None, opening_balances: Optional[Mapping[str, float]] = None
+    ) -> None:
+        self._entries = get_ledger_entries(pd.DataFrame()).assign(balance=pd.Series(dtype=float))
+        self._opening_balances = dict(opening_balances or {})
+        # Кэш массивов дат и остатков по картам для бинарного поиска
+        self._lookup: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+        if transactions is not None:
+            self.update(transactions)
+
+    @property
+    def entries(self) -> pd.DataFrame:
+        """Движения по картам с колонками "date", "card", "amount", "balance" """
+        return self._entries.copy()
+
+    @property
+    def cards(self) -> list[str]:
+        """Номера карт журнала"""
+        return sorted(set(self._entries["card"]) | set(self._opening_balances))
+
+    def update(self, transactions: pd.DataFrame) -> None:
+        """
+        Метод добавляет транзакции в журнал.
+        Движения с датой не позже первой новой операции не пересчитываются: остатки карт на эту дату
+        берутся из журнала, к ним прибавляются накопленные суммы более поздних и новых движений.
+        Новые движения с той же датой, что и движения журнала, встают после них.
+
+        :param transactions: Дата фрейм с новыми транзакциями
+        """
+
+        logger.info(f"Вызов метода {self.update.__name__}")
+
+        new_entries = get_ledger_entries(transactions)
+        if new_entries.empty:
+            logger.warning("Новые движения по картам отсутствуют")
+            return
+
+        first_date = new_entries["date"].iloc[0]
+        position = int(self._entries["date"].searchsorted(first_date, side="right"))
+        head = self._entries.iloc[:position]
+        tail = pd.concat([self._entries.iloc[position:].drop(columns="balance"), new_entries], ignore_index=True)
+        tail = tail.sort_values("date", kind="stable", ignore_index=True)
+
+        # Остатки карт на начало пересчитываемой части
+        start_balances = pd.Series(self._opening_balances, dtype=float)
+        start_balances = head.groupby("card")["balance"].last().combine_first(start_balances)
+        tail["balance"] = tail.groupby("card")["amount"].cumsum() + tail["card"].map(start_balances).fillna(0.0)
+
+        self._entries = pd.concat([head, tail], ignore_index=True) if len(head) else tail
+        self._lookup = {}
+
+        logger.info(f"Журнал пересчитан начиная с {first_date}: {len(tail)} движений из {len(self._entries)}")
+
+    def _get_card_lookup(self, card: str) -> tuple[np.ndarray, np.ndarray]:
+        """Упорядоченные даты движений карты и остатки после них"""
+
+        if card not in self._lookup:
+            card_entries = self._entries[self._entries["card"] == card]
+            self._lookup[card] = (card_entries["date"].to_numpy(), card_entries["balance"].to_numpy())
+        return self._lookup[card]
+
+    def balance_at(self, moment: Union[str, datetime], cards: Optional[Iterable[str]] = None) -> pd.Series:
+        """
+        Метод возвращает остатки карт на момент времени: остаток после последнего движения не позже moment.
+
+        :param moment: Момент времени (строка, datetime или Timestamp)
+        :param cards: Номера карт, None - все карты журнала
+        :return balances: Ряд остатков, индекс - номера карт
+        """
+
+        moment_value = pd.Timestamp(moment).to_datetime64().astype("datetime64[ns]")
+        cards = self.cards if cards is None else list(cards)
+        balances = []
+        for card in cards:
+            dates, card_balances = self._get_card_lookup(card)
+            position = int(np.searchsorted(dates, moment_value, side="right")) - 1
+            balances.append(card_balances[position] if position >= 0 else self._opening_balances.get(card, 0.0))
+        return pd.Series(balances, index=pd.Index(cards, name="card"), dtype=float)
+
+    def daily_balances(
+        self, start: Union[str, datetime, None] = None, stop: Union[str, datetime, None] = None
+    ) -> pd.DataFrame:
+        """
+        Метод возвращает остатки карт на конец каждого дня.
+
+        :param start: Первый день, None - день первого движения
+        :param stop: Последний день, None - день последнего движения
+        :return daily_df: Дата фрейм остатков: индекс - непрерывный ряд дней, колонки - номера карт
+        """
+
+        if self._entries.empty and (start is None or stop is None):
+            return pd.DataFrame(columns=self.cards, index=pd.DatetimeIndex([]), dtype=float)
+
+        days = self._entries["date"].dt.normalize()
+        first_day = pd.Timestamp(start).normalize() if start is not None else days.iloc[0]
+        last_day = pd.Timestamp(stop).normalize() if stop is not None else days.iloc[-1]
+        full_index = pd.date_range(first_day, last_day, freq="D")
+
+        closing = self._entries.assign(day=days).groupby(["day", "card"])["balance"].last().unstack("card")
+        opening = pd.Series(self._opening_balances, dtype=float).reindex(self.cards).fillna(0.0)
+
+        # Остаток дня без движений - остаток предыдущего дня (в том числе дней до начала ряда),
+        # до первого движения карты - входящий остаток
+        daily_df = (
+            closing.reindex(columns=self.cards)
+            .reindex(closing.index.union(full_index))
+            .ffill()
+            .reindex(full_index)
+            .fillna(opening)
+        )
+        daily_df.columns.name = None
+        return daily_df
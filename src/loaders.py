@@ -0,0 +1,182 @@
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from src.parsers import FORMAT_EXTENSIONS, read_operations_file
+
+logger = logging.getLogger("loaders")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "loaders.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Колонка с меткой файла выписки, из которого получена операция
+SOURCE_COLUMN = "Источник"
+
+# Служебная колонка номера повтора операции внутри файла выписки
+OCCURRENCE_COLUMN = "_occurrence"
+
+# Расширения файлов выписок в папке: все форматы реестра parsers.PARSERS
+STATEMENT_EXTENSIONS = tuple(FORMAT_EXTENSIONS)
+
+
+def is_statements_source(path: str) -> bool:
+    """
+    Функция проверяет, задает ли путь набор файлов выписок (папку или шаблон glob), а не один файл.
+
+    :param path: Путь к файлу, папке или шаблон glob
+    :return: True для папки или шаблона
+    """
+
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def get_source_name(path: str) -> str:
+    """
+    Функция возвращает метку источника по пути к файлу выписки - имя файла без расширения.
+
+    :param path: Путь к файлу выписки
+    :return: Метка источника
+    """
+
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def get_statement_paths(path: str) -> list[str]:
+    """
+    Функция для получения отсортированного списка файлов выписок.
+
+    :param path: Путь к папке с выписками, шаблон glob или путь к одному файлу
+    :return: Список путей к файлам выписок
+    """
+
+    if os.path.isdir(path):
+        paths = [
+            os.path.join(path, file_name)
+            for file_name in os.listdir(path)
+            if file_name.endswith(STATEMENT_EXTENSIONS) and not file_name.startswith("~$")
+        ]
+    elif glob.has_magic(path):
+        paths = glob.glob(path)
+    else:
+        paths = [path]
+
+    return sorted(paths)
+
+
+def get_statements_state(path: str) -> tuple[tuple[str, float], ...]:
+    """
+    Функция возвращает состояние выписок: абсолютные пути и время изменения существующих файлов.
+    Состояние меняется при изменении, добавлении и удалении выписки, в том числе файла с более старым временем.
+
+    :param path: Путь к папке с выписками, шаблон glob или путь к одному файлу
+    :return: Кортеж пар (путь, время изменения), упорядоченный по пути
+    """
+
+    return tuple(
+        (os.path.abspath(statement_path), os.path.getmtime(statement_path))
+        for statement_path in get_statement_paths(path)
+        if os.path.exists(statement_path)
+    )
+
+
+def read_statement(path: str) -> pd.DataFrame:
+    """
+    Функция читает один файл выписки (формат определяется parsers.detect_format)
+    и добавляет колонку с меткой источника.
+
+    :param path: Путь к файлу выписки
+    :return: Дата фрейм операций из файла
+    """
+
+    statement_df = read_operations_file(path)
+    statement_df[SOURCE_COLUMN] = get_source_name(path)
+    return statement_df
+
+
+def get_transactions_df_from_sources(
+    path: str,
+    sources: Optional[list[str]] = None,
+    max_workers: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Функция для получения объединенного дата фрейма операций из набора файлов выписок.
+    Файлы читаются параллельно в пуле процессов, операции объединяются, дубликаты
+    (одинаковые операции из пересекающихся выгрузок) удаляются, данные сортируются по дате операции
+    от новых к старым, как в выгрузке банка.
+    Дубликаты определяются по всем колонкам операции, одинаковые операции внутри одного файла сохраняются
+    (их повторы в других файлах удаляются попарно). Поэтому файлы читаются полностью,
+    а до колонок columns результат сокращается после удаления дубликатов.
+
+    :param path: Путь к папке с выписками, шаблон glob или путь к одному файлу
+    :param sources: Список меток источников (имена файлов без расширения), None - все источники
+    :param max_workers: Количество процессов, None - по количеству ядер
+    :param columns: Колонки результата (кроме метки источника), None - все колонки
+    :return transactions_df: Дата фрейм операций с колонкой "Источник"
+    """
+
+    logger.info(f"Вызов функции {get_transactions_df_from_sources.__name__}")
+
+    paths = get_statement_paths(path)
+    if sources is not None:
+        paths = [statement_path for statement_path in paths if get_source_name(statement_path) in sources]
+
+    if len(paths) == 0:
+        logger.warning(f"Файлы выписок по пути {path} отсутствуют")
+        return pd.DataFrame()
+
+    if len(paths) == 1 or max_workers == 1:
+        statements = [read_statement(statement_path) for statement_path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            statements = list(executor.map(read_statement, paths))
+
+    # Номер повтора операции внутри файла: одинаковые операции одной выписки (например, две одинаковые
+    # покупки в одну секунду) - разные операции, дубликатами считаются только повторы из разных файлов
+    for statement in statements:
+        operation_columns = [column for column in statement.columns if column != SOURCE_COLUMN]
+        statement[OCCURRENCE_COLUMN] = statement.groupby(operation_columns, dropna=False, observed=True).cumcount()
+
+    # Пустые колонки (например, категория в выписке OFX) не участвуют в выборе типа колонки результата
+    all_columns = list(dict.fromkeys(column for statement in statements for column in statement.columns))
+    transactions_df = pd.concat(
+        [statement.dropna(axis=1, how="all") for statement in statements], ignore_index=True
+    ).reindex(columns=all_columns)
+
+    # Удаляем повторы операций из разных файлов по всем колонкам операции и номеру повтора в файле
+    operation_columns = [column for column in transactions_df.columns if column != SOURCE_COLUMN]
+    transactions_df = transactions_df.drop_duplicates(subset=operation_columns, keep="first")
+    transactions_df = transactions_df.drop(columns=OCCURRENCE_COLUMN)
+
+    operation_dates = pd.to_datetime(transactions_df["Дата операции"], dayfirst=True).reset_index(drop=True)
+    order = operation_dates.sort_values(ascending=False, kind="stable").index
+    transactions_df = transactions_df.iloc[order].reset_index(drop=True)
+    if columns is not None:
+        kept = set(columns) | {SOURCE_COLUMN}
+        transactions_df = transactions_df[[column for column in transactions_df.columns if column in kept]]
+
+    logger.info(f"Функция возвращает {len(transactions_df)} операций из {len(paths)} файлов")
+    return transactions_df
+
+
+def filter_by_source(transactions: pd.DataFrame, sources: Optional[list[str]]) -> pd.DataFrame:
+    """
+    Функция фильтрует дата фрейм операций по меткам источников.
+
+    :param transactions: Дата фрейм операций с колонкой "Источник"
+    :param sources: Список меток источников, None - без фильтрации
+    :return: Дата фрейм операций выбранных источников
+    """
+
+    if sources is None or SOURCE_COLUMN not in transactions.columns:
+        return transactions
+
+    return transactions[transactions[SOURCE_COLUMN].isin(sources)]
@@ -1,13 +1,29 @@
-import datetime
-import os
 import re
+from concurrent.futures import Future
 
-from src.reports import spending_by_weekday
-from src.services import get_transactions_to_persons, investment_bank
-from src.utils import get_transactions_df, get_transactions_list
+import pandas as pd
+
+from src.export import export_transactions, get_available_export_formats
+from src.reports import SPENDING_BY_WEEKDAY_COLUMNS, run_report
+from src.services import INVESTMENT_BANK_COLUMNS, get_transactions_to_persons, investment_bank
+from src.utils import get_operations_path, get_transactions_df
 from src.views import get_main_page_request
 
 
+def print_report_result(report_future: Future) -> None:
+    """
+    Функция выводит результат отчета, сформированного в фоне, или ошибку его формирования.
+
+    :param report_future: Future отчета из run_report
+    """
+
+    error = report_future.exception()
+    if error is not None:
+        print(f"Ошибка формирования отчета: {error}")
+    else:
+        print(report_future.result())
+
+
 def main() -> None:
     """
     Функция main для получения результатов всех реализованных в проекте функциональностей.:
@@ -18,6 +34,7 @@ def main() -> None:
         2.  Сервис "Поиск переводов физическим лицам"
         3. Сервис "Инвесткопилка"
         4. Отчет "Траты по дням недели"
+        5. Выгрузка операций и отчетов по месяцам
 
             1. Страница «Главная»
 
@@ -44,11 +61,16 @@ def main() -> None:
             - Принимает дату сортировки
             - Проверка правильности формата даты
             - Принимает дата фрейм транзакций
-            - Вызов функции spending_by_weekday
+            - Запуск отчета spending_by_weekday в фоне, результат записывается в файл в папке reports/
+
+            5. Выгрузка операций и отчетов по месяцам
+
+            - Принимает формат файлов
+            - Вызов функции export_transactions, файлы записываются в папку exports/
 
     """
 
-    path_to_operations_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "operations.xlsx")
+    path_to_operations_file = get_operations_path()
 
     while True:
         print(
@@ -58,6 +80,7 @@ def main() -> None:
         2.  Сервис "Поиск переводов физическим лицам"
         3. Сервис "Инвесткопилка"
         4. Отчет "Траты по дням недели"
+        5. Выгрузка операций и отчетов по месяцам
         """
         )
         user_func = input("Введите номер функции:")
@@ -105,17 +128,16 @@ def main() -> None:
                 match = re.search(pattern, date)
                 if match:
 
-                    transactions_list = get_transactions_list(path_to_file=path_to_operations_file)
-                    # Преобразовываем список словарей в ожидаемый формат
-                    transactions_list = [
+                    transactions_df = get_transactions_df(
+                        path_to_file=path_to_operations_file, columns=INVESTMENT_BANK_COLUMNS
+                    )
+                    # Даты разобраны при загрузке, преобразовываем в ожидаемый формат векторно
+                    transactions_list = pd.DataFrame(
                         {
-                            "Дата операции": datetime.datetime.strptime(
-                                x["Дата операции"], "%d.%m.%Y %H:%M:%S"
-                            ).strftime("%Y-%m-%d"),
-                            "Сумма операции": x["Сумма операции"],
+                            "Дата операции": transactions_df["Дата операции"].dt.strftime("%Y-%m-%d"),
+                            "Сумма операции": transactions_df["Сумма операции"],
                         }
-                        for x in transactions_list
-                    ]
+                    ).to_dict("records")
 
                     print(
                         """
@@ -146,9 +168,33 @@ def main() -> None:
                 match = re.search(pattern, date)
                 if match:
 
-                    transactions_df = get_transactions_df(path_to_file=path_to_operations_file)
+                    transactions_df = get_transactions_df(
+                        path_to_file=path_to_operations_file, columns=SPENDING_BY_WEEKDAY_COLUMNS
+                    )
+
+                    # Отчет формируется в фоне, результат выводится и записывается в файл по готовности
+                    print("Отчет формируется...")
+                    report_future = run_report("spending_by_weekday", transactions_df, date)
+                    report_future.add_done_callback(print_report_result)
+                    break
+                else:
+                    print("Неверный формат")
 
-                    print(spending_by_weekday(transactions_df, date))
+        elif user_func == "5":
+            # parquet предлагается, только если установлен pyarrow или fastparquet
+            export_formats = get_available_export_formats()
+            while True:
+                print(
+                    f"""
+            Выгрузка операций и отчетов по месяцам
+            ВВедите формат файлов: {" или ".join(export_formats)}
+                """
+                )
+                file_format = input(">>>")
+                if file_format in export_formats:
+
+                    transactions_df = get_transactions_df(path_to_file=path_to_operations_file)
+                    print(export_transactions(transactions_df, file_format))
                     break
                 else:
                     print("Неверный формат")
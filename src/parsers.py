@@ -0,0 +1,366 @@
+import csv
+import html
+import logging
+import os
+import re
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.fx import BASE_CURRENCY
+from src.schema import OPERATION_DATE_FORMAT, OPERATIONS_SCHEMA, SchemaError, get_read_dtypes
+
+logger = logging.getLogger("parsers")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "parsers.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Функция чтения файла выписки: (путь, колонки или None) -> дата фрейм в колонках схемы выгрузки
+StatementParser = Callable[[str, Optional[Sequence[str]]], pd.DataFrame]
+
+# Реестр форматов выписок: формат -> функция чтения, расширение файла -> формат
+PARSERS: dict[str, StatementParser] = {}
+FORMAT_EXTENSIONS: dict[str, str] = {}
+
+# Сколько байт начала файла читается для определения формата и кодировки
+SNIFF_SIZE = 64 * 1024
+
+# Размер блока потокового чтения OFX
+OFX_CHUNK_SIZE = 1024 * 1024
+
+OFX_TAG_PATTERN = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def statement_parser(file_format: str, *extensions: str) -> Callable[[StatementParser], StatementParser]:
+    """
+    Декоратор регистрирует функцию чтения выписок формата file_format для файлов с расширениями extensions.
+
+    :param file_format: Имя формата, например "csv"
+    :param extensions: Расширения файлов формата с точкой, например ".csv"
+    """
+
+    def decorator(func: StatementParser) -> StatementParser:
+        PARSERS[file_format] = func
+        for extension in extensions:
+            FORMAT_EXTENSIONS[extension] = file_format
+        return func
+
+    return decorator
+
+
+def detect_format(path: str) -> str:
+    """
+    Функция определяет формат файла выписки по содержимому начала файла,
+    если по содержимому формат не определен (или файл не читается) - по расширению.
+
+    :param path: Путь к файлу выписки
+    :return: Формат из реестра PARSERS
+    :raises SchemaError: Если формат не поддерживается
+    """
+
+    try:
+        with open(path, "rb") as statement_file:
+            head = statement_file.read(SNIFF_SIZE)
+    except OSError:
+        # Ошибку чтения файла сообщит функция чтения формата
+        head = b""
+
+    text_head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"PK\x03\x04"):
+        file_format = "xlsx"
+    elif b"OFXHEADER" in text_head[:1024] or b"<OFX>" in text_head.upper():
+        file_format = "ofx"
+    elif text_head.startswith((b"!Type:", b"!Account", b"!Option")):
+        file_format = "qif"
+    else:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in FORMAT_EXTENSIONS:
+            raise SchemaError(f"Неизвестный формат файла выписки {path}")
+        file_format = FORMAT_EXTENSIONS[extension]
+    return file_format
+
+
+def read_operations_file(
+    path: str, columns: Optional[Sequence[str]] = None, file_format: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Функция читает файл выписки любого зарегистрированного формата в колонки схемы выгрузки банка.
+
+    :param path: Путь к файлу выписки
+    :param columns: Читаемые колонки, None - все колонки
+    :param file_format: Формат файла, None - определяется функцией detect_format
+    :return: Дата фрейм операций (ненормализованный)
+    """
+
+    file_format = file_format or detect_format(path)
+    logger.info(f"Чтение файла {path} в формате {file_format}")
+    return PARSERS[file_format](path, columns)
+
+
+def _get_encoding(head: bytes) -> str:
+    """Кодировка текстовой выписки: UTF-8, а если начало файла не декодируется - cp1251"""
+
+    if head.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        # Полный блок мог оборваться посреди многобайтового символа
+        (head if len(head) < SNIFF_SIZE else head[: SNIFF_SIZE - 4]).decode("utf-8")
+    except UnicodeDecodeError:
+        return "cp1251"
+    return "utf-8"
+
+
+def _to_operations_frame(data: dict[str, Any], rows: int, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """
+    Дата фрейм в колонках схемы и с типами чтения EXCEL - файла: колонки, которых нет в data,
+    заполняются пропусками, даты - строками в формате выгрузки банка.
+    """
+
+    selected = [column for column in OPERATIONS_SCHEMA if columns is None or column in columns]
+    operations = pd.DataFrame(
+        {
+            column: data.get(column, np.full(rows, np.nan, dtype=float if kind == "float" else object))
+            for column, kind in OPERATIONS_SCHEMA.items()
+            if column in selected
+        }
+    )
+    return operations.astype(get_read_dtypes(selected))
+
+
+@statement_parser("xlsx", ".xlsx", ".xlsm")
+def read_xlsx(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Функция читает EXCEL - файл выписки: только колонки columns (колонки, которых нет в файле, пропускаются),
+    колонки-категории схемы - сразу с типом category.
+
+    :param path: Путь к файлу выписки
+    :param columns: Читаемые колонки, None - все колонки
+    :return: Дата фрейм операций из файла
+    """
+
+    wanted = None if columns is None else set(columns)
+    return pd.read_excel(
+        path,
+        usecols=None if wanted is None else lambda column: column in wanted,
+        dtype=get_read_dtypes(columns),
+    )
+
+
+@statement_parser("csv", ".csv")
+def read_csv(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Функция читает CSV - выгрузку банка с колонками схемы (как в EXCEL - файле) C - парсером pandas.
+    Кодировка (UTF-8 или cp1251) и разделитель (";", "," или табуляция) определяются по началу файла,
+    при разделителе, отличном от ",", десятичный разделитель - ",".
+
+    :param path: Путь к файлу выписки
+    :param columns: Читаемые колонки, None - все колонки
+    :return: Дата фрейм операций из файла
+    """
+
+    with open(path, "rb") as statement_file:
+        head = statement_file.read(SNIFF_SIZE)
+    encoding = _get_encoding(head)
+    first_line = head.decode(encoding, errors="replace").splitlines()[0] if head else ""
+    try:
+        delimiter = csv.Sniffer().sniff(first_line, delimiters=";,\t").delimiter
+    except csv.Error:
+        delimiter = ","
+
+    wanted = None if columns is None else set(columns)
+    return pd.read_csv(
+        path,
+        sep=delimiter,
+        decimal="," if delimiter != "," else ".",
+        encoding=encoding,
+        usecols=None if wanted is None else lambda column: column in wanted,
+        dtype=get_read_dtypes(columns),
+        engine="c",
+    )
+
+
+def _iter_ofx_tags(path: str, encoding: str) -> Iterator[tuple[bool, str, str]]:
+    """Потоковое чтение тегов OFX (SGML 1.x и XML 2.x) блоками: (закрывающий, тег, значение)"""
+
+    with open(path, "r", encoding=encoding, errors="replace") as statement_file:
+        tail = ""
+        while True:
+            chunk = statement_file.read(OFX_CHUNK_SIZE)
+            text = tail + chunk
+            # Последний тег блока может быть неполным, он разбирается вместе со следующим блоком
+            end = len(text) if not chunk else text.rfind("<")
+            for match in OFX_TAG_PATTERN.finditer(text, 0, max(end, 0)):
+                yield match.group(1) == "/", match.group(2).upper(), match.group(3)
+            if not chunk:
+                return
+            tail = text[max(end, 0):]
+
+
+@statement_parser("ofx", ".ofx", ".qfx")
+def read_ofx(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Функция потоково читает выписку OFX: операции STMTTRN переводятся в колонки схемы выгрузки.
+    "Дата операции" - DTUSER (если нет - DTPOSTED), "Дата платежа" - DTPOSTED, сумма - TRNAMT в валюте счета
+    (CURDEF), описание - NAME (если нет - MEMO), MCC - SIC, номер карты - "*" и 4 последние цифры ACCTID.
+    Статус всех операций "OK", категории в OFX нет.
+
+    :param path: Путь к файлу выписки
+    :param columns: Читаемые колонки, None - все колонки
+    :return: Дата фрейм операций из файла
+    """
+
+    with open(path, "rb") as statement_file:
+        head = statement_file.read(SNIFF_SIZE)
+    encoding = "cp1251" if re.search(rb"CHARSET:\s*1251|encoding=\"windows-1251\"", head, re.I) else "utf-8"
+
+    fields = ("DTPOSTED", "DTUSER", "TRNAMT", "NAME", "MEMO", "SIC")
+    values: dict[str, list[Optional[str]]] = {field: [] for field in fields + ("CURDEF", "ACCTID")}
+    currency: Optional[str] = None
+    account: Optional[str] = None
+    transaction: Optional[dict[str, str]] = None
+
+    for closing, tag, value in _iter_ofx_tags(path, encoding):
+        if tag == "STMTTRN":
+            if not closing:
+                transaction = {}
+            elif transaction is not None:
+                for field in fields:
+                    values[field].append(transaction.get(field))
+                values["CURDEF"].append(currency)
+                values["ACCTID"].append(account)
+                transaction = None
+        elif not closing:
+            value = value.strip()
+            if transaction is not None and tag in fields:
+                transaction[tag] = html.unescape(value)
+            elif tag == "CURDEF":
+                currency = value
+            elif tag == "ACCTID":
+                account = value
+
+    rows = len(values["TRNAMT"])
+    posted = pd.Series(values["DTPOSTED"], dtype=object)
+    user_dates = pd.Series(values["DTUSER"], dtype=object).fillna(posted)
+    posted_dates = _parse_ofx_dates(posted)
+    amounts = pd.to_numeric(pd.Series(values["TRNAMT"], dtype=object).str.replace(",", "."), errors="coerce")
+    descriptions = pd.Series(values["NAME"], dtype=object).fillna(pd.Series(values["MEMO"], dtype=object))
+    accounts = pd.Series(values["ACCTID"], dtype=object)
+    currencies = pd.Series(values["CURDEF"], dtype=object).fillna(BASE_CURRENCY)
+
+    logger.info(f"Прочитано {rows} операций OFX")
+    return _to_operations_frame(
+        {
+            "Дата операции": _parse_ofx_dates(user_dates).dt.strftime(OPERATION_DATE_FORMAT),
+            "Дата платежа": posted_dates.dt.strftime("%d.%m.%Y"),
+            "Номер карты": ("*" + accounts.str[-4:]).where(accounts.notna()),
+            "Статус": np.full(rows, "OK", dtype=object),
+            "Сумма операции": amounts,
+            "Валюта операции": currencies,
+            "Сумма платежа": amounts,
+            "Валюта платежа": currencies,
+            "MCC": pd.to_numeric(pd.Series(values["SIC"], dtype=object), errors="coerce"),
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": np.zeros(rows, dtype=int),
+            "Округление на инвесткопилку": np.zeros(rows, dtype=int),
+            "Сумма операции с округлением": amounts.abs(),
+        },
+        rows,
+        columns,
+    )
+
+
+def _parse_ofx_dates(dates: pd.Series) -> pd.Series:
+    """Даты OFX "YYYYMMDD[HHMMSS[.XXX]][[-5:EST]]" без часового пояса, как время выписки банка"""
+
+    digits = dates.astype(object).where(dates.notna(), "").astype(str).str.slice(0, 14)
+    return pd.to_datetime(digits.str.pad(14, side="right", fillchar="0"), format="%Y%m%d%H%M%S", errors="coerce")
+
+
+def _parse_qif_amount(value: str) -> str:
+    """Сумма QIF: "1,234.56" - запятая разделяет тысячи, "1234,56" - запятая десятичная"""
+
+    value = value.replace(" ", "")
+    return value.replace(",", "") if "." in value else value.replace(",", ".")
+
+
+@statement_parser("qif", ".qif")
+def read_qif(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Функция читает выписку QIF (записи до "^"): D - дата операции, T (или U) - сумма, P - описание
+    (если нет - M), L - категория. Валюта и номер карты в QIF не указываются: валюта - рубль, карта - пропуск.
+    Даты с точками ("31.12.2021") читаются как день.месяц.год, с "/" ("12/31'21") - как месяц/день/год.
+
+    :param path: Путь к файлу выписки
+    :param columns: Читаемые колонки, None - все колонки
+    :return: Дата фрейм операций из файла
+    """
+
+    with open(path, "rb") as statement_file:
+        encoding = _get_encoding(statement_file.read(SNIFF_SIZE))
+
+    values: dict[str, list[Optional[str]]] = {field: [] for field in "DTPML"}
+    record: dict[str, str] = {}
+    with open(path, "r", encoding=encoding, errors="replace") as statement_file:
+        for line in statement_file:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+            code, value = line[0], line[1:].strip()
+            if code == "^":
+                if record:
+                    for field in values:
+                        values[field].append(record.get(field))
+                record = {}
+            elif code in "DTPML":
+                record[code] = _parse_qif_amount(value) if code == "T" else value
+            elif code == "U" and "T" not in record:
+                record["T"] = _parse_qif_amount(value)
+
+    rows = len(values["D"])
+    raw_dates = pd.Series(values["D"], dtype=object).str.replace("'", "/", regex=False).str.replace(" ", "")
+    day_first = raw_dates.str.contains(".", regex=False).fillna(False).to_numpy(dtype=bool)
+    dates = pd.Series(pd.NaT, index=raw_dates.index, dtype="datetime64[ns]")
+    if day_first.any():
+        dates[day_first] = pd.to_datetime(raw_dates[day_first], dayfirst=True, format="mixed", errors="coerce")
+    if (~day_first).any():
+        dates[~day_first] = pd.to_datetime(raw_dates[~day_first], dayfirst=False, format="mixed", errors="coerce")
+
+    amounts = pd.to_numeric(pd.Series(values["T"], dtype=object), errors="coerce")
+    descriptions = pd.Series(values["P"], dtype=object).fillna(pd.Series(values["M"], dtype=object))
+
+    logger.info(f"Прочитано {rows} операций QIF")
+    return _to_operations_frame(
+        {
+            "Дата операции": dates.dt.strftime(OPERATION_DATE_FORMAT),
+            "Дата платежа": dates.dt.strftime("%d.%m.%Y"),
+            "Статус": np.full(rows, "OK", dtype=object),
+            "Сумма операции": amounts,
+            "Валюта операции": np.full(rows, BASE_CURRENCY, dtype=object),
+            "Сумма платежа": amounts,
+            "Валюта платежа": np.full(rows, BASE_CURRENCY, dtype=object),
+            "Категория": pd.Series(values["L"], dtype=object),
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": np.zeros(rows, dtype=int),
+            "Округление на инвесткопилку": np.zeros(rows, dtype=int),
+            "Сумма операции с округлением": amounts.abs(),
+        },
+        rows,
+        columns,
+    )
+
+
+def write_csv(transactions: pd.DataFrame, path: str) -> None:
+    """
+    Функция сохраняет операции в CSV - файл (UTF-8, разделитель ";", десятичный разделитель ","),
+    который читается read_csv без разбора EXCEL.
+
+    :param transactions: Дата фрейм операций
+    :param path: Путь к CSV - файлу
+    """
+
+    transactions.to_csv(path, sep=";", decimal=",", index=False, encoding="utf-8", date_format=OPERATION_DATE_FORMAT)
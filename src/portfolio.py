@@ -0,0 +1,304 @@
+import logging
+import os
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.fx import FxRateStore, get_fx_rate_store
+from src.quotes import ALPHA_VANTAGE_THROTTLE_KEYS, ALPHA_VANTAGE_TIMEOUT, get_alpha_vantage_base_url
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("portfolio")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "portfolio.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Локальный кэш месячных цен закрытия акций
+path_to_price_history = os.path.abspath(
+    os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "stock_history.csv")
+)
+
+# Валюта цен Alpha Vantage
+PRICE_CURRENCY = "USD"
+
+
+class MarketDataError(ValueError):
+    """Ошибка: в кэше нет цен акций или курсов валют, нужных для моделирования портфеля"""
+
+
+class PriceHistoryStore:
+    """
+    Таблица исторических цен закрытия акций: колонки "date", "symbol", "close".
+    Цены загружаются из CSV - файла, при необходимости догружаются месячными рядами Alpha Vantage
+    (TIME_SERIES_MONTHLY) и сохраняются обратно. Цена на дату - последняя известная цена закрытия (as-of).
+    """
+
+    def __init__(self, prices: Optional[pd.DataFrame] = None) -> None:
+        self.prices = pd.DataFrame(
+            {
+                "date": pd.Series(dtype="datetime64[ns]"),
+                "symbol": pd.Series(dtype=object),
+                "close": pd.Series(dtype=float),
+            }
+        )
+        if prices is not None:
+            self.add_prices(prices)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "PriceHistoryStore":
+        """Метод загружает цены из CSV - файла, при отсутствии файла возвращает пустую таблицу"""
+
+        try:
+            return cls(pd.read_csv(path, parse_dates=["date"]))
+        except FileNotFoundError:
+            logger.warning(f"Файл цен {path} отсутствует")
+            return cls()
+
+    def to_csv(self, path: str) -> None:
+        """Метод сохраняет цены в CSV - файл"""
+        self.prices.to_csv(path, index=False, date_format="%Y-%m-%d")
+
+    def add_prices(self, prices: pd.DataFrame) -> None:
+        """
+        Метод добавляет цены в таблицу, при совпадении даты и тикера сохраняется новая цена.
+
+        :param prices: Дата фрейм с колонками "date", "symbol", "close"
+        """
+
+        new_prices = prices[["date", "symbol", "close"]].astype({"symbol": str, "close": float})
+        new_prices["date"] = pd.to_datetime(new_prices["date"]).astype("datetime64[ns]")
+        self.prices = (
+            pd.concat([self.prices, new_prices], ignore_index=True)
+            .drop_duplicates(["date", "symbol"], keep="last")
+            .sort_values(["symbol", "date"], ignore_index=True)
+        )
+
+    def fetch(self, symbols: Iterable[str], stale_before: Optional[date] = None) -> None:
+        """
+        Метод догружает месячные ряды цен тикеров, последняя цена которых в таблице раньше stale_before.
+
+        :param symbols: Тикеры
+        :param stale_before: Дата, с которой цены считаются актуальными, по умолчанию - начало текущего месяца
+        """
+
+        logger.info(f"Вызов метода {self.fetch.__name__}")
+
+        stale_before = stale_before or date.today().replace(day=1)
+        last_dates = self.prices.groupby("symbol")["date"].max()
+        fetched: list[dict] = []
+
+        for symbol in symbols:
+            if symbol in last_dates.index and last_dates[symbol].date() >= stale_before:
+                continue
+            url = (
+                f"{get_alpha_vantage_base_url()}/query?function=TIME_SERIES_MONTHLY&symbol={symbol}"
+                f"&apikey={os.getenv('API-key')}"
+            )
+            try:
+                response = requests.get(url, timeout=ALPHA_VANTAGE_TIMEOUT)
+                data = response.json()
+            except (requests.RequestException, ValueError) as ex:
+                logger.error(f"Ошибка запроса цен {symbol}: {ex}")
+                continue
+
+            series = data.get("Monthly Time Series") if isinstance(data, dict) else None
+            if response.status_code != 200 or not series:
+                throttled = isinstance(data, dict) and any(key in data for key in ALPHA_VANTAGE_THROTTLE_KEYS)
+                logger.warning(f"{'Превышен лимит API' if throttled else 'Нет цен'} по запросу компании {symbol}")
+                continue
+
+            fetched.extend(
+                {"date": price_date, "symbol": symbol, "close": float(values["4. close"])}
+                for price_date, values in series.items()
+            )
+
+        if fetched:
+            self.add_prices(pd.DataFrame(fetched))
+        logger.info(f"Загружено {len(fetched)} цен")
+
+    def get_prices(self, symbols: list[str], dates: np.ndarray) -> np.ndarray:
+        """
+        Метод возвращает цены тикеров на даты: последняя известная цена закрытия на дату.
+
+        :param symbols: Тикеры
+        :param dates: Упорядоченный по возрастанию массив дат datetime64
+        :return: Матрица цен даты x тикеры, NaN - цены на дату еще нет
+        """
+
+        prices = np.full((len(dates), len(symbols)), np.nan)
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        prices_by_symbol = dict(tuple(self.prices.groupby("symbol")))
+        for column, symbol in enumerate(symbols):
+            symbol_prices = prices_by_symbol.get(symbol)
+            if symbol_prices is None:
+                continue
+            positions = np.searchsorted(symbol_prices["date"].to_numpy(), dates, side="right") - 1
+            known = positions >= 0
+            prices[known, column] = symbol_prices["close"].to_numpy()[positions[known]]
+        return prices
+
+
+def get_price_history_store(path: Optional[str] = None) -> PriceHistoryStore:
+    """
+    Функция возвращает таблицу цен из файла "/data/stock_history.csv".
+
+    :param path: Путь к CSV - файлу цен
+    :return: Таблица цен
+    """
+
+    return PriceHistoryStore.from_csv(path or path_to_price_history)
+
+
+def update_price_history(symbols: list[str], path: Optional[str] = None) -> PriceHistoryStore:
+    """
+    Функция догружает устаревшие ряды цен тикеров и сохраняет обновленную таблицу в файл.
+
+    :param symbols: Тикеры
+    :param path: Путь к CSV - файлу цен
+    :return price_history: Обновленная таблица цен
+    """
+
+    logger.info(f"Вызов функции {update_price_history.__name__}")
+
+    price_history = get_price_history_store(path)
+    price_history.fetch(symbols)
+    price_history.to_csv(path or path_to_price_history)
+    return price_history
+
+
+def get_monthly_savings(transactions: pd.DataFrame, limits: Iterable[int]) -> pd.DataFrame:
+    """
+    Функция считает суммы «Инвесткопилки» по месяцам для нескольких порогов округления сразу,
+    как сервис investment_bank: каждая операция месяца округляется вверх до порога по модулю суммы.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param limits: Пороги округления
+    :return: Дата фрейм сумм: индекс - месяцы (непрерывный ряд, datetime64 первого дня месяца),
+        колонки - пороги
+    """
+
+    limits_array = np.array(list(limits), dtype=float)
+    dates = get_operation_dates(transactions)
+    has_date = dates.notna().to_numpy()
+    if not has_date.any():
+        return pd.DataFrame(columns=list(limits_array.astype(int)), index=pd.DatetimeIndex([]), dtype=float)
+
+    operation_months = dates[has_date].to_numpy(dtype="datetime64[M]")
+    months = np.arange(operation_months.min(), operation_months.max() + 1)
+    month_codes = (operation_months - months[0]).astype(int)
+
+    amounts = transactions.loc[has_date, "Сумма операции"].abs().to_numpy(dtype=float)
+    remainders = amounts[:, np.newaxis] % limits_array
+    # Операции без суммы (NaN) не округляются
+    savings = np.nan_to_num(np.where(remainders != 0, limits_array - remainders, 0.0))
+    totals = np.stack(
+        [np.bincount(month_codes, weights=column, minlength=len(months)) for column in savings.T], axis=1
+    )
+    return pd.DataFrame(totals, index=pd.DatetimeIndex(months), columns=list(limits_array.astype(int)))
+
+
+def get_month_ends(savings: pd.DataFrame) -> np.ndarray:
+    """
+    Функция возвращает последние дни месяцев сумм «Инвесткопилки» - даты покупки акций.
+
+    :param savings: Суммы по месяцам и порогам (результат get_monthly_savings)
+    :return: Массив дат datetime64[D]
+    """
+
+    return (savings.index.to_numpy(dtype="datetime64[M]") + 1).astype("datetime64[D]") - 1
+
+
+def check_market_data(
+    symbols: list[str], month_ends: np.ndarray, price_history: PriceHistoryStore, fx_rates: FxRateStore
+) -> None:
+    """
+    Функция проверяет, что для моделирования портфеля есть цены каждого тикера
+    и курс USD на конец каждого месяца.
+
+    :param symbols: Тикеры
+    :param month_ends: Последние дни месяцев (результат get_month_ends)
+    :param price_history: Таблица цен
+    :param fx_rates: Таблица курсов
+    :raises MarketDataError: Если цен тикера нет ни на один месяц или нет курса USD на конец месяца
+    """
+
+    if not symbols or len(month_ends) == 0:
+        return
+
+    prices = price_history.get_prices(symbols, month_ends)
+    missing_symbols = [symbol for symbol, column in zip(symbols, prices.T) if np.isnan(column).all()]
+    if missing_symbols:
+        raise MarketDataError(f"Нет цен акций {', '.join(missing_symbols)} за период операций")
+
+    rates = fx_rates.get_rates(
+        pd.Series([PRICE_CURRENCY] * len(month_ends)), pd.Series(month_ends.astype("datetime64[ns]"))
+    )
+    missing_months = [str(month_end) for month_end, rate in zip(month_ends, rates) if np.isnan(rate)]
+    if missing_months:
+        raise MarketDataError(f"Нет курса {PRICE_CURRENCY} на даты {', '.join(missing_months)}")
+
+
+def simulate_portfolio(
+    savings: pd.DataFrame,
+    symbols: list[str],
+    price_history: PriceHistoryStore,
+    fx_rates: Optional[FxRateStore] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Функция моделирует вложение сумм «Инвесткопилки» в акции: сумма каждого месяца в последний день месяца
+    делится поровну между тикерами, для которых есть цена, и покупаются дробные акции по цене закрытия.
+    Цены в USD пересчитываются в рубли по курсу на последний день месяца: суммы «Инвесткопилки» в рублях.
+    Если цен нет ни по одному тикеру или нет курса USD на дату, сумма месяца остается на счете деньгами
+    (цены без пересчета не используются). Расчет для всех порогов, месяцев и тикеров выполняется векторно
+    массивами пороги x месяцы x тикеры.
+
+    :param savings: Суммы по месяцам и порогам (результат get_monthly_savings)
+    :param symbols: Тикеры
+    :param price_history: Таблица цен
+    :param fx_rates: Таблица курсов для пересчета цен из USD в рубли, None - курсы из файла "/data/fx_rates.csv"
+    :return: Словарь массивов: "month_ends" (M), "invested", "value" (пороги x M),
+        "shares" (пороги x тикеры), "prices" (M x тикеры), "cash" (пороги)
+    """
+
+    logger.info(f"Вызов функции {simulate_portfolio.__name__}")
+
+    month_ends = get_month_ends(savings)
+    prices = price_history.get_prices(symbols, month_ends)
+    if fx_rates is None:
+        fx_rates = get_fx_rate_store()
+    if len(month_ends):
+        rates = fx_rates.get_rates(
+            pd.Series([PRICE_CURRENCY] * len(month_ends)), pd.Series(month_ends.astype("datetime64[ns]"))
+        )
+        # Без курса цена в рублях неизвестна (NaN), сумма месяца остается деньгами
+        prices = prices * rates[:, np.newaxis]
+        missing_rates = int(np.isnan(rates).sum())
+        if missing_rates:
+            logger.warning(f"Нет курса {PRICE_CURRENCY} за {missing_rates} месяцев, суммы остаются деньгами")
+
+    amounts = savings.to_numpy(dtype=float).T
+    available = ~np.isnan(prices)
+    counts = available.sum(axis=1)
+    shares_of_amount = np.where(available, 1.0, 0.0) / np.maximum(counts, 1)[:, np.newaxis]
+    filled_prices = np.where(available, prices, 1.0)
+
+    bought = amounts[:, :, np.newaxis] * (shares_of_amount / filled_prices)[np.newaxis]
+    held = np.cumsum(bought, axis=1)
+    cash = np.cumsum(np.where(counts == 0, amounts, 0.0), axis=1)
+    value = np.einsum("lmt,mt->lm", held, np.where(available, prices, 0.0)) + cash
+
+    return {
+        "month_ends": month_ends,
+        "invested": np.cumsum(amounts, axis=1),
+        "value": value,
+        "shares": held[:, -1, :] if len(month_ends) else np.zeros((len(amounts), len(symbols))),
+        "prices": prices,
+        "cash": cash[:, -1] if len(month_ends) else np.zeros(len(amounts)),
+    }
@@ -0,0 +1,245 @@
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("query")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "query.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+
+def get_dates_order(dates: np.ndarray) -> int:
+    """
+    Функция определяет порядок массива дат за один проход.
+
+    :param dates: Массив дат операций datetime64[ns]
+    :return: 1 - по возрастанию, -1 - по убыванию, 0 - даты не упорядочены
+    """
+
+    if len(dates) < 2 or (dates[0] <= dates[-1] and np.all(dates[:-1] <= dates[1:])):
+        return 1
+    if np.all(dates[:-1] >= dates[1:]):
+        return -1
+    return 0
+
+
+def get_period_bounds(
+    dates: np.ndarray, start: Optional[datetime], stop: Optional[datetime], order: Optional[int] = None
+) -> Optional[tuple[int, int]]:
+    """
+    Функция находит бинарным поиском диапазон строк периода в упорядоченном по дате массиве
+    (по возрастанию или убыванию, как в выгрузке банка).
+
+    :param dates: Массив дат операций datetime64[ns]
+    :param start: Начало периода (включительно), None - без ограничения
+    :param stop: Конец периода (включительно), None - без ограничения
+    :param order: Порядок дат (результат get_dates_order), None - проверить по массиву
+    :return: Диапазон строк (начало, конец) или None, если даты не упорядочены
+    """
+
+    if len(dates) == 0:
+        return 0, 0
+
+    if order is None:
+        order = get_dates_order(dates)
+    lower = np.datetime64(start, "ns") if start is not None else dates.min()
+    upper = np.datetime64(stop, "ns") if stop is not None else dates.max()
+    if order == 1:
+        return int(np.searchsorted(dates, lower, side="left")), int(np.searchsorted(dates, upper, side="right"))
+    if order == -1:
+        reversed_dates = dates[::-1]
+        return (
+            len(dates) - int(np.searchsorted(reversed_dates, upper, side="right")),
+            len(dates) - int(np.searchsorted(reversed_dates, lower, side="left")),
+        )
+    return None
+
+
+class TransactionQuery:
+    """
+    Ленивый запрос к дата фрейму операций. Методы не выполняют фильтрацию, а возвращают новый запрос
+    с дополненным планом; данные вычисляются только в collect():
+
+        TransactionQuery(df).period(start, stop).status("OK").card("*7197").spends()
+            .group_by("Категория").agg(total_spent=("Сумма операции", "sum")).collect()
+
+    При выполнении период находится бинарным поиском по упорядоченным датам (DatetimeIndex или колонке
+    "Дата операции"), остальные условия вычисляются только для строк периода и объединяются в одну маску.
+    """
+
+    def __init__(self, transactions: pd.DataFrame) -> None:
+        self.transactions = transactions
+        self.start: Optional[datetime] = None
+        self.stop: Optional[datetime] = None
+        self.conditions: list[tuple[str, str, Any]] = []
+        self.group_columns: list[str] = []
+        self.aggregations: dict[str, tuple[str, str]] = {}
+        self.columns: Optional[list[str]] = None
+
+    def _copy(self) -> "TransactionQuery":
+        query = TransactionQuery(self.transactions)
+        query.start, query.stop = self.start, self.stop
+        query.conditions = list(self.conditions)
+        query.group_columns = list(self.group_columns)
+        query.aggregations = dict(self.aggregations)
+        query.columns = self.columns
+        return query
+
+    def _where(self, column: str, operator: str, value: Any) -> "TransactionQuery":
+        query = self._copy()
+        query.conditions.append((column, operator, value))
+        return query
+
+    def period(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> "TransactionQuery":
+        """Операции периода, границы включительно. Несколько вызовов дают пересечение периодов"""
+
+        query = self._copy()
+        if start is not None:
+            query.start = start if query.start is None else max(query.start, start)
+        if stop is not None:
+            query.stop = stop if query.stop is None else min(query.stop, stop)
+        return query
+
+    def filter(self, column: str, value: Any) -> "TransactionQuery":
+        """Операции, у которых значение колонки равно value, None - без условия"""
+        return self if value is None else self._where(column, "==", value)
+
+    def isin(self, column: str, values: list[Any]) -> "TransactionQuery":
+        """Операции, у которых значение колонки входит в список"""
+        return self._where(column, "in", list(values))
+
+    def matches(self, column: str, pattern: Union[str, re.Pattern]) -> "TransactionQuery":
+        """Операции, в значении колонки которых найдено регулярное выражение (как re.search)"""
+        return self._where(column, "matches", pattern)
+
+    def status(self, status: Optional[str]) -> "TransactionQuery":
+        """Операции со статусом, None - все статусы"""
+        return self.filter("Статус", status)
+
+    def card(self, card: Optional[str]) -> "TransactionQuery":
+        """Операции по номеру карты, None - все карты"""
+        return self.filter("Номер карты", card)
+
+    def category(self, category: Optional[str]) -> "TransactionQuery":
+        """Операции категории, None - все категории"""
+        return self.filter("Категория", category)
+
+    def spends(self) -> "TransactionQuery":
+        """Расходы - операции с отрицательной суммой"""
+        return self._where("Сумма операции", "<", 0)
+
+    def select(self, *columns: str) -> "TransactionQuery":
+        """Колонки результата"""
+
+        query = self._copy()
+        query.columns = list(columns)
+        return query
+
+    def group_by(self, *columns: str) -> "TransactionQuery":
+        """Колонки группировки для agg"""
+
+        query = self._copy()
+        query.group_columns = list(columns)
+        return query
+
+    def agg(self, **aggregations: tuple[str, str]) -> "TransactionQuery":
+        """Именованные агрегации в формате pandas: total_spent=("Сумма операции", "sum")"""
+
+        query = self._copy()
+        query.aggregations.update(aggregations)
+        return query
+
+    def explain(self) -> str:
+        """Текстовое описание плана запроса"""
+
+        steps = [f"period [{self.start}, {self.stop}]"] if self.start or self.stop else []
+        steps += [f"filter {column} {operator} {value!r}" for column, operator, value in self.conditions]
+        if self.aggregations:
+            steps.append(f"group_by {self.group_columns} agg {self.aggregations}")
+        if self.columns is not None:
+            steps.append(f"select {self.columns}")
+        return " -> ".join(["scan"] + steps)
+
+    def _period_rows(self) -> tuple[slice, np.ndarray]:
+        """Диапазон строк периода и маска периода внутри диапазона"""
+
+        transactions = self.transactions
+        if self.start is None and self.stop is None:
+            return slice(0, len(transactions)), np.ones(len(transactions), dtype=bool)
+
+        # Порядок дат проверяется при каждом выполнении: дата фрейм мог измениться на месте.
+        # Индекс pandas неизменяем и сам кэширует монотонность, для него повторная проверка бесплатна
+        if isinstance(transactions.index, pd.DatetimeIndex):
+            dates = transactions.index.to_numpy(dtype="datetime64[ns]")
+            order = (
+                1
+                if transactions.index.is_monotonic_increasing
+                else -1 if transactions.index.is_monotonic_decreasing else 0
+            )
+        else:
+            dates = get_operation_dates(transactions).to_numpy(dtype="datetime64[ns]")
+            order = get_dates_order(dates)
+
+        bounds = get_period_bounds(dates, self.start, self.stop, order)
+        if bounds is not None:
+            row_start, row_stop = bounds
+            return slice(row_start, max(row_start, row_stop)), np.ones(max(0, row_stop - row_start), dtype=bool)
+
+        mask = np.ones(len(dates), dtype=bool)
+        if self.start is not None:
+            mask &= dates >= np.datetime64(self.start, "ns")
+        if self.stop is not None:
+            mask &= dates <= np.datetime64(self.stop, "ns")
+        return slice(0, len(dates)), mask
+
+    def collect(self) -> pd.DataFrame:
+        """
+        Метод выполняет запрос.
+
+        :return: Дата фрейм отобранных операций в исходном порядке (с новым индексом, кроме DatetimeIndex)
+            или дата фрейм агрегатов (по одной строке на группу, отсортированный по колонкам группировки)
+        """
+
+        logger.info(f"Выполнение запроса {self.explain()}")
+
+        rows, mask = self._period_rows()
+        period = self.transactions.iloc[rows]
+
+        for column, operator, value in self.conditions:
+            values = period[column]
+            if operator == "==":
+                mask &= (values == value).to_numpy(dtype=bool, na_value=False)
+            elif operator == "<":
+                mask &= (values < value).to_numpy(dtype=bool, na_value=False)
+            elif operator == "in":
+                mask &= values.isin(value).to_numpy(dtype=bool)
+            else:
+                texts = values.astype(object).where(values.notna(), "").astype(str)
+                mask &= texts.str.contains(value, regex=True).to_numpy(dtype=bool)
+
+        selected = period[mask] if not mask.all() else period
+
+        if self.aggregations:
+            if self.group_columns:
+                result = selected.groupby(self.group_columns, observed=True).agg(**self.aggregations).reset_index()
+            else:
+                result = pd.DataFrame(
+                    {name: [selected[column].agg(func)] for name, (column, func) in self.aggregations.items()}
+                )
+        else:
+            result = selected if isinstance(selected.index, pd.DatetimeIndex) else selected.reset_index(drop=True)
+
+        if self.columns is not None:
+            result = result[self.columns]
+        return result
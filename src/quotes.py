@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+import requests
+
+logger = logging.getLogger("quotes")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "quotes.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Последние полученные котировки, отдаются при превышении лимита запросов
+path_to_quotes_cache = os.path.abspath(
+    os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "stock_prices.json")
+)
+
+# Лимиты бесплатного ключа Alpha Vantage: (количество запросов, период в секундах)
+ALPHA_VANTAGE_RATE_LIMITS = ((5, 60.0), (25, 24 * 60 * 60.0))
+
+# Ключи ответа Alpha Vantage о превышении лимита (ответ приходит со статусом 200)
+ALPHA_VANTAGE_THROTTLE_KEYS = ("Note", "Information")
+
+# Время ожидания ответа Alpha Vantage в секундах (подключение, чтение)
+ALPHA_VANTAGE_TIMEOUT = (5.0, 30.0)
+
+
+def get_alpha_vantage_base_url() -> str:
+    """
+    Функция возвращает адрес API Alpha Vantage из переменной окружения ALPHA_VANTAGE_BASE_URL,
+    по умолчанию https://www.alphavantage.co
+
+    :return: Адрес API без завершающего "/"
+    """
+
+    return (os.getenv("ALPHA_VANTAGE_BASE_URL") or "https://www.alphavantage.co").rstrip("/")
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов "ведро токенов": не больше capacity запросов за period секунд.
+    Токены восстанавливаются равномерно, запрос забирает один токен.
+    """
+
+    def __init__(self, capacity: int, period: float) -> None:
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Время в секундах до появления токена"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Забрать токен"""
+        self._refill()
+        self.tokens -= 1
+
+
+class QuoteScheduler:
+    """
+    Планировщик запросов котировок GLOBAL_QUOTE к Alpha Vantage.
+
+    - тикеры запроса дедуплицируются и запрашиваются параллельно в пуле потоков;
+    - одновременные запросы одного тикера из разных потоков объединяются в один запрос к API;
+    - частота запросов ограничивается ведрами токенов (по умолчанию 5 в минуту и 25 в сутки);
+    - котировка, полученная не раньше ttl секунд назад, отдается без запроса;
+    - при исчерпании лимита, ответе API о превышении лимита или ошибке отдается последняя известная котировка
+      с признаком "stale". Последние котировки сохраняются в файл "/data/stock_prices.json".
+
+    У Alpha Vantage нет пакетного запроса котировок для бесплатного ключа, поэтому каждый тикер - отдельный запрос.
+    """
+
+    def __init__(
+        self,
+        rate_limits: tuple[tuple[int, float], ...] = ALPHA_VANTAGE_RATE_LIMITS,
+        ttl: float = 60.0,
+        max_wait: float = 0.0,
+        max_workers: int = 4,
+        path_to_cache: Optional[str] = None,
+    ) -> None:
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in rate_limits]
+        self.ttl = ttl
+        self.max_wait = max_wait
+        self.path_to_cache = path_to_cache
+        self.last_quotes: dict[str, dict[str, Any]] = self._load_cache()
+
+        self._lock = threading.RLock()
+        self._in_flight: dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="quotes")
+
+    def _load_cache(self) -> dict[str, dict[str, Any]]:
+        if self.path_to_cache is None:
+            return {}
+        try:
+            with open(self.path_to_cache, encoding="utf-8") as cache_file:
+                return dict(json.load(cache_file))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self) -> None:
+        if self.path_to_cache is None:
+            return
+        with self._lock:
+            last_quotes = dict(self.last_quotes)
+        with open(self.path_to_cache, "w", encoding="utf-8") as cache_file:
+            json.dump(last_quotes, cache_file, ensure_ascii=False, indent=4)
+
+    def _acquire(self) -> bool:
+        """Получение токена во всех ведрах, ожидание не дольше max_wait секунд"""
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                wait = max(bucket.wait_time() for bucket in self.buckets)
+                if wait == 0:
+                    for bucket in self.buckets:
+                        bucket.take()
+                    return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def _last_known(self, symbol: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            quote = self.last_quotes.get(symbol)
+        if quote is None:
+            logger.error(f"Котировка {symbol} недоступна")
+            return None
+        return {**quote, "stale": True}
+
+    def _fetch(self, symbol: str) -> Optional[dict[str, Any]]:
+        if not self._acquire():
+            logger.warning(f"Лимит запросов исчерпан, для {symbol} используется последняя котировка")
+            return self._last_known(symbol)
+
+        url = (
+            f"{get_alpha_vantage_base_url()}/query?function=GLOBAL_QUOTE&symbol={symbol}"
+            f"&apikey={os.getenv('API-key')}"
+        )
+        try:
+            response = requests.get(url, timeout=ALPHA_VANTAGE_TIMEOUT)
+            data = response.json()
+        except (requests.RequestException, ValueError) as ex:
+            logger.error(f"Ошибка запроса котировки {symbol}: {ex}")
+            return self._last_known(symbol)
+
+        if response.status_code != 200:
+            logger.error(f"Сайт по запросу компании {symbol} не отвечает. Ответ {response.status_code}")
+            return self._last_known(symbol)
+
+        quote = data.get("Global Quote") if isinstance(data, dict) else None
+        if not quote or "05. price" not in quote:
+            throttled = isinstance(data, dict) and any(key in data for key in ALPHA_VANTAGE_THROTTLE_KEYS)
+            logger.warning(f"{'Превышен лимит API' if throttled else 'Нет котировки'} по запросу компании {symbol}")
+            return self._last_known(symbol)
+
+        record = {"price": quote["05. price"], "timestamp": time.time()}
+        with self._lock:
+            self.last_quotes[symbol] = record
+        return {**record, "stale": False}
+
+    def _submit(self, symbol: str) -> Future:
+        with self._lock:
+            quote = self.last_quotes.get(symbol)
+            if quote is not None and time.time() - quote["timestamp"] < self.ttl:
+                fresh: Future = Future()
+                fresh.set_result({**quote, "stale": False})
+                return fresh
+
+            # Запрос тикера уже выполняется - ждем его результат
+            if symbol in self._in_flight:
+                return self._in_flight[symbol]
+
+            future = self._executor.submit(self._fetch, symbol)
+            self._in_flight[symbol] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(symbol, None))
+            return future
+
+    def get_quotes(self, symbols: list[str]) -> dict[str, dict[str, Any]]:
+        """
+        Метод возвращает котировки тикеров.
+
+        :param symbols: Список тикеров
+        :return quotes: Словарь {тикер: {"price": цена, "timestamp": время получения, "stale": устаревшая}},
+            тикеры без известной котировки отсутствуют
+        """
+
+        logger.info(f"Вызов метода {self.get_quotes.__name__}")
+
+        futures = {symbol: self._submit(symbol) for symbol in dict.fromkeys(symbols)}
+        quotes = {}
+        for symbol, future in futures.items():
+            quote = future.result()
+            if quote is not None:
+                quotes[symbol] = quote
+
+        self._save_cache()
+        return quotes
+
+
+quote_scheduler: Optional[QuoteScheduler] = None
+
+
+def get_quote_scheduler() -> QuoteScheduler:
+    """
+    Функция возвращает общий планировщик котировок приложения с кэшем "/data/stock_prices.json".
+
+    :return: Планировщик котировок
+    """
+
+    global quote_scheduler
+    if quote_scheduler is None:
+        quote_scheduler = QuoteScheduler(path_to_cache=path_to_quotes_cache)
+    return quote_scheduler
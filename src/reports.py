@@ -1,12 +1,21 @@
+import atexit
 import datetime
 import json
 import logging
 import os
-from typing import Optional
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
 
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+from src.forecast import SpendingForecaster
+from src.fx import FxRateStore, convert_transactions_to_rub
+from src.storage import PandasStorage, TransactionStorage
+from src.timeseries import SpendingTimeSeries
+
 logger = logging.getLogger("reports")
 logger.setLevel(logging.DEBUG)
 
@@ -16,8 +25,153 @@ file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(m
 file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
+# Папка для файлов отчетов
+path_to_reports_dir = os.path.abspath(os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "reports"))
+
+REPORT_FORMATS = ("json", "csv", "parquet")
+
+# Колонки операций, которые нужны отчету "Траты по дням недели" без пересчета валют
+SPENDING_BY_WEEKDAY_COLUMNS = ("Дата операции", "Статус", "Сумма операции")
+
+# Реестр отчетов: имя функции -> функция отчета
+REPORTS: dict[str, Callable[..., str]] = {}
+
+# Файлы отчетов: имя функции -> (имя файла, формат), в них пишет run_report
+REPORT_FILES: dict[str, tuple[str, str]] = {}
+
+
+def write_report_file(path: str, result: str, file_format: str) -> None:
+    """
+    Функция записывает результат отчета в файл заданного формата.
+
+    :param path: Путь к файлу отчета
+    :param result: Результат отчета - JSON строка
+    :param file_format: Формат файла: "json", "csv" или "parquet" (нужен пакет pyarrow, extra "parquet")
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if file_format == "json":
+        with open(path, "w", encoding="utf-8") as report_file:
+            report_file.write(result)
+        return
+
+    data = json.loads(result)
+    report_df = pd.DataFrame([data]) if isinstance(data, dict) else pd.DataFrame(data)
+    if file_format == "csv":
+        report_df.to_csv(path, index=False, encoding="utf-8")
+    else:
+        report_df.to_parquet(path, index=False)
+
+
+class ReportWriter:
+    """
+    Класс фоновой записи отчетов в файлы.
+    Результаты ставятся в очередь, поток записи забирает их пакетами до batch_size штук
+    и записывает только последний результат для каждого файла пакета.
+    """
+
+    def __init__(self, batch_size: int = 16) -> None:
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, result: str, file_format: str) -> None:
+        """Метод ставит результат отчета в очередь на запись"""
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+        self._queue.put((path, result, file_format))
+
+    def flush(self) -> None:
+        """Метод ожидает запись всех результатов из очереди"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Для каждого файла записываем только последний результат пакета
+            last_results = {path: (result, file_format) for path, result, file_format in batch}
+            for path, (result, file_format) in last_results.items():
+                try:
+                    write_report_file(path, result, file_format)
+                    logger.info(f"Отчет записан в файл {path}")
+                except Exception as ex:
+                    logger.error(f"Ошибка записи отчета в файл {path}: {ex}")
+
+            for _ in batch:
+                self._queue.task_done()
+
+
+report_writer = ReportWriter()
+report_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report")
+
+
+def report(file_name: Optional[str] = None, file_format: str = "json") -> Callable:
+    """
+    Декоратор для функций-отчетов.
+    Регистрирует функцию в реестре REPORTS вместе с файлом отчета в папке reports/.
+    Прямой вызов функции файл не записывает: результат записывается в файл, когда отчет запускается
+    функцией run_report (фоновым потоком report_writer).
+
+    :param file_name: Имя файла отчета, по умолчанию <имя функции>.<формат>
+    :param file_format: Формат файла: "json", "csv" или "parquet"
+    """
+
+    if file_format not in REPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат отчета {file_format}")
+
+    def decorator(func: Callable[..., str]) -> Callable[..., str]:
+        REPORTS[func.__name__] = func
+        REPORT_FILES[func.__name__] = (file_name or f"{func.__name__}.{file_format}", file_format)
+        return func
+
+    return decorator
+
+
+def _run_and_write_report(name: str, *args: Any, **kwargs: Any) -> str:
+    """Формирование отчета из реестра и постановка результата в очередь записи в файл"""
+
+    result = REPORTS[name](*args, **kwargs)
+    file_name, file_format = REPORT_FILES[name]
+    report_writer.submit(os.path.join(path_to_reports_dir, file_name), result, file_format)
+    return result
+
+
+def run_report(name: str, *args: Any, **kwargs: Any) -> Future:
+    """
+    Функция запускает отчет из реестра в пуле потоков и возвращает Future с результатом.
+    Результат отчета записывается в его файл в папке reports/.
+
+    :param name: Имя функции отчета
+    :return future: Future с JSON ответом отчета
+    """
+
+    logger.info(f"Запуск отчета {name} в фоне")
+    if name not in REPORTS:
+        raise KeyError(f"Отчет {name} не зарегистрирован")
+
+    return report_executor.submit(_run_and_write_report, name, *args, **kwargs)
+
 
-def spending_by_weekday(transactions: pd.DataFrame, date: Optional[str] = None) -> str:
+@report()
+def spending_by_weekday(
+    transactions: Union[pd.DataFrame, TransactionStorage],
+    date: Optional[str] = None,
+    months: int = 3,
+    fx_rates: Optional[FxRateStore] = None,
+) -> str:
     """
         ###############################
         # ОТЧЕТ: Траты по дням недели #
@@ -25,11 +179,16 @@ def spending_by_weekday(transactions: pd.DataFrame, date: Optional[str] = None)
 
     Функция принимает на вход: дата фрейм с транзакциями, опциональную дату.
     Если дата не передана, то берется текущая дата.
+    Вместо дата фрейма можно передать хранилище операций (модуль storage),
+    тогда фильтрация и агрегация выполняются в хранилище.
 
     Функция возвращает средние траты в каждый из дней недели за последние три месяца (от переданной даты).
+    Размер периода в месяцах можно задать параметром months.
 
-    :param transactions: Дата фрейм с транзакциями
+    :param transactions: Дата фрейм с транзакциями или хранилище операций
     :param date: Опциональная дата в формате YYYY-MM-DD
+    :param months: Количество месяцев периода до переданной даты
+    :param fx_rates: Таблица исторических курсов валют для пересчета сумм дата фрейма в рубли
     :return response: json ответ в форме
         {
                 "Sunday": 0,
@@ -45,28 +204,30 @@ def spending_by_weekday(transactions: pd.DataFrame, date: Optional[str] = None)
     logger.info(f"Вызов функции {spending_by_weekday.__name__}")
 
     # Проверка, если дата фрейм пустой возвращаем ответ
-    if len(transactions) == 0:
+    if isinstance(transactions, pd.DataFrame) and len(transactions) == 0:
         logger.warning("Данные за указанный период отсутствуют")
         return json.dumps(
             {"Sunday": 0, "Monday": 0, "Tuesday": 0, "Wednesday": 0, "Thursday": 0, "Friday": 0, "Saturday": 0}
         )
-    # Определяем трех месячный интервал от заданной даты
+    # Определяем интервал в months месяцев от заданной даты
     if date is None:
         stop_dt = datetime.datetime.now()
     else:
         stop_dt = datetime.datetime.strptime(date, "%Y-%m-%d")
-    start_dt = stop_dt - relativedelta(months=3)
-
-    # Фильтрация по заданному периоду
-    transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], dayfirst=True)
-    transactions_df_for_period = transactions[
-        (transactions["Дата операции"] >= start_dt)
-        & (transactions["Дата операции"] <= stop_dt)
-        & (transactions["Статус"] == "OK")
-    ]
+    start_dt = stop_dt - relativedelta(months=months)
 
-    # Меняем данные даты операции на день недели
-    transactions_df_for_period["Дата операции"] = transactions_df_for_period["Дата операции"].dt.weekday
+    # Сумма и количество успешных операций по дням недели за заданный период
+    if isinstance(transactions, TransactionStorage):
+        storage = transactions
+    elif fx_rates is not None:
+        storage = PandasStorage(convert_transactions_to_rub(transactions, fx_rates))
+    else:
+        storage = PandasStorage(transactions)
+    weekday_sums = storage.get_sums_by_weekday(start_dt, stop_dt)
+    sums_per_weekday = {
+        int(weekday): (float(total), int(count))
+        for weekday, total, count in zip(weekday_sums["weekday"], weekday_sums["total"], weekday_sums["count"])
+    }
 
     # Заполняем словарь трат по дням недели
     dict_of_days_nums = {
@@ -80,19 +241,110 @@ def spending_by_weekday(transactions: pd.DataFrame, date: Optional[str] = None)
     }
     response = {}
 
-    # Цикл проверки дата фрейм фильтруется по дню недели и записывает соответствующие данные трат
     for day, num_day in dict_of_days_nums.items():
-        transactions_df_per_weekday = transactions_df_for_period[
-            (transactions_df_for_period["Дата операции"]) == num_day
+        total, count = sums_per_weekday.get(num_day, (0.0, 0))
+        response[day] = round(abs(total) / count, 2) if count > 0 else 0
+
+    logger.info("Функция возвращает результат")
+    return json.dumps(response)
+
+
+@report()
+def spending_trend(
+    transactions: pd.DataFrame, freq: str = "M", window: int = 3, fx_rates: Optional[FxRateStore] = None
+) -> str:
+    """
+        ##########################
+        # ОТЧЕТ: Динамика трат   #
+        ##########################
+
+    Функция принимает на вход дата фрейм с транзакциями, частоту ряда и размер окна скользящего среднего.
+    Возвращает траты по периодам за всю историю, скользящее среднее и накопленную сумму трат.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param freq: Частота ряда: "D" - дни, "W" - недели, "M" - месяцы
+    :param window: Размер окна скользящего среднего в периодах
+    :param fx_rates: Таблица исторических курсов валют для пересчета сумм в рубли
+    :return response: json ответ в форме
+        [
+            {
+                "date": "2021-12-01",
+                "spend": 0,
+                "rolling_mean": 0,
+                "cumulative": 0
+            },
         ]
-        try:
-            response[day] = round(
-                abs(float(transactions_df_per_weekday["Сумма операции"].sum()))
-                / float(transactions_df_per_weekday["Сумма операции"].count()),
-                2,
-            )
-        except ZeroDivisionError:
-            response[day] = 0
+    """
+
+    logger.info(f"Вызов функции {spending_trend.__name__}")
+
+    if fx_rates is not None:
+        transactions = convert_transactions_to_rub(transactions, fx_rates)
+    series_df = SpendingTimeSeries(transactions).series(freq, window)
+    if series_df.empty:
+        logger.warning("Данные за указанный период отсутствуют")
+        return json.dumps([])
+
+    response = [
+        {
+            "date": period,
+            "spend": round(float(spend), 2),
+            "rolling_mean": round(float(rolling_mean), 2),
+            "cumulative": round(float(cumulative), 2),
+        }
+        for period, spend, rolling_mean, cumulative in zip(
+            pd.DatetimeIndex(series_df.index).strftime("%Y-%m-%d"),
+            series_df["spend"],
+            series_df["rolling_mean"],
+            series_df["cumulative"],
+        )
+    ]
 
     logger.info("Функция возвращает результат")
     return json.dumps(response)
+
+
+@report()
+def spending_forecast(
+    transactions: pd.DataFrame, alpha: float = 0.3, season: int = 12, fx_rates: Optional[FxRateStore] = None
+) -> str:
+    """
+        ##################################
+        # ОТЧЕТ: Прогноз трат на месяц   #
+        ##################################
+
+    Функция принимает на вход дата фрейм с транзакциями и возвращает прогноз трат на месяц,
+    следующий за последним месяцем операций, по каждой категории и по каждой карте:
+    сезонный наивный прогноз (траты того же месяца год назад) и экспоненциальное сглаживание.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param alpha: Параметр экспоненциального сглаживания (0, 1]
+    :param season: Длина сезона в месяцах
+    :param fx_rates: Таблица исторических курсов валют для пересчета сумм в рубли
+    :return response: json ответ в форме
+        {
+            "month": "2022-01",
+            "categories": [{"category": "Супермаркеты", "seasonal_naive": 0, "ses": 0}],
+            "cards": [{"card": "*7197", "seasonal_naive": 0, "ses": 0}]
+        }
+    """
+
+    logger.info(f"Вызов функции {spending_forecast.__name__}")
+
+    if fx_rates is not None:
+        transactions = convert_transactions_to_rub(transactions, fx_rates)
+
+    response: dict[str, Any] = {"month": None, "categories": [], "cards": []}
+    for name, key, column in (("categories", "category", "Категория"), ("cards", "card", "Номер карты")):
+        forecaster = SpendingForecaster(column, alpha, season, transactions)
+        response["month"] = response["month"] or forecaster.next_month
+        response[name] = [
+            {key: value, "seasonal_naive": round(float(seasonal_naive), 2), "ses": round(float(ses), 2)}
+            for value, seasonal_naive, ses in forecaster.forecast().itertuples()
+        ]
+
+    if response["month"] is None:
+        logger.warning("Данные за указанный период отсутствуют")
+
+    logger.info("Функция возвращает результат")
+    return json.dumps(response, ensure_ascii=False)
@@ -0,0 +1,170 @@
+import logging
+import os
+from typing import Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger("schema")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "schema.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Формат даты операции в выгрузке банка
+OPERATION_DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+# Схема выгрузки операций: колонка -> тип после нормализации
+OPERATIONS_SCHEMA = {
+    "Дата операции": "datetime",
+    "Дата платежа": "string",
+    "Номер карты": "category",
+    "Статус": "category",
+    "Сумма операции": "float",
+    "Валюта операции": "category",
+    "Сумма платежа": "float",
+    "Валюта платежа": "category",
+    "Кэшбэк": "float",
+    "Категория": "category",
+    "MCC": "float",
+    "Описание": "string",
+    "Бонусы (включая кэшбэк)": "integer",
+    "Округление на инвесткопилку": "integer",
+    "Сумма операции с округлением": "float",
+}
+
+# Без этих значений операция не участвует в расчетах, строки с ошибками в них отбрасываются
+REQUIRED_VALUES = ("Дата операции", "Сумма операции")
+
+
+class SchemaError(ValueError):
+    """Данные операций не соответствуют схеме выгрузки"""
+
+
+def get_read_dtypes(columns: Optional[Sequence[str]] = None) -> dict[str, str]:
+    """
+    Функция возвращает типы колонок для чтения выгрузки: колонки-категории схемы (статус, карта, валюты, категория)
+    читаются сразу как category, и повторяющиеся строки не хранятся отдельными объектами.
+    Числа и даты читаются без явного типа, чтобы ошибочные значения попали в отчет нормализации.
+
+    :param columns: Читаемые колонки, None - все колонки схемы
+    :return: Словарь колонка -> тип для параметра dtype функций чтения pandas
+    """
+
+    return {
+        column: "category"
+        for column, kind in OPERATIONS_SCHEMA.items()
+        if kind == "category" and (columns is None or column in columns)
+    }
+
+
+def is_normalized(transactions: pd.DataFrame) -> bool:
+    """Функция проверяет, прошел ли дата фрейм нормализацию normalize_transactions"""
+    return bool(transactions.attrs.get("normalized", False))
+
+
+def get_operation_dates(transactions: pd.DataFrame) -> pd.Series:
+    """
+    Функция возвращает даты операций как datetime.
+    Для нормализованных данных колонка возвращается без разбора строк.
+
+    :param transactions: Дата фрейм операций
+    :return: Ряд дат операций
+    """
+
+    dates = transactions["Дата операции"]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    return pd.to_datetime(dates, dayfirst=True)
+
+
+def normalize_transactions(
+    transactions: pd.DataFrame, columns: Optional[Sequence[str]] = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Функция проверяет набор колонок выгрузки и приводит колонки к типам схемы за один векторный проход:
+    даты операций - datetime64, суммы - float, бонусы и округления - Int64,
+    статус, карта, валюты и категория - category, описание и дата платежа - строки.
+    Значения, которые не удалось привести к типу, заменяются на пропуски и попадают в отчет,
+    строки без даты или суммы операции отбрасываются.
+    Повторный вызов для нормализованного дата фрейма ничего не делает.
+    Если передан список колонок (данные загружены не полностью), проверяются и приводятся только они.
+
+    :param transactions: Дата фрейм операций
+    :param columns: Колонки схемы в данных, None - все колонки схемы
+    :return normalized, bad_rows: Нормализованный дата фрейм и отчет об ошибках
+        с колонками "row" (номер строки исходного дата фрейма), "column", "value"
+    :raises SchemaError: Если в данных нет колонок схемы
+    """
+
+    logger.info(f"Вызов функции {normalize_transactions.__name__}")
+
+    bad_rows = pd.DataFrame({"row": pd.Series(dtype=int), "column": pd.Series(dtype=object), "value": []})
+    if is_normalized(transactions):
+        return transactions, bad_rows
+
+    schema = {
+        column: kind for column, kind in OPERATIONS_SCHEMA.items() if columns is None or column in columns
+    }
+    missing = [column for column in schema if column not in transactions.columns]
+    if missing:
+        logger.error(f"В данных отсутствуют колонки {missing}")
+        raise SchemaError(f"В данных отсутствуют колонки: {', '.join(missing)}")
+
+    normalized = transactions.reset_index(drop=True)
+    errors = []
+    for column, kind in schema.items():
+        values = normalized[column]
+        converted: pd.Series
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Категории, прочитанные с явным типом, уже строки - колонка остается без изменений
+            if kind == "category" and all(isinstance(category, str) for category in values.cat.categories):
+                continue
+            values = values.astype(object)
+
+        if kind == "datetime":
+            converted = pd.to_datetime(values, format=OPERATION_DATE_FORMAT, errors="coerce")
+        elif kind == "float":
+            converted = pd.to_numeric(values, errors="coerce").astype(float)
+        elif kind == "integer":
+            numbers = pd.to_numeric(values, errors="coerce").astype(float)
+            converted = numbers.where(numbers % 1 == 0).astype("Int64")
+        else:
+            converted = values.where(values.isna(), values.astype(str))
+            if kind == "category":
+                converted = converted.astype("category")
+
+        failed = converted.isna() & values.notna()
+        if failed.any():
+            errors.append(pd.DataFrame({"row": failed[failed].index, "column": column, "value": values[failed]}))
+        normalized[column] = converted
+
+    if errors:
+        bad_rows = pd.concat(errors, ignore_index=True)
+        logger.warning(f"Значения не соответствуют схеме в {bad_rows['row'].nunique()} строках")
+
+    valid = normalized[[column for column in REQUIRED_VALUES if column in schema]].notna().all(axis=1)
+    if not valid.all():
+        logger.warning(f"Отброшено {int((~valid).sum())} строк без даты или суммы операции")
+        normalized = normalized[valid].reset_index(drop=True)
+
+    normalized.attrs["normalized"] = True
+    return normalized, bad_rows
+
+
+def format_transactions(transactions: pd.DataFrame, date_format: Optional[str] = OPERATION_DATE_FORMAT) -> list[dict]:
+    """
+    Функция возвращает операции списком словарей: значения категорий - строки, пропуски - None.
+
+    :param transactions: Дата фрейм операций
+    :param date_format: Формат строки даты операции, по умолчанию как в выгрузке "ДД.ММ.ГГГГ ЧЧ:ММ:СС",
+        None - даты остаются datetime
+    :return: Список словарей операций
+    """
+
+    formatted = transactions.astype(object)
+    if date_format is not None and pd.api.types.is_datetime64_any_dtype(transactions["Дата операции"]):
+        formatted["Дата операции"] = transactions["Дата операции"].dt.strftime(date_format)
+    return list(formatted.where(transactions.notna(), None).to_dict("records"))
@@ -0,0 +1,240 @@
+import bisect
+import logging
+import os
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("search")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "search.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Колонки, по которым строится индекс
+INDEXED_COLUMNS = ("Описание", "Категория")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Функция разбивает строку на токены: слова в нижнем регистре, "ё" заменяется на "е".
+
+    :param text: Строка
+    :return: Список токенов
+    """
+
+    return re.findall(r"\w+", text.lower().replace("ё", "е"))
+
+
+def _tokenize_series(texts: pd.Series) -> pd.Series:
+    return texts.astype(object).fillna("").astype(str).str.lower().str.replace("ё", "е").str.findall(r"\w+")
+
+
+def get_row_fingerprints(transactions: pd.DataFrame) -> np.ndarray:
+    """
+    Функция возвращает хэши строк операций по индексируемым колонкам и дате операции.
+    По ним проверяется, что строки с теми же номерами в дата фрейме - те же операции, что в индексе.
+
+    :param transactions: Дата фрейм операций
+    :return: Массив хэшей uint64, по одному на строку
+    """
+
+    frame = pd.DataFrame({column: transactions[column].astype(object).to_numpy() for column in INDEXED_COLUMNS})
+    frame["Дата операции"] = get_operation_dates(transactions).to_numpy(dtype="datetime64[ns]")
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class TransactionSearchIndex:
+    """
+    Инвертированный индекс по описанию и категории операций: токен -> отсортированный массив номеров строк.
+    Номер строки - порядковый номер операции в индексе (в порядке добавления методом add).
+    Если задан массив positions (его заполняет get_search_index), search возвращает позиции операций
+    в дата фрейме: positions[номер строки индекса].
+
+    Индекс поддерживает поиск по префиксу, фильтр по периоду, дописывание новых операций методом add
+    и сохранение в файл .npz (без pickle) рядом с файлом операций. Для каждой строки хранится хэш операции
+    (get_row_fingerprints), по которому сохраненный индекс сверяется с данными.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, np.ndarray] = {}
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.fingerprints = np.array([], dtype=np.uint64)
+        self.positions: Optional[np.ndarray] = None
+        self._sorted_tokens: Optional[list[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def add(self, transactions: pd.DataFrame) -> None:
+        """
+        Метод добавляет операции в индекс. Номера строк продолжают уже проиндексированные.
+
+        :param transactions: Дата фрейм с новыми операциями
+        """
+
+        logger.info(f"Вызов метода {self.add.__name__}")
+
+        if len(transactions) == 0:
+            return
+
+        row_ids = np.arange(len(self), len(self) + len(transactions))
+        texts = transactions[INDEXED_COLUMNS[0]].astype(object).fillna("").astype(str)
+        for column in INDEXED_COLUMNS[1:]:
+            texts = texts + " " + transactions[column].astype(object).fillna("").astype(str)
+        tokens = pd.DataFrame({"token": _tokenize_series(texts).to_numpy(), "row": row_ids}).explode("token")
+        tokens = tokens.dropna().drop_duplicates()
+
+        for token, rows in tokens.groupby("token", sort=False)["row"]:
+            new_rows = rows.to_numpy(dtype=np.int64)
+            existing = self.postings.get(str(token))
+            self.postings[str(token)] = new_rows if existing is None else np.concatenate([existing, new_rows])
+
+        operation_dates = get_operation_dates(transactions)
+        self.dates = np.concatenate([self.dates, operation_dates.to_numpy(dtype="datetime64[ns]")])
+        self.fingerprints = np.concatenate([self.fingerprints, get_row_fingerprints(transactions)])
+        self._sorted_tokens = None
+
+        logger.info(f"В индекс добавлено {len(transactions)} операций")
+
+    def _token_rows(self, token: str, prefix: bool) -> np.ndarray:
+        if not prefix:
+            return self.postings.get(token, np.array([], dtype=np.int64))
+
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+
+        # Токены с заданным префиксом идут в отсортированном списке подряд
+        start = bisect.bisect_left(self._sorted_tokens, token)
+        stop = bisect.bisect_left(self._sorted_tokens, token + "\uffff")
+        matched = [self.postings[matched_token] for matched_token in self._sorted_tokens[start:stop]]
+        if len(matched) == 0:
+            return np.array([], dtype=np.int64)
+
+        return np.unique(np.concatenate(matched))
+
+    def search(
+        self, query: str, prefix: bool = True, start: Optional[str] = None, stop: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Метод возвращает номера строк операций, содержащих все слова запроса.
+
+        :param query: Строка запроса, например "яндекс такси"
+        :param prefix: Искать слова запроса как префиксы ("такс" найдет "такси")
+        :param start: Начало периода в формате YYYY-MM-DD (включительно)
+        :param stop: Конец периода в формате YYYY-MM-DD (включительно, до конца дня)
+        :return rows: Отсортированный массив номеров строк (позиций в дата фрейме, если задан positions)
+        """
+
+        logger.info(f"Поиск по запросу '{query}'")
+
+        query_tokens = tokenize(query)
+        if len(query_tokens) == 0:
+            rows = np.arange(len(self))
+        else:
+            # Пересекаем начиная с самого короткого списка
+            postings = sorted((self._token_rows(token, prefix) for token in query_tokens), key=len)
+            rows = postings[0]
+            for token_rows in postings[1:]:
+                rows = np.intersect1d(rows, token_rows, assume_unique=True)
+
+        if start is not None:
+            rows = rows[self.dates[rows] >= np.datetime64(pd.Timestamp(start))]
+        if stop is not None:
+            rows = rows[self.dates[rows] < np.datetime64(pd.Timestamp(stop) + pd.Timedelta(days=1))]
+
+        if self.positions is not None:
+            return np.sort(self.positions[rows])
+        return rows
+
+    def save(self, path: str) -> None:
+        """
+        Метод сохраняет индекс в файл .npz: токены, номера строк всех токенов подряд и границы списков токенов,
+        даты и хэши строк. Файл содержит только числовые и строковые массивы и читается без pickle.
+        """
+
+        tokens = sorted(self.postings)
+        rows = [self.postings[token] for token in tokens]
+        with open(path, "wb") as index_file:
+            np.savez(
+                index_file,
+                tokens=np.array(tokens, dtype=str),
+                offsets=np.cumsum([0] + [len(token_rows) for token_rows in rows]),
+                rows=np.concatenate(rows) if rows else np.array([], dtype=np.int64),
+                dates=self.dates,
+                fingerprints=self.fingerprints,
+            )
+        logger.info(f"Индекс сохранен в файл {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "TransactionSearchIndex":
+        """Метод загружает индекс из файла .npz"""
+
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            offsets, rows = data["offsets"], data["rows"]
+            index.postings = {
+                str(token): rows[offsets[number]:offsets[number + 1]] for number, token in enumerate(data["tokens"])
+            }
+            index.dates = data["dates"]
+            index.fingerprints = data["fingerprints"]
+        return index
+
+
+def get_index_path(path_to_operations: str) -> str:
+    """
+    Функция возвращает путь к файлу индекса рядом с файлом операций.
+
+    :param path_to_operations: Путь к файлу операций
+    :return: Путь к файлу индекса
+    """
+
+    return os.path.abspath(path_to_operations) + ".index.npz"
+
+
+def get_search_index(transactions: pd.DataFrame, path_to_index: Optional[str] = None) -> TransactionSearchIndex:
+    """
+    Функция возвращает индекс для дата фрейма операций.
+    Операции индексируются в порядке даты операции, а не в порядке строк файла: выписки банка упорядочены
+    от новых к старым, и новые операции, добавленные в начало файла, в порядке дат оказываются в конце.
+    Если файл индекса существует и первые по дате операции совпадают с индексом (совпадают хэши строк),
+    индекс дополняется более новыми операциями. Иначе (выписка заменена, операции удалены или добавлены
+    задним числом) индекс перестраивается. Обновленный индекс сохраняется обратно в файл.
+    Поиск по индексу возвращает позиции операций в переданном дата фрейме.
+
+    :param transactions: Дата фрейм операций
+    :param path_to_index: Путь к файлу индекса, None - индекс строится в памяти
+    :return index: Индекс операций
+    """
+
+    logger.info(f"Вызов функции {get_search_index.__name__}")
+
+    order = np.argsort(get_operation_dates(transactions).to_numpy(dtype="datetime64[ns]"), kind="stable")
+    ordered = transactions.iloc[order]
+
+    index = TransactionSearchIndex()
+    changed = False
+    if path_to_index is not None and os.path.exists(path_to_index):
+        index = TransactionSearchIndex.load(path_to_index)
+        fingerprints = get_row_fingerprints(ordered.iloc[: len(index)])
+        if len(index.fingerprints) != len(index) or not np.array_equal(index.fingerprints, fingerprints):
+            logger.warning("Индекс не соответствует данным, индекс будет перестроен")
+            index = TransactionSearchIndex()
+            changed = True
+
+    if len(index) < len(ordered):
+        index.add(ordered.iloc[len(index):])
+        changed = True
+
+    if changed and path_to_index is not None:
+        index.save(path_to_index)
+
+    index.positions = order
+    return index
@@ -3,9 +3,22 @@ import logging
 import os
 import re
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional, Union
 
-from src.utils import get_transactions_list
+import pandas as pd
+
+from src.anomalies import AnomalyDetector
+from src.budgets import Budget, BudgetMonitor, load_budgets
+from src.cashback import CashbackProgram, load_cashback_programs, simulate_cashback
+from src.fx import FxRateStore, update_fx_rates_as_of
+from src.ledger import CardLedger
+from src.portfolio import (PRICE_CURRENCY, PriceHistoryStore, check_market_data, get_month_ends, get_monthly_savings,
+                           simulate_portfolio, update_price_history)
+from src.query import TransactionQuery
+from src.schema import format_transactions, get_operation_dates
+from src.search import get_index_path, get_search_index
+from src.settings import UserSettings
+from src.utils import get_operations_path, get_transactions_df
 
 logger = logging.getLogger("services")
 logger.setLevel(logging.DEBUG)
@@ -16,6 +29,12 @@ file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(m
 file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
+# Имя и первая буква фамилии с точкой в описании перевода физическому лицу
+PERSONS_PATTERN = re.compile(r"\b[А-ЯЁ][а-яе]+\b\s\b[А-ЯЁ]{1}\b\.")
+
+# Колонки операций, которые нужны сервису «Инвесткопилка»
+INVESTMENT_BANK_COLUMNS = ("Дата операции", "Сумма операции")
+
 
 def get_transactions_to_persons() -> str:
     """
@@ -35,19 +54,14 @@ def get_transactions_to_persons() -> str:
 
     logger.info(f"Вызов сервиса 'Поиск переводов физическим лицам' {get_transactions_to_persons.__name__}")
 
-    # Извлекаем данные из файла
-    path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "operations.xlsx")
-    data_list = get_transactions_list(path_to_file)
-
-    pattern = re.compile(r"\b[А-ЯЁ][а-яе]+\b\s\b[А-ЯЁ]{1}\b\.")
-
-    # Фильтрация по заданному паттерну
+    # Извлекаем данные из файла и фильтруем по категории и заданному паттерну
+    operations_data = get_transactions_df(get_operations_path())
     transactions_list = []
-    for transaction in data_list:
-        if transaction["Категория"] == "Переводы":
-            match = re.search(pattern, transaction["Описание"], flags=0)
-            if match:
-                transactions_list.append(transaction)
+    if len(operations_data) != 0:
+        transactions_df = (
+            TransactionQuery(operations_data).category("Переводы").matches("Описание", PERSONS_PATTERN).collect()
+        )
+        transactions_list = format_transactions(transactions_df)
 
     logger.info("Cервис возвращает результат")
     return json.dumps(
@@ -113,3 +127,433 @@ def investment_bank(month: str, transactions: list[Any], limit: int) -> str:
 
     logger.info("Cервис возвращает результат")
     return json.dumps({"amount_saved": round(savings_amount, 2)})
+
+
+def get_investment_portfolio(
+    transactions: pd.DataFrame,
+    limits: tuple[int, ...] = (10, 50, 100),
+    user_settings: Union[UserSettings, dict[Any, Any], None] = None,
+    price_history: Optional[PriceHistoryStore] = None,
+    fx_rates: Optional[FxRateStore] = None,
+) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Портфель «Инвесткопилки»"         $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция моделирует, сколько стоил бы портфель, если каждый месяц истории операций сумму «Инвесткопилки»
+    вкладывать поровну в акции из настроек пользователя (user_stocks). Цены берутся из локального кэша
+    месячных цен закрытия "/data/stock_history.csv" и пересчитываются из USD в рубли по курсу ЦБ на конец месяца
+    из кэша "/data/fx_rates.csv". Если таблицы не переданы, недостающие цены и курсы догружаются в кэши
+    (Alpha Vantage и архив ЦБ РФ). Суммы месяцев, когда акции еще не торговались, остаются на счете деньгами ("cash").
+    Расчет выполняется сразу для всех порогов округления.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param limits: Пороги округления
+    :param user_settings: Настройки пользователя, None - настройки из кэша
+    :param price_history: Таблица цен, None - цены из файла кэша (с догрузкой устаревших рядов)
+    :param fx_rates: Таблица курсов для пересчета цен из USD в рубли, None - курсы из файла "/data/fx_rates.csv"
+        (с догрузкой курсов на концы месяцев)
+    :raises MarketDataError: Если цен тикера нет ни на один месяц или нет курса USD на конец месяца
+    :return: JSON в формате
+        {
+            "stocks": ["AAPL", "AMZN"],
+            "valuation_date": "2021-12-31",
+            "portfolios": [
+                {
+                    "limit": 10, "invested": 1000.0, "value": 1200.0, "profit": 200.0, "cash": 0.0,
+                    "stocks": [{"stock": "AAPL", "shares": 1.5, "value": 600.0}, ...],
+                    "months": [{"month": "2021-12", "invested": 1000.0, "value": 1200.0}, ...]
+                },
+                ...
+            ]
+        }
+    """
+
+    logger.info(f"Вызов сервиса 'Портфель Инвесткопилки' {get_investment_portfolio.__name__}")
+
+    stocks = list(UserSettings.from_value(user_settings).user_stocks)
+    savings = get_monthly_savings(transactions, limits) if len(transactions) else None
+    if savings is None or len(savings) == 0:
+        logger.warning("Данные в файле за указанный период отсутствуют")
+        return json.dumps({"stocks": stocks, "valuation_date": None, "portfolios": []}, ensure_ascii=False)
+
+    month_ends = get_month_ends(savings)
+    if price_history is None:
+        price_history = update_price_history(stocks)
+    if fx_rates is None:
+        fx_rates = update_fx_rates_as_of(month_ends.tolist(), [PRICE_CURRENCY]) if stocks else FxRateStore()
+    # Без цен и курсов все суммы остались бы деньгами, такой результат не отличить от настоящего
+    check_market_data(stocks, month_ends, price_history, fx_rates)
+
+    simulation = simulate_portfolio(savings, stocks, price_history, fx_rates)
+    months = pd.DatetimeIndex(savings.index).strftime("%Y-%m")
+    last_prices = simulation["prices"][-1]
+
+    portfolios = []
+    for row, limit in enumerate(savings.columns):
+        invested, value = simulation["invested"][row], simulation["value"][row]
+        portfolios.append(
+            {
+                "limit": int(limit),
+                "invested": round(float(invested[-1]), 2),
+                "value": round(float(value[-1]), 2),
+                "profit": round(float(value[-1] - invested[-1]), 2),
+                "cash": round(float(simulation["cash"][row]), 2),
+                "stocks": [
+                    {
+                        "stock": stock,
+                        "shares": round(float(shares), 6),
+                        "value": round(float(shares * last_prices[column]), 2) if shares > 0 else 0.0,
+                    }
+                    for column, (stock, shares) in enumerate(zip(stocks, simulation["shares"][row]))
+                ],
+                "months": [
+                    {"month": month, "invested": round(float(invested_sum), 2), "value": round(float(value_sum), 2)}
+                    for month, invested_sum, value_sum in zip(months, invested, value)
+                ],
+            }
+        )
+
+    logger.info("Cервис возвращает результат")
+    return json.dumps(
+        {"stocks": stocks, "valuation_date": str(simulation["month_ends"][-1]), "portfolios": portfolios},
+        indent=4,
+        ensure_ascii=False,
+    )
+
+
+def get_anomalous_transactions(transactions: pd.DataFrame, threshold: float = 3.0, min_count: int = 10) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Поиск аномальных трат"  $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция возвращает JSON с тратами, которые аномально велики для своей карты или категории.
+    Статистика (среднее и стандартное отклонение) считается за один проход по всей истории,
+    трата попадает в ответ, если ее z-оценка в группе больше threshold. Каждая трата указывается один раз
+    с наибольшей z-оценкой и списком групп, в которых она аномальна; отсутствующие значения - null.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param threshold: Порог z-оценки
+    :param min_count: Минимальное количество трат в группе для оценки
+    :return anomalies: Список аномальных трат в формате
+        {
+            "date": "31.12.2021 16:44:00",
+            "amount": 1000.0,
+            "card": "*7197",
+            "category": "Супермаркеты",
+            "description": "Магнит",
+            "groups": ["Категория", "Номер карты"],
+            "z_score": 4.2
+        }
+    """
+
+    logger.info(f"Вызов сервиса 'Поиск аномальных трат' {get_anomalous_transactions.__name__}")
+
+    if len(transactions) == 0:
+        logger.warning("Данные в файле отсутствуют")
+        return json.dumps([])
+
+    detector = AnomalyDetector(threshold, min_count)
+    detector.update(transactions)
+    anomalies_df = detector.detect(transactions)
+    anomalies_df["Дата"] = get_operation_dates(anomalies_df).dt.strftime("%d.%m.%Y %H:%M:%S")
+
+    anomalies = [
+        {
+            "date": operation["Дата"],
+            "amount": operation["Сумма траты"],
+            "card": None if pd.isna(operation["Номер карты"]) else operation["Номер карты"],
+            "category": None if pd.isna(operation["Категория"]) else operation["Категория"],
+            "description": None if pd.isna(operation["Описание"]) else operation["Описание"],
+            "groups": operation["Группы"],
+            "z_score": operation["z-оценка"],
+        }
+        for operation in anomalies_df.to_dict("records")
+    ]
+
+    logger.info("Cервис возвращает результат")
+    return json.dumps(anomalies, indent=4, ensure_ascii=False)
+
+
+def get_best_cashback_program(
+    transactions: pd.DataFrame, programs: Optional[list[CashbackProgram]] = None
+) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Выгодная программа кэшбэка"       $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция возвращает JSON со сравнением программ кэшбэка на всей истории операций:
+    сколько кэшбэка принесла бы каждая программа и какая из них выгоднее всего.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param programs: Список программ кэшбэка, None - программы из файла "/data/cashback_programs.json"
+    :return: JSON в формате
+        {
+            "actual_cashback": 1200.0,
+            "best_program": "Супермаркеты 5%",
+            "programs": [{"program": "Супермаркеты 5%", "cashback": 2500.0, "capped_months": 1}, ...]
+        }
+    """
+
+    logger.info(f"Вызов сервиса 'Выгодная программа кэшбэка' {get_best_cashback_program.__name__}")
+
+    if programs is None:
+        programs = load_cashback_programs()
+
+    if len(transactions) == 0 or len(programs) == 0:
+        logger.warning("Данные для сравнения программ отсутствуют")
+        return json.dumps({"actual_cashback": 0, "best_program": None, "programs": []}, ensure_ascii=False)
+
+    results = simulate_cashback(transactions, programs)
+    actual_cashback = TransactionQuery(transactions).status("OK").spends().collect()["Кэшбэк"].sum()
+
+    logger.info("Cервис возвращает результат")
+    return json.dumps(
+        {
+            "actual_cashback": round(float(actual_cashback), 2),
+            "best_program": results["program"].iloc[0],
+            "programs": results.to_dict("records"),
+        },
+        indent=4,
+        ensure_ascii=False,
+    )
+
+
+def get_budget_alerts(transactions: pd.DataFrame, budgets: Optional[list[Budget]] = None) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Контроль бюджетов"      $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция возвращает JSON с предупреждениями о превышении долей лимитов бюджетов.
+    Траты проходят через BudgetMonitor по одной в порядке даты операции, как новые операции,
+    поэтому предупреждение выдается в момент пересечения порога.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param budgets: Список бюджетов, None - бюджеты из файла "/data/budgets.json"
+    :return alerts: Список предупреждений в формате
+        {
+            "budget": "Супермаркеты",
+            "period_start": "2021-12-01",
+            "threshold": 0.8,
+            "spent": 16100.5,
+            "limit": 20000.0,
+            "date": "2021-12-20T12:00:00"
+        }
+    """
+
+    logger.info(f"Вызов сервиса 'Контроль бюджетов' {get_budget_alerts.__name__}")
+
+    if budgets is None:
+        budgets = load_budgets()
+
+    alerts = BudgetMonitor(budgets).process_transactions(transactions)
+
+    logger.info("Cервис возвращает результат")
+    return json.dumps([alert.to_dict() for alert in alerts], indent=4, ensure_ascii=False)
+
+
+def get_card_balances(
+    transactions: pd.DataFrame,
+    date_time_str: Optional[str] = None,
+    days: int = 30,
+    opening_balances: Optional[dict[str, float]] = None,
+) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Остатки по картам"      $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция возвращает JSON с остатками по каждой карте на момент времени и остатками на конец дня
+    за days дней, заканчивая днем этого момента. Остатки считаются журналом CardLedger по всей истории
+    операций (колонки ledger.LEDGER_COLUMNS) от входящих остатков opening_balances.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param date_time_str: Строка с датой и временем в формате YYYY-MM-DD HH:MM:SS, None - время последней операции
+    :param days: Количество дней остатков на конец дня
+    :param opening_balances: Входящие остатки по номерам карт, None - нулевые
+    :return: JSON в формате
+        {
+            "date": "2021-12-31 23:59:59",
+            "cards": [
+                {
+                    "last_digits": "7197",
+                    "balance": 1000.0,
+                    "daily": [{"date": "2021-12-31", "balance": 1000.0}, ...]
+                },
+                ...
+            ]
+        }
+    """
+
+    logger.info(f"Вызов сервиса 'Остатки по картам' {get_card_balances.__name__}")
+
+    ledger = CardLedger(transactions, opening_balances)
+    entries = ledger.entries
+    if len(ledger.cards) == 0 or (date_time_str is None and entries.empty):
+        logger.warning("Данные в файле отсутствуют")
+        return json.dumps({"date": date_time_str, "cards": []}, ensure_ascii=False)
+
+    moment = pd.Timestamp(date_time_str) if date_time_str is not None else entries["date"].iloc[-1]
+    balances = ledger.balance_at(moment)
+    daily_df = ledger.daily_balances(moment.normalize() - pd.Timedelta(days=max(days, 1) - 1), moment)
+    daily_dates = pd.DatetimeIndex(daily_df.index).strftime("%Y-%m-%d")
+
+    cards = [
+        {
+            "last_digits": str(card)[-4:],
+            "balance": round(float(balance), 2),
+            "daily": [
+                {"date": day, "balance": round(float(day_balance), 2)}
+                for day, day_balance in zip(daily_dates, daily_df[card])
+            ],
+        }
+        for card, balance in balances.items()
+    ]
+
+    logger.info("Cервис возвращает результат")
+    return json.dumps(
+        {"date": moment.strftime("%Y-%m-%d %H:%M:%S"), "cards": cards}, indent=4, ensure_ascii=False
+    )
+
+
+def normalize_descriptions(descriptions: pd.Series) -> pd.Series:
+    """
+    Функция нормализует описания операций для группировки:
+    нижний регистр, без цифр и знаков препинания, одиночные пробелы.
+
+    :param descriptions: Ряд описаний операций
+    :return: Ряд нормализованных описаний
+    """
+
+    return (
+        descriptions.astype(object).fillna("")
+        .astype(str)
+        .str.lower()
+        .str.replace(r"[\d\W_]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def get_recurring_payments(
+    transactions: pd.DataFrame, min_count: int = 3, max_interval_cv: float = 0.25, max_amount_cv: float = 0.2
+) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Поиск регулярных платежей"   $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция возвращает JSON с регулярными платежами (подписки, связь, ЖКХ и т.п.).
+    Траты группируются по нормализованному описанию и MCC, для каждой группы векторно считаются
+    интервалы между платежами и разброс сумм. Платеж считается регулярным, если в группе не меньше min_count трат,
+    а коэффициенты вариации интервала и суммы не превышают заданных порогов.
+
+    :param transactions: Дата фрейм с транзакциями
+    :param min_count: Минимальное количество платежей
+    :param max_interval_cv: Максимальный коэффициент вариации интервала между платежами
+    :param max_amount_cv: Максимальный коэффициент вариации суммы платежа
+    :return recurring_payments: Список регулярных платежей в формате
+        {
+            "description": "Яндекс Плюс",
+            "mcc": 5815,
+            "count": 12,
+            "average_amount": 299.0,
+            "interval_days": 30,
+            "last_date": "31.12.2021",
+            "next_date": "30.01.2022"
+        }
+    """
+
+    logger.info(f"Вызов сервиса 'Поиск регулярных платежей' {get_recurring_payments.__name__}")
+
+    if len(transactions) == 0:
+        logger.warning("Данные в файле отсутствуют")
+        return json.dumps([])
+
+    spends = transactions.loc[
+        (transactions["Статус"] == "OK") & (transactions["Сумма операции"] < 0), ["Описание", "MCC", "Сумма операции"]
+    ].copy()
+    spends["Дата"] = get_operation_dates(transactions).loc[spends.index]
+    spends["Сумма"] = spends["Сумма операции"].abs()
+    spends["Группа"] = spends.groupby(
+        [normalize_descriptions(spends["Описание"]), spends["MCC"].fillna(-1)], sort=False
+    ).ngroup()
+
+    spends = spends.sort_values(["Группа", "Дата"], kind="stable")
+    spends["Интервал"] = spends.groupby("Группа")["Дата"].diff().dt.total_seconds() / 86400
+
+    groups = spends.groupby("Группа").agg(
+        description=("Описание", "last"),
+        mcc=("MCC", "first"),
+        count=("Сумма", "size"),
+        average_amount=("Сумма", "mean"),
+        amount_std=("Сумма", "std"),
+        interval_mean=("Интервал", "mean"),
+        interval_std=("Интервал", "std"),
+        last_date=("Дата", "max"),
+    )
+
+    recurring = groups[
+        (groups["count"] >= min_count)
+        & (groups["interval_mean"] >= 1)
+        & (groups["interval_std"].fillna(0) <= max_interval_cv * groups["interval_mean"])
+        & (groups["amount_std"].fillna(0) <= max_amount_cv * groups["average_amount"])
+    ].sort_values("average_amount", ascending=False)
+
+    next_dates = recurring["last_date"] + pd.to_timedelta(recurring["interval_mean"].round(), unit="D")
+
+    recurring_payments = [
+        {
+            "description": description,
+            "mcc": None if pd.isna(mcc) else int(mcc),
+            "count": int(count),
+            "average_amount": round(float(average_amount), 2),
+            "interval_days": int(round(interval_mean)),
+            "last_date": last_date.strftime("%d.%m.%Y"),
+            "next_date": next_date.strftime("%d.%m.%Y"),
+        }
+        for description, mcc, count, average_amount, interval_mean, last_date, next_date in zip(
+            recurring["description"],
+            recurring["mcc"],
+            recurring["count"],
+            recurring["average_amount"],
+            recurring["interval_mean"],
+            recurring["last_date"],
+            next_dates,
+        )
+    ]
+
+    logger.info("Cервис возвращает результат")
+    return json.dumps(recurring_payments, indent=4, ensure_ascii=False)
+
+
+def search_transactions(query: str, start: Optional[str] = None, stop: Optional[str] = None) -> str:
+    """
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+        $Сервис "Поиск операций"         $
+        $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+    Функция возвращает JSON с операциями, в описании или категории которых есть все слова запроса
+    (слова ищутся по префиксу), с фильтром по периоду.
+    Поиск выполняется по инвертированному индексу, который хранится рядом с файлом операций
+    и дополняется новыми операциями при следующем вызове.
+
+    :param query: Строка запроса, например "Яндекс Такси"
+    :param start: Начало периода в формате YYYY-MM-DD
+    :param stop: Конец периода в формате YYYY-MM-DD
+    :return transactions: Список найденных операций
+    """
+
+    logger.info(f"Вызов сервиса 'Поиск операций' {search_transactions.__name__}")
+
+    path_to_operations = get_operations_path()
+    transactions_df = get_transactions_df(path_to_operations)
+
+    index = get_search_index(transactions_df, get_index_path(path_to_operations))
+    found_df = transactions_df.iloc[index.search(query, start=start, stop=stop)]
+
+    logger.info(f"Cервис возвращает {len(found_df)} операций")
+    return json.dumps(found_df.to_dict("records"), indent=4, ensure_ascii=False, default=str)
@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+logger = logging.getLogger("settings")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "settings.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+path_to_data_dir = os.path.abspath(os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data"))
+
+# Настройки пользователя по умолчанию и папка настроек других пользователей
+path_to_user_settings = os.path.join(path_to_data_dir, "user_settings.json")
+path_to_users_dir = os.path.join(path_to_data_dir, "users")
+
+# Сколько файлов настроек пользователей держать в памяти
+SETTINGS_CACHE_SIZE = 1024
+
+USER_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+class SettingsError(ValueError):
+    """Файл настроек пользователя не соответствует ожидаемому формату"""
+
+
+def _get_symbols(data: dict[str, Any], key: str) -> tuple[str, ...]:
+    values = data.get(key, [])
+    if not isinstance(values, list) or not all(isinstance(value, str) and value.strip() for value in values):
+        raise SettingsError(f"{key} должен быть списком непустых строк")
+    return tuple(dict.fromkeys(value.strip() for value in values))
+
+
+@dataclass(frozen=True)
+class UserSettings:
+    """Проверенные настройки пользователя: коды валют и тикеры акций без повторов"""
+
+    user_currencies: tuple[str, ...] = field(default_factory=tuple)
+    user_stocks: tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "UserSettings":
+        """
+        Метод проверяет словарь настроек из JSON - файла.
+
+        :param data: Словарь в формате {"user_currencies": ["str"], "user_stocks": ["str"]},
+            отсутствующий ключ - пустой список
+        :return: Настройки пользователя
+        :raises SettingsError: Если данные не словарь или значения не списки строк
+        """
+
+        if not isinstance(data, dict):
+            raise SettingsError("Настройки должны быть JSON - объектом")
+        return cls(_get_symbols(data, "user_currencies"), _get_symbols(data, "user_stocks"))
+
+    @classmethod
+    def from_value(cls, value: Union["UserSettings", dict[Any, Any], None]) -> "UserSettings":
+        """Настройки из объекта, словаря или, если не переданы, настройки пользователя по умолчанию"""
+
+        if value is None:
+            return get_settings_cache().get(path_to_user_settings)
+        if isinstance(value, UserSettings):
+            return value
+        return cls.from_dict(value)
+
+    def to_dict(self) -> dict[str, list[str]]:
+        """Словарь настроек в формате JSON - файла"""
+        return {"user_currencies": list(self.user_currencies), "user_stocks": list(self.user_stocks)}
+
+
+class SettingsCache:
+    """
+    Кэш настроек пользователей в памяти.
+    Файл читается и проверяется один раз, повторные обращения сверяют только время изменения и размер файла
+    (os.stat) и перечитывают файл после его изменения. Хранятся настройки не более max_entries файлов,
+    давно не запрошенные вытесняются. Если измененный файл содержит ошибку, возвращаются последние
+    корректные настройки.
+    """
+
+    def __init__(self, max_entries: int = SETTINGS_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple[int, int], UserSettings]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, path: str) -> UserSettings:
+        with open(path, "r", encoding="utf-8") as settings_file:
+            return UserSettings.from_dict(json.load(settings_file))
+
+    def get(self, path: str) -> UserSettings:
+        """
+        Метод возвращает настройки из JSON - файла.
+
+        :param path: Путь к файлу настроек
+        :return: Настройки пользователя, при отсутствии файла - пустые настройки
+        """
+
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            logger.error(f"Файл настроек {path} отсутствует")
+            with self._lock:
+                self._entries.pop(path, None)
+            return UserSettings()
+
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        try:
+            settings = self._load(path)
+        except FileNotFoundError as ex:
+            logger.error(f"Файл по заданному пути отсутствует {ex}")
+            return UserSettings()
+        except (json.JSONDecodeError, SettingsError) as ex:
+            logger.error(f"Ошибка в файле настроек {path}: {ex}")
+            return entry[1] if entry is not None else UserSettings()
+
+        logger.info(f"Настройки загружены из файла {path}")
+        with self._lock:
+            self._entries[path] = (version, settings)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return settings
+
+    def clear(self) -> None:
+        """Метод очищает кэш"""
+        with self._lock:
+            self._entries.clear()
+
+
+def get_settings_path(user_id: Optional[str] = None) -> str:
+    """
+    Функция возвращает путь к файлу настроек пользователя.
+
+    :param user_id: Идентификатор пользователя, None - пользователь по умолчанию ("/data/user_settings.json")
+    :return: Путь к файлу "/data/users/<user_id>.json"
+    :raises SettingsError: Если идентификатор содержит недопустимые символы
+    """
+
+    if user_id is None:
+        return path_to_user_settings
+    if not USER_ID_PATTERN.match(user_id) or user_id.strip(".") == "":
+        raise SettingsError(f"Недопустимый идентификатор пользователя {user_id!r}")
+    return os.path.join(path_to_users_dir, f"{user_id}.json")
+
+
+settings_cache: Optional[SettingsCache] = None
+
+
+def get_settings_cache() -> SettingsCache:
+    """
+    Функция возвращает общий кэш настроек пользователей приложения.
+
+    :return: Кэш настроек
+    """
+
+    global settings_cache
+    if settings_cache is None:
+        settings_cache = SettingsCache()
+    return settings_cache
+
+
+def load_user_settings(user_id: Optional[str] = None) -> UserSettings:
+    """
+    Функция возвращает проверенные настройки пользователя из кэша.
+
+    :param user_id: Идентификатор пользователя, None - пользователь по умолчанию
+    :return: Настройки пользователя
+    """
+    return get_settings_cache().get(get_settings_path(user_id))
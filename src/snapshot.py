@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.loaders import get_statements_state
+from src.utils import get_transactions_df
+
+logger = logging.getLogger("snapshot")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "snapshot.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+SNAPSHOT_MANIFEST = "manifest.json"
+
+# Файл в папке снимка с именем текущей версии и префикс папок версий
+SNAPSHOT_POINTER = "CURRENT"
+SNAPSHOT_VERSION_PREFIX = "v-"
+
+# Сколько секунд ждать блокировку перестроения снимка; блокировка старше этого срока считается брошенной
+SNAPSHOT_LOCK_TIMEOUT = 600.0
+SNAPSHOT_LOCK_POLL = 0.05
+
+# Колонки с датами, которые в снимке хранятся как datetime64
+SNAPSHOT_DATE_COLUMNS = ("Дата операции",)
+
+
+def get_snapshot_path(path_to_operations: str) -> str:
+    """
+    Функция возвращает путь к папке снимка рядом с файлом операций.
+
+    :param path_to_operations: Путь к файлу операций, папке с выписками или шаблон glob
+    :return: Путь к папке снимка
+    """
+
+    return os.path.abspath(path_to_operations).rstrip("*?") + ".snapshot"
+
+
+@contextmanager
+def snapshot_lock(path_to_snapshot: str, timeout: float = SNAPSHOT_LOCK_TIMEOUT) -> Iterator[None]:
+    """
+    Межпроцессная блокировка перестроения снимка: файл "<путь к снимку>.lock", созданный с O_EXCL.
+    Блокировка старше SNAPSHOT_LOCK_TIMEOUT секунд (процесс завершился аварийно) удаляется.
+
+    :param path_to_snapshot: Путь к папке снимка
+    :param timeout: Время ожидания блокировки в секундах
+    :raises TimeoutError: Если блокировку не удалось получить за timeout секунд
+    """
+
+    path_to_lock = path_to_snapshot + ".lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            descriptor = os.open(path_to_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path_to_lock) > SNAPSHOT_LOCK_TIMEOUT:
+                    logger.warning(f"Брошенная блокировка {path_to_lock} удалена")
+                    os.remove(path_to_lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Не удалось получить блокировку {path_to_lock}")
+            time.sleep(SNAPSHOT_LOCK_POLL)
+
+    try:
+        os.write(descriptor, str(os.getpid()).encode())
+        os.close(descriptor)
+        yield
+    finally:
+        try:
+            os.remove(path_to_lock)
+        except FileNotFoundError:
+            pass
+
+
+def get_snapshot_version_path(path_to_snapshot: str) -> str:
+    """
+    Функция возвращает путь к папке текущей версии снимка (по файлу CURRENT).
+    Если файла CURRENT нет, путь уже указывает на папку с данными снимка (версию или снимок старого формата).
+
+    :param path_to_snapshot: Путь к папке снимка
+    :return: Путь к папке с manifest.json и файлами колонок
+    """
+
+    try:
+        with open(os.path.join(path_to_snapshot, SNAPSHOT_POINTER), encoding="utf-8") as pointer_file:
+            return os.path.join(path_to_snapshot, pointer_file.read().strip())
+    except FileNotFoundError:
+        return path_to_snapshot
+
+
+def _remove_old_versions(path_to_snapshot: str, keep: set[str]) -> None:
+    """
+    Удаление старых версий снимка, кроме keep. Недописанная версия (без manifest.json) другого процесса
+    удаляется, только если она старше SNAPSHOT_LOCK_TIMEOUT. Версии, открытые читателями, на POSIX остаются
+    доступны им до закрытия файлов, на Windows не удаляются.
+    """
+
+    for name in os.listdir(path_to_snapshot):
+        path_to_version = os.path.join(path_to_snapshot, name)
+        if not name.startswith(SNAPSHOT_VERSION_PREFIX) or name in keep or not os.path.isdir(path_to_version):
+            continue
+        is_complete = os.path.exists(os.path.join(path_to_version, SNAPSHOT_MANIFEST))
+        if is_complete or time.time() - os.path.getmtime(path_to_version) > SNAPSHOT_LOCK_TIMEOUT:
+            shutil.rmtree(path_to_version, ignore_errors=True)
+
+
+def write_snapshot(
+    transactions: pd.DataFrame, path_to_snapshot: str, sources: Sequence[tuple[str, float]] = ()
+) -> None:
+    """
+    Функция записывает операции в новую версию снимка: каждая колонка - отдельный файл .npy.
+    Даты хранятся как datetime64[ns], числа - как float64/int64, строки - как коды категорий,
+    сами категории записываются в manifest.json.
+    Версия пишется в свою папку (уникальную для каждого вызова), затем файл CURRENT атомарно (os.replace)
+    переключается на нее. Читатели видят либо старую, либо новую версию целиком, снимок не пропадает
+    во время записи. Предыдущая версия сохраняется для читателей, которые уже прочитали CURRENT,
+    более старые версии удаляются.
+
+    :param transactions: Дата фрейм операций
+    :param path_to_snapshot: Путь к папке снимка
+    :param sources: Состояние выписок (loaders.get_statements_state), по нему определяется устаревание снимка
+    """
+
+    logger.info(f"Вызов функции {write_snapshot.__name__}")
+
+    os.makedirs(path_to_snapshot, exist_ok=True)
+    path_to_version = tempfile.mkdtemp(prefix=SNAPSHOT_VERSION_PREFIX, dir=path_to_snapshot)
+
+    columns: dict[str, dict[str, Any]] = {}
+    for number, column in enumerate(transactions.columns):
+        values = transactions[column]
+        meta: dict[str, Any] = {"file": f"{number}.npy"}
+
+        array: np.ndarray
+        if column in SNAPSHOT_DATE_COLUMNS:
+            array = pd.to_datetime(values, dayfirst=True).to_numpy(dtype="datetime64[ns]")
+            meta["kind"] = "datetime"
+        elif pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            array = values.to_numpy()
+            meta["kind"] = "numeric"
+        else:
+            categorical = pd.Categorical(values.astype(object).where(values.notna(), None))
+            array = categorical.codes
+            meta["kind"] = "category"
+            meta["categories"] = [str(category) for category in categorical.categories]
+
+        np.save(os.path.join(path_to_version, meta["file"]), np.ascontiguousarray(array), allow_pickle=False)
+        columns[str(column)] = meta
+
+    manifest = {
+        "rows": len(transactions),
+        "sources": [[path, mtime] for path, mtime in sources],
+        "columns": columns,
+    }
+    with open(os.path.join(path_to_version, SNAPSHOT_MANIFEST), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=4)
+
+    previous_version = os.path.basename(get_snapshot_version_path(path_to_snapshot))
+    pointer_descriptor, path_to_pointer = tempfile.mkstemp(prefix=SNAPSHOT_POINTER, dir=path_to_snapshot)
+    with os.fdopen(pointer_descriptor, "w", encoding="utf-8") as pointer_file:
+        pointer_file.write(os.path.basename(path_to_version))
+    os.replace(path_to_pointer, os.path.join(path_to_snapshot, SNAPSHOT_POINTER))
+
+    _remove_old_versions(path_to_snapshot, {os.path.basename(path_to_version), previous_version})
+    logger.info(f"Снимок {path_to_version} записан, {len(transactions)} операций")
+
+
+def read_snapshot_manifest(path_to_snapshot: str) -> dict[str, Any]:
+    """Функция читает описание текущей версии снимка"""
+
+    path_to_version = get_snapshot_version_path(path_to_snapshot)
+    with open(os.path.join(path_to_version, SNAPSHOT_MANIFEST), encoding="utf-8") as manifest_file:
+        return dict(json.load(manifest_file))
+
+
+def open_snapshot(path_to_snapshot: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Функция открывает снимок только для чтения без копирования данных.
+    Файлы колонок отображаются в память (np.load с mmap_mode="r"), поэтому процессы, открывшие один снимок,
+    используют одну физическую копию данных из кэша страниц ОС, а открытие снимка не зависит от его размера.
+    Колонки дата фрейма доступны только для чтения: изменение значений на месте вызывает ValueError.
+
+    :param path_to_snapshot: Путь к папке снимка или к папке его версии (get_snapshot_version_path)
+    :param columns: Список загружаемых колонок, None - все колонки
+    :return: Дата фрейм операций
+    """
+
+    logger.info(f"Вызов функции {open_snapshot.__name__}")
+
+    # Все колонки читаются из одной версии, даже если во время чтения записывается новая
+    path_to_version = get_snapshot_version_path(path_to_snapshot)
+    manifest = read_snapshot_manifest(path_to_version)
+    data = {}
+    for column in columns or list(manifest["columns"]):
+        meta = manifest["columns"][column]
+        array = np.load(os.path.join(path_to_version, meta["file"]), mmap_mode="r", allow_pickle=False)
+        if meta["kind"] == "category":
+            data[column] = pd.Categorical.from_codes(
+                array, dtype=pd.CategoricalDtype(meta["categories"]), validate=False
+            )
+        else:
+            data[column] = array
+
+    return pd.DataFrame(data, copy=False)
+
+
+def get_snapshot(path_to_operations: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Функция возвращает операции из снимка рядом с файлом операций (<путь>.snapshot).
+    Снимок создается при первом обращении и перезаписывается, если набор выписок (пути и время изменения)
+    отличается от записанного в manifest.json: выписка изменена, добавлена или удалена.
+    Перестроение выполняется под межпроцессной блокировкой (snapshot_lock): процессы, одновременно
+    обнаружившие устаревший снимок, ждут первого, и снимок записывается один раз.
+
+    :param path_to_operations: Путь к файлу операций, папке с выписками или шаблон glob
+    :param columns: Список загружаемых колонок, None - все колонки
+    :return: Дата фрейм операций
+    """
+
+    logger.info(f"Вызов функции {get_snapshot.__name__}")
+
+    path_to_snapshot = get_snapshot_path(path_to_operations)
+    sources = get_statements_state(path_to_operations)
+
+    if _is_stale(path_to_snapshot, sources):
+        with snapshot_lock(path_to_snapshot):
+            # Пока процесс ждал блокировку, снимок мог перестроить другой процесс
+            if _is_stale(path_to_snapshot, sources):
+                write_snapshot(get_transactions_df(path_to_operations), path_to_snapshot, sources)
+
+    return open_snapshot(path_to_snapshot, columns)
+
+
+def _is_stale(path_to_snapshot: str, sources: Sequence[tuple[str, float]]) -> bool:
+    """Снимок отсутствует или записан по другому набору выписок"""
+
+    try:
+        recorded = read_snapshot_manifest(path_to_snapshot).get("sources")
+        return recorded != [[path, mtime] for path, mtime in sources]
+    except FileNotFoundError:
+        return True
@@ -0,0 +1,248 @@
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Optional
+
+import pandas as pd
+
+from src.query import TransactionQuery
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("storage")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "storage.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+STORAGE_BACKENDS = ("pandas", "sqlite")
+
+# Формат хранения даты операции в SQLite, строки в этом формате сравниваются как даты
+SQLITE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+INDEXED_COLUMNS = {
+    "idx_operations_date": "Дата операции",
+    "idx_operations_card": "Номер карты",
+    "idx_operations_category": "Категория",
+}
+
+
+class TransactionStorage(ABC):
+    """
+    Абстрактный базовый класс хранилища операций.
+    Задает общий интерфейс выборок и агрегаций по периоду, статусу, карте и категории.
+    Все границы периода включительные.
+    """
+
+    @abstractmethod
+    def get_transactions(
+        self,
+        start: Optional[datetime] = None,
+        stop: Optional[datetime] = None,
+        status: Optional[str] = "OK",
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Метод возвращает операции, отфильтрованные по периоду, статусу, карте и категории.
+
+        :return: Дата фрейм операций в исходном порядке, "Дата операции" - datetime
+        """
+
+    @abstractmethod
+    def get_spends_by_card(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Метод возвращает сумму и количество расходов (отрицательных сумм успешных операций) по картам.
+
+        :return: Дата фрейм с колонками "Номер карты", "total_spent", "count", отсортированный по номеру карты
+        """
+
+    @abstractmethod
+    def get_spends_by_category(
+        self, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Метод возвращает сумму и количество расходов по категориям.
+
+        :return: Дата фрейм с колонками "Категория", "total_spent", "count", отсортированный по категории
+        """
+
+    @abstractmethod
+    def get_sums_by_weekday(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Метод возвращает сумму и количество успешных операций по дням недели.
+
+        :return: Дата фрейм с колонками "weekday" (0 - понедельник), "total", "count", отсортированный по дню недели
+        """
+
+
+class PandasStorage(TransactionStorage):
+    """Хранилище операций в дата фрейме в памяти"""
+
+    def __init__(self, transactions: pd.DataFrame) -> None:
+        self.transactions = transactions.copy()
+        self.transactions["Дата операции"] = get_operation_dates(self.transactions)
+
+    def _query(
+        self,
+        start: Optional[datetime],
+        stop: Optional[datetime],
+        status: Optional[str] = "OK",
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> TransactionQuery:
+        return TransactionQuery(self.transactions).period(start, stop).status(status).card(card).category(category)
+
+    def get_transactions(
+        self,
+        start: Optional[datetime] = None,
+        stop: Optional[datetime] = None,
+        status: Optional[str] = "OK",
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> pd.DataFrame:
+        return self._query(start, stop, status, card, category).collect()
+
+    def _get_spends_by(self, column: str, start: Optional[datetime], stop: Optional[datetime]) -> pd.DataFrame:
+        return (
+            self._query(start, stop)
+            .spends()
+            .group_by(column)
+            .agg(total_spent=("Сумма операции", "sum"), count=("Сумма операции", "count"))
+            .collect()
+            .sort_values(column, ignore_index=True)
+        )
+
+    def get_spends_by_card(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        return self._get_spends_by("Номер карты", start, stop)
+
+    def get_spends_by_category(
+        self, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        return self._get_spends_by("Категория", start, stop)
+
+    def get_sums_by_weekday(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        operations = self._query(start, stop).select("Дата операции", "Сумма операции").collect()
+        return (
+            operations.groupby(operations["Дата операции"].dt.weekday.rename("weekday"))["Сумма операции"]
+            .agg(total="sum", count="count")
+            .reset_index()
+        )
+
+
+class SQLiteStorage(TransactionStorage):
+    """
+    Хранилище операций во встроенной базе SQLite.
+    Таблица operations индексируется по дате операции, номеру карты и категории,
+    фильтры и агрегации выполняются запросами SQL, в память загружается только результат.
+    """
+
+    def __init__(self, path_to_db: str = ":memory:") -> None:
+        self.path_to_db = path_to_db
+        self.connection = sqlite3.connect(path_to_db, check_same_thread=False)
+
+    def close(self) -> None:
+        """Метод закрывает соединение с базой"""
+        self.connection.close()
+
+    def load(self, transactions: pd.DataFrame, replace: bool = True, chunksize: int = 10000) -> None:
+        """
+        Метод записывает операции в таблицу operations и создает индексы.
+
+        :param transactions: Дата фрейм операций
+        :param replace: Заменить существующие данные, иначе дописать
+        :param chunksize: Размер пакета записи
+        """
+
+        logger.info(f"Вызов метода {self.load.__name__}")
+
+        operations = transactions.copy()
+        operations["Дата операции"] = get_operation_dates(operations).dt.strftime(SQLITE_DATE_FORMAT)
+        operations.to_sql(
+            "operations",
+            self.connection,
+            if_exists="replace" if replace else "append",
+            index=False,
+            chunksize=chunksize,
+        )
+
+        for index_name, column in INDEXED_COLUMNS.items():
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON operations ("{column}")')
+        self.connection.commit()
+
+        logger.info(f"В базу записано {len(operations)} операций")
+
+    @staticmethod
+    def _where(
+        start: Optional[datetime],
+        stop: Optional[datetime],
+        status: Optional[str] = "OK",
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> tuple[str, list[Any]]:
+        conditions = ["1 = 1"]
+        params: list[Any] = []
+        if start is not None:
+            conditions.append('"Дата операции" >= ?')
+            params.append(start.strftime(SQLITE_DATE_FORMAT))
+        if stop is not None:
+            conditions.append('"Дата операции" <= ?')
+            params.append(stop.strftime(SQLITE_DATE_FORMAT))
+        if status is not None:
+            conditions.append('"Статус" = ?')
+            params.append(status)
+        if card is not None:
+            conditions.append('"Номер карты" = ?')
+            params.append(card)
+        if category is not None:
+            conditions.append('"Категория" = ?')
+            params.append(category)
+        return " AND ".join(conditions), params
+
+    def get_transactions(
+        self,
+        start: Optional[datetime] = None,
+        stop: Optional[datetime] = None,
+        status: Optional[str] = "OK",
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> pd.DataFrame:
+        where, params = self._where(start, stop, status, card, category)
+        transactions = pd.read_sql_query(
+            f"SELECT * FROM operations WHERE {where} ORDER BY rowid", self.connection, params=params
+        )
+        transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format=SQLITE_DATE_FORMAT)
+        return transactions
+
+    def _get_spends_by(self, column: str, start: Optional[datetime], stop: Optional[datetime]) -> pd.DataFrame:
+        where, params = self._where(start, stop)
+        return pd.read_sql_query(
+            f'SELECT "{column}", SUM("Сумма операции") AS total_spent, COUNT("Сумма операции") AS count '
+            f'FROM operations WHERE {where} AND "Сумма операции" < 0 AND "{column}" IS NOT NULL '
+            f'GROUP BY "{column}" ORDER BY "{column}"',
+            self.connection,
+            params=params,
+        )
+
+    def get_spends_by_card(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        return self._get_spends_by("Номер карты", start, stop)
+
+    def get_spends_by_category(
+        self, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        return self._get_spends_by("Категория", start, stop)
+
+    def get_sums_by_weekday(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> pd.DataFrame:
+        where, params = self._where(start, stop)
+        # strftime('%w') возвращает 0 для воскресенья, приводим к нумерации pandas (0 - понедельник)
+        return pd.read_sql_query(
+            "SELECT (CAST(strftime('%w', \"Дата операции\") AS INTEGER) + 6) % 7 AS weekday, "
+            f'SUM("Сумма операции") AS total, COUNT("Сумма операции") AS count FROM operations WHERE {where} '
+            "GROUP BY weekday ORDER BY weekday",
+            self.connection,
+            params=params,
+        )
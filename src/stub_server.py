@@ -0,0 +1,214 @@
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("stub_server")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "stub_server.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Папка с записанными ответами сервисов
+path_to_responses_dir = os.path.abspath(
+    os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "stub_responses")
+)
+
+# Ответ Alpha Vantage при превышении лимита запросов (приходит со статусом 200)
+ALPHA_VANTAGE_RATE_LIMIT_RESPONSE = {
+    "Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute "
+    "and 500 calls per day. Please visit https://www.alphavantage.co/premium/ if you would like "
+    "to target a higher API call frequency."
+}
+
+
+def load_recorded_responses(path: Optional[str] = None) -> dict[str, Any]:
+    """
+    Функция загружает записанные ответы ЦБ РФ и Alpha Vantage из папки "/data/stub_responses".
+
+    :param path: Путь к папке с ответами
+    :return: Словарь {"cbr_daily": ответ daily_json.js, "global_quote": {тикер: ответ GLOBAL_QUOTE}}
+    """
+
+    path = path or path_to_responses_dir
+    with open(os.path.join(path, "cbr_daily_json.json"), encoding="utf-8") as cbr_file:
+        cbr_daily = json.load(cbr_file)
+    with open(os.path.join(path, "alphavantage_global_quote.json"), encoding="utf-8") as quotes_file:
+        global_quote = json.load(quotes_file)
+
+    return {"cbr_daily": cbr_daily, "global_quote": global_quote}
+
+
+class StubServer:
+    """
+    Локальный сервер-заглушка ЦБ РФ (/daily_json.js, /archive/.../daily_json.js) и Alpha Vantage (/query).
+    Отдает записанные ответы и позволяет внедрять задержку, ошибки и ответы о превышении лимита:
+
+    - latency - задержка каждого ответа в секундах;
+    - error_rate - доля ответов с ошибкой 500;
+    - rate_limit - количество запросов в окне rate_limit_window секунд, сверх которого
+      Alpha Vantage отвечает сообщением "Note", а ЦБ РФ - статусом 429.
+
+    Используется как контекстный менеджер, адрес сервера - атрибут url.
+    Для перенаправления запросов приложения задайте CBR_BASE_URL и ALPHA_VANTAGE_BASE_URL равными url.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[int] = None,
+        rate_limit_window: float = 60.0,
+        seed: Optional[int] = None,
+        responses: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.responses = responses or load_recorded_responses()
+        self.requests_count = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._request_times: deque = deque()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера"""
+        return f"http://{self._server.server_address[0]!s}:{self._server.server_port}"
+
+    def start(self) -> "StubServer":
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Сервер-заглушка запущен {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """Остановка сервера"""
+        self._server.shutdown()
+        self._server.server_close()
+        logger.info("Сервер-заглушка остановлен")
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def _is_rate_limited(self) -> bool:
+        with self._lock:
+            self.requests_count += 1
+            if self.rate_limit is None:
+                return False
+
+            now = time.monotonic()
+            while self._request_times and now - self._request_times[0] >= self.rate_limit_window:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.rate_limit:
+                return True
+            self._request_times.append(now)
+            return False
+
+    def _is_error(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def handle(self, path: str) -> tuple[int, Any]:
+        """
+        Метод формирует ответ на запрос.
+
+        :param path: Путь запроса с параметрами
+        :return: Статус и тело ответа
+        """
+
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        is_alpha_vantage = parsed.path == "/query"
+        is_cbr = parsed.path.endswith("daily_json.js")
+
+        if not (is_alpha_vantage or is_cbr):
+            return 404, {"error": "Not Found"}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self._is_rate_limited():
+            if is_alpha_vantage:
+                return 200, ALPHA_VANTAGE_RATE_LIMIT_RESPONSE
+            return 429, {"error": "Too Many Requests"}
+
+        if self._is_error():
+            return 500, {"error": "Internal Server Error"}
+
+        if is_cbr:
+            return 200, self.responses["cbr_daily"]
+
+        function = query.get("function", [""])[0]
+        if function != "GLOBAL_QUOTE":
+            return 200, {"Error Message": f"Invalid API call. Unknown function {function}"}
+
+        symbol = query.get("symbol", [""])[0]
+        return 200, self.responses["global_quote"].get(symbol, {"Global Quote": {}})
+
+    def _make_handler(self) -> type:
+        stub_server = self
+
+        class StubRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                status, body = stub_server.handle(self.path)
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format % args)
+
+        return StubRequestHandler
+
+
+def main() -> None:
+    """Запуск сервера-заглушки из командной строки: python -m src.stub_server --port 8000 --latency 0.2"""
+
+    parser = argparse.ArgumentParser(description="Сервер-заглушка ЦБ РФ и Alpha Vantage")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, секунд")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой 500")
+    parser.add_argument("--rate-limit", type=int, default=None, help="запросов в окне, далее ответ о лимите")
+    parser.add_argument("--rate-limit-window", type=float, default=60.0, help="окно лимита, секунд")
+    args = parser.parse_args()
+
+    with StubServer(
+        args.host, args.port, args.latency, args.error_rate, args.rate_limit, args.rate_limit_window
+    ) as stub_server:
+        print(f"Сервер-заглушка запущен: {stub_server.url}")
+        print(f"CBR_BASE_URL={stub_server.url} ALPHA_VANTAGE_BASE_URL={stub_server.url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
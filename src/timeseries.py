@@ -0,0 +1,195 @@
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+
+from src.schema import get_operation_dates
+
+logger = logging.getLogger("timeseries")
+logger.setLevel(logging.DEBUG)
+
+path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "logs", "timeseries.log")
+file_handler = logging.FileHandler(path_to_file, mode="w", encoding="'utf-8")
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+# Правила ресемплирования и соответствующие им периоды (метка интервала - начало периода)
+RESAMPLE_RULES = {"D": "D", "W": "W-MON", "M": "MS"}
+PERIOD_FREQUENCIES = {"D": "D", "W": "W-SUN", "M": "M"}
+
+
+def get_daily_spends(transactions: pd.DataFrame) -> pd.Series:
+    """
+    Функция для получения ряда дневных трат из дата фрейма транзакций.
+    Учитываются только успешные операции (Статус == "OK") с отрицательной суммой (расходы).
+
+    :param transactions: Дата фрейм с транзакциями
+    :return daily_spends: Ряд сумм трат по дням с непрерывным дневным индексом
+    """
+
+    if len(transactions) == 0:
+        return pd.Series(dtype=float)
+
+    operation_dates = get_operation_dates(transactions)
+    spends_mask = (transactions["Статус"] == "OK") & (transactions["Сумма операции"] < 0)
+
+    spends = pd.Series(
+        transactions.loc[spends_mask, "Сумма операции"].abs().to_numpy(dtype=float),
+        index=pd.DatetimeIndex(operation_dates[spends_mask].to_numpy()),
+    )
+    if spends.empty:
+        return pd.Series(dtype=float)
+
+    return spends.resample("D").sum()
+
+
+def _resample_spends(daily_spends: pd.Series, freq: str) -> pd.Series:
+    """Ресемплирование дневных трат с меткой интервала по началу периода"""
+    return daily_spends.resample(RESAMPLE_RULES[freq], closed="left", label="left").sum()
+
+
+class SpendingTimeSeries:
+    """
+    Класс временного ряда трат.
+    Хранит дневные траты на непрерывном дневном индексе, строит по ним ряды по дням, неделям и месяцам
+    со скользящим средним и накопленной суммой.
+
+    Результаты кэшируются, при добавлении новых транзакций методом update пересчитываются
+    только периоды, начиная с первого затронутого дня.
+    """
+
+    def __init__(self, transactions: Optional[pd.DataFrame] = None) -> None:
+        self._daily = pd.Series(dtype=float)
+        # Кэш ресемплированных рядов по частоте и кэш итоговых рядов по (частота, окно)
+        self._resampled: dict[str, pd.Series] = {}
+        self._series: dict[tuple[str, int], pd.DataFrame] = {}
+        # Первый измененный день для каждого закэшированного ряда
+        self._dirty_from: dict[object, pd.Timestamp] = {}
+
+        if transactions is not None:
+            self.update(transactions)
+
+    @property
+    def daily(self) -> pd.Series:
+        """Ряд дневных трат"""
+        return self._daily.copy()
+
+    def update(self, transactions: pd.DataFrame) -> None:
+        """
+        Метод добавляет транзакции в ряд.
+        Дни, которые уже есть в ряду, суммируются, новые дни дописываются в конец.
+
+        :param transactions: Дата фрейм с новыми транзакциями
+        """
+
+        logger.info(f"Вызов метода {self.update.__name__}")
+
+        new_daily = get_daily_spends(transactions)
+        if new_daily.empty:
+            logger.warning("Новые траты отсутствуют")
+            return
+
+        first_day = new_daily.index.min()
+
+        if self._daily.empty:
+            self._daily = new_daily
+        else:
+            full_index = pd.date_range(
+                min(self._daily.index[0], first_day), max(self._daily.index[-1], new_daily.index[-1]), freq="D"
+            )
+            if first_day > self._daily.index[-1]:
+                self._daily = pd.concat([self._daily, new_daily]).reindex(full_index, fill_value=0.0)
+            else:
+                self._daily = self._daily.reindex(full_index, fill_value=0.0).add(
+                    new_daily.reindex(full_index, fill_value=0.0)
+                )
+
+        # Отмечаем закэшированные ряды, требующие пересчета
+        for key in list(self._resampled) + list(self._series):
+            self._dirty_from[key] = min(self._dirty_from.get(key, first_day), first_day)
+
+        logger.info(f"Ряд обновлен начиная с {first_day.date()}")
+
+    def resample(self, freq: str = "D") -> pd.Series:
+        """
+        Метод возвращает ряд трат, ресемплированный с заданной частотой.
+
+        :param freq: Частота ряда: "D" - дни, "W" - недели (с понедельника), "M" - месяцы
+        :return resampled: Ряд трат по периодам, индекс - начало периода
+        """
+
+        if freq not in RESAMPLE_RULES:
+            raise ValueError(f"Неизвестная частота ряда {freq}")
+
+        if self._daily.empty:
+            return pd.Series(dtype=float)
+
+        cached = self._resampled.get(freq)
+        dirty_from = self._dirty_from.pop(freq, None)
+
+        if cached is None or (dirty_from is not None and dirty_from < cached.index[0]):
+            resampled = _resample_spends(self._daily, freq)
+        elif dirty_from is None:
+            resampled = cached
+        else:
+            period_start = dirty_from.to_period(PERIOD_FREQUENCIES[freq]).start_time
+            tail = _resample_spends(self._daily[self._daily.index >= period_start], freq)
+            resampled = pd.concat([cached[cached.index < period_start], tail])
+
+        self._resampled[freq] = resampled
+        return resampled.copy()
+
+    def series(self, freq: str = "D", window: int = 7) -> pd.DataFrame:
+        """
+        Метод возвращает ряд трат с заданной частотой, скользящим средним и накопленной суммой.
+
+        :param freq: Частота ряда: "D" - дни, "W" - недели (с понедельника), "M" - месяцы
+        :param window: Размер окна скользящего среднего в периодах
+        :return series_df: Дата фрейм с индексом по началу периода и колонками
+            "spend", "rolling_mean", "cumulative"
+        """
+
+        logger.info(f"Вызов метода {self.series.__name__}")
+
+        if window < 1:
+            raise ValueError("Размер окна должен быть положительным")
+
+        key = (freq, window)
+        cached = self._series.get(key)
+        dirty_from = self._dirty_from.pop(key, None)
+        resampled = self.resample(freq)
+
+        if resampled.empty:
+            return pd.DataFrame(columns=["spend", "rolling_mean", "cumulative"], dtype=float)
+
+        if cached is not None and dirty_from is None:
+            return cached.copy()
+
+        if cached is None or dirty_from is None or dirty_from < cached.index[0]:
+            series_df = pd.DataFrame(
+                {
+                    "spend": resampled,
+                    "rolling_mean": resampled.rolling(window, min_periods=1).mean(),
+                    "cumulative": resampled.cumsum(),
+                }
+            )
+        else:
+            # Пересчитываем только хвост ряда, захватывая window - 1 предыдущих периодов для окна
+            position = int(resampled.index.searchsorted(dirty_from.to_period(PERIOD_FREQUENCIES[freq]).start_time))
+            head = cached.iloc[:position]
+            window_values = resampled.iloc[max(position - window + 1, 0):]
+            tail = resampled.iloc[position:]
+            series_tail = pd.DataFrame(
+                {
+                    "spend": tail,
+                    "rolling_mean": window_values.rolling(window, min_periods=1).mean().iloc[-len(tail):],
+                    "cumulative": tail.cumsum() + (head["cumulative"].iloc[-1] if len(head) else 0.0),
+                }
+            )
+            series_df = pd.concat([head, series_tail])
+
+        self._series[key] = series_df
+        logger.info(f"Метод возвращает ряд из {len(series_df)} периодов")
+        return series_df.copy()
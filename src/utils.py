@@ -1,13 +1,24 @@
-import json
+import heapq
 import logging
 import os
 from datetime import datetime
-from typing import Any
+from operator import itemgetter
+from typing import Any, Optional, Sequence, Union
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
+from src.fx import CBR_TIMEOUT, FxRateStore, convert_transactions_to_rub, get_cbr_base_url
+from src.loaders import (SOURCE_COLUMN, filter_by_source, get_statements_state,
+                         get_transactions_df_from_sources, is_statements_source)
+from src.parsers import read_operations_file
+from src.query import TransactionQuery
+from src.quotes import get_quote_scheduler
+from src.schema import SchemaError, format_transactions, normalize_transactions
+from src.settings import UserSettings, load_user_settings
+from src.storage import STORAGE_BACKENDS, PandasStorage, SQLiteStorage, TransactionStorage
+
 load_dotenv()
 
 logger = logging.getLogger("utils")
@@ -20,10 +31,28 @@ file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
 
-def get_user_settings() -> Any:
+def get_operations_path() -> str:
+    """
+    Функция возвращает путь к данным операций пользователя.
+    Путь задается переменной окружения OPERATIONS_PATH (файл, папка с выписками или шаблон glob),
+    по умолчанию используется файл "/data/operations.xlsx".
+
+    :return: Путь к данным операций
+    """
+
+    default_path = os.path.abspath(
+        os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "operations.xlsx")
+    )
+    return os.getenv("OPERATIONS_PATH") or default_path
+
+
+def get_user_settings(user_id: Optional[str] = None) -> dict[str, list[str]]:
     """
     Функция для получения данных настроек пользователя из JSON - файла. "/data/user_settings.json"
+    Файл читается один раз и перечитывается только после изменения (см. модуль settings).
 
+    :param user_id: Идентификатор пользователя для файла "/data/users/<user_id>.json",
+        None - пользователь по умолчанию
     :return user_settings: словарь в формате
         {
           "user_currencies": ["str", "str"],
@@ -33,51 +62,143 @@ def get_user_settings() -> Any:
 
     logger.info(f"Вызов функции {get_user_settings.__name__}")
 
-    path_to_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "user_settings.json")
-    try:
-        with open(path_to_file, "r") as jf:
-            user_settings = json.load(jf)
-    except FileNotFoundError as ex:
-        logger.error(f"Файл по заданному пути отсутствует {ex}")
-        return {"user_currencies": [], "user_stocks": []}
+    user_settings = load_user_settings(user_id).to_dict()
 
     logger.info(f"Функция {get_user_settings.__name__} возвращает данные из файла")
 
     return user_settings
 
 
-def get_transactions_list(path_to_file: str) -> list:
+def get_transactions_list(path_to_file: str, sources: Optional[list[str]] = None) -> list:
     """
     Функция для получения списка данных операций пользователя из EXCEL - файла.
+    Если передан путь к папке или шаблон glob, операции загружаются из всех файлов выписок.
+    Даты операций возвращаются строками в формате выгрузки, пропуски - None.
 
-    :param path_to_file: Абсолютный путь к файлу
+    :param path_to_file: Абсолютный путь к файлу, папке с выписками или шаблон glob
+    :param sources: Список меток источников (имена файлов без расширения), None - все источники
     :return: список транзакций
     """
 
     logger.info(f"Вызов функции {get_transactions_list.__name__}")
-    return pd.read_excel(path_to_file).to_dict(orient="records")
 
+    transactions_df = get_transactions_df(path_to_file, sources)
+    if len(transactions_df.columns) == 0:
+        return []
+    return format_transactions(transactions_df)
 
-def get_transactions_df(path_to_file: str) -> pd.DataFrame:
-    """
-    Функция для получения дата фрейма данных операций пользователя из EXCEL - файла.
 
-    :param path_to_file: Абсолютный путь к файлу
+def get_transactions_df(
+    path_to_file: str, sources: Optional[list[str]] = None, columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Функция для получения дата фрейма данных операций пользователя из файла выписки
+    (EXCEL, CSV, OFX или QIF - формат определяется по содержимому файла, модуль parsers).
+    Если передан путь к папке или шаблон glob, операции загружаются из всех файлов выписок.
+    Данные проверяются и нормализуются один раз при загрузке (модуль schema): "Дата операции" - datetime,
+    суммы - float, статус, карта, валюты и категория - category, строки с ошибками записываются в лог.
+    Если передан список колонок, загружаются и нормализуются только они: вызывающая функция передает
+    колонки, которые ей нужны, и не тратит время и память на остальные.
+
+    :param path_to_file: Абсолютный путь к файлу, папке с выписками или шаблон glob
+    :param sources: Список меток источников (имена файлов без расширения), None - все источники
+    :param columns: Загружаемые колонки схемы, None - все колонки
     :return: список транзакций
+    :raises SchemaError: Если в данных нет колонок выгрузки
     """
 
     logger.info(f"Вызов функции {get_transactions_df.__name__}")
-    return pd.read_excel(path_to_file)
 
+    if is_statements_source(path_to_file):
+        transactions_df = get_transactions_df_from_sources(path_to_file, sources, columns=columns)
+    else:
+        read_columns = None if columns is None else [*columns, SOURCE_COLUMN]
+        transactions_df = filter_by_source(read_operations_file(path_to_file, read_columns), sources)
+
+    # Нет ни одного файла выписки
+    if len(transactions_df.columns) == 0:
+        return transactions_df
+
+    normalized_df, bad_rows = normalize_transactions(transactions_df, columns)
+    if len(bad_rows) > 0:
+        logger.warning(f"Ошибки в данных операций:\n{bad_rows.to_string(index=False)}")
+    return normalized_df
+
+
+# Открытые хранилища операций по пути к данным и состояние выписок (пути и время изменения) при открытии
+storages: dict[str, tuple[tuple[tuple[str, float], ...], TransactionStorage]] = {}
+
+
+def get_storage_backend() -> str:
+    """
+    Функция возвращает тип хранилища операций из переменной окружения STORAGE_BACKEND:
+    "pandas" (по умолчанию) - дата фрейм в памяти, "sqlite" - база SQLite рядом с файлом операций.
+
+    :return: Тип хранилища
+    """
+
+    backend = os.getenv("STORAGE_BACKEND") or "pandas"
+    if backend not in STORAGE_BACKENDS:
+        logger.error(f"Неизвестный тип хранилища {backend}, используется pandas")
+        return "pandas"
+    return backend
+
+
+def get_storage(path_to_file: str, backend: Optional[str] = None) -> TransactionStorage:
+    """
+    Функция возвращает хранилище операций для файла (папки, шаблона glob) с выписками.
+    База SQLite создается рядом с данными (<путь>.sqlite) и перестраивается, если выписки изменились.
+    Открытое хранилище кэшируется вместе со временем изменения выписок и перестраивается,
+    когда выписки меняются после открытия.
+
+    :param path_to_file: Абсолютный путь к файлу, папке с выписками или шаблон glob
+    :param backend: Тип хранилища, None - из переменной окружения STORAGE_BACKEND
+    :return storage: Хранилище операций
+    """
+
+    logger.info(f"Вызов функции {get_storage.__name__}")
+
+    backend = backend or get_storage_backend()
+    key = f"{backend}:{os.path.abspath(path_to_file)}"
+    # Состояние выписок проверяется при каждом вызове: долгоживущий процесс видит изменения файлов
+    statements_state = get_statements_state(path_to_file)
+    cached_state, cached_storage = storages.get(key, ((), None))
+    if cached_storage is not None and cached_state == statements_state:
+        return cached_storage
+    if cached_storage is not None:
+        logger.info(f"Выписки {path_to_file} изменились, хранилище {backend} перестраивается")
+
+    if backend == "pandas":
+        storage: TransactionStorage = PandasStorage(get_transactions_df(path_to_file))
+    else:
+        path_to_db = os.path.abspath(path_to_file).rstrip("*?") + ".sqlite"
+        source_mtime = max((mtime for _, mtime in statements_state), default=0.0)
+        rebuild = (
+            cached_storage is not None
+            or not os.path.exists(path_to_db)
+            or os.path.getmtime(path_to_db) < source_mtime
+        )
 
-def get_transactions_list_for_period(date_time_str: str, path_to_file: str) -> list[dict]:
+        # Открытое соединение с базой переиспользуется, база перезаполняется
+        storage = cached_storage if isinstance(cached_storage, SQLiteStorage) else SQLiteStorage(path_to_db)
+        if rebuild:
+            storage.load(get_transactions_df(path_to_file))
+
+    storages[key] = (statements_state, storage)
+    return storage
+
+
+def get_transactions_list_for_period(
+    date_time_str: str, path_to_file: str, sources: Optional[list[str]] = None
+) -> list[dict]:
     """
     Функция для получения списка данных за определенный период операций пользователя из EXCEL - файла.
     Принимает на вход дату и путь к файлу.
     Возвращает список с выборкой по периоду с начала месяца до заданной даты
 
     :param date_time_str: Строка с датой и временем в формате YYYY-MM-DD HH:MM:SS
-    :param path_to_file: Абсолютный путь к файлу
+    :param path_to_file: Абсолютный путь к файлу, папке с выписками или шаблон glob
+    :param sources: Список меток источников (имена файлов без расширения), None - все источники
     :return transactions_df.to_dict: список транзакций за указанный период
     """
 
@@ -86,29 +207,38 @@ def get_transactions_list_for_period(date_time_str: str, path_to_file: str) -> l
     stop_dt = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M:%S")
     start_dt = datetime(stop_dt.year, stop_dt.month, 1, 0, 0, 0)
 
+    # Для базы SQLite фильтрация выполняется запросом к базе
+    if get_storage_backend() == "sqlite" and sources is None:
+        try:
+            transactions_df = get_storage(path_to_file, "sqlite").get_transactions(start_dt, stop_dt)
+            return format_transactions(transactions_df, date_format=None)
+        except FileNotFoundError as ex:
+            logger.error(f"Файл по заданному пути отсутствует {ex}")
+            return []
+
     try:
-        operations_data = pd.read_excel(path_to_file)
+        operations_data = get_transactions_df(path_to_file, sources)
         if len(operations_data) == 0:
 
-            logger.warning("Данные в файле не соответствуют ожидаемому формату")
+            logger.warning("Данные в файле отсутствуют")
             return []
 
-        # Фильтрация по заданному периоду
-        operations_data["Дата операции"] = pd.to_datetime(operations_data["Дата операции"], dayfirst=True)
-        transactions_df = operations_data.loc[
-            (operations_data["Дата операции"] >= start_dt)
-            & (operations_data["Дата операции"] <= stop_dt)
-            & (operations_data["Статус"] == "OK")
-        ]
+        # Фильтрация по заданному периоду, даты разобраны при загрузке
+        transactions_df = TransactionQuery(operations_data).period(start_dt, stop_dt).status("OK").collect()
 
         logger.info("Функция возвращает данные из файла")
-        return transactions_df.to_dict("records")
+        return format_transactions(transactions_df, date_format=None)
 
     except FileNotFoundError as ex:
 
         logger.error(f"Файл по заданному пути отсутствует {ex}")
         return []
 
+    except SchemaError as ex:
+
+        logger.error(f"Данные в файле не соответствуют ожидаемому формату {ex}")
+        return []
+
 
 def get_greeting_massage() -> str:
     """
@@ -132,12 +262,14 @@ def get_greeting_massage() -> str:
     return greeting_massage
 
 
-def get_cards_spends_list(transactions_list: list[dict]) -> list[dict]:
+def get_cards_spends_list(transactions_list: list[dict], fx_rates: Optional[FxRateStore] = None) -> list[dict]:
     """
     Функция для получения списка трат по каждой карте списка операций.
     Функция принимает дата фрейм, по множеству номеров карт из данных вычисляется сумма расходов и кэшбэк.
+    Если передана таблица курсов, суммы в валюте пересчитываются в рубли по курсу на дату операции.
 
     :param transactions_list: Данные в формате дата фрейма
+    :param fx_rates: Таблица исторических курсов валют
     :return cards_spend_list: Список словарей в формате
         {
             "last_digits": card_number,
@@ -153,43 +285,44 @@ def get_cards_spends_list(transactions_list: list[dict]) -> list[dict]:
         return []
 
     transactions_df = pd.DataFrame(transactions_list)
-    # Получаем номера карт
-    cards_numbers = set(transactions_df["Номер карты"])
+    if fx_rates is not None:
+        transactions_df = convert_transactions_to_rub(transactions_df, fx_rates)
+    # Суммы расходов (отрицательные значения суммы операции) по каждой карте
+    spends = (
+        TransactionQuery(transactions_df)
+        .spends()
+        .group_by("Номер карты")
+        .agg(total_spent=("Сумма операции", "sum"))
+        .collect()
+        .set_index("Номер карты")["total_spent"]
+    )
+    cards_numbers = sorted(card for card in set(transactions_df["Номер карты"]) if isinstance(card, str))
 
     # Создаем список словарей
     cards_spend_list = []
 
-    for cadr in cards_numbers:
-
-        if isinstance(cadr, str):
-            card_number = cadr[-4:]
-
-            # Фильтруем дата фрейм по номеру карты и сумме операции (отрицательное значение - это расходы)
-            card_review = transactions_df[
-                (transactions_df["Номер карты"] == cadr) & (transactions_df["Сумма операции"] < 0)
-            ]
-
-            total_card_spend = round(float(card_review["Сумма операции"].sum()), 2)
-            card_cashback = abs(round(total_card_spend / 100, 2))
-
-            cards_spend_list.append(
-                {
-                    "last_digits": card_number,
-                    "total_spent": total_card_spend,
-                    "cashback": card_cashback,
-                }
-            )
+    for card, total_spent in spends.reindex(cards_numbers, fill_value=0.0).items():
+        total_card_spend = round(float(total_spent), 2)
+        cards_spend_list.append(
+            {
+                "last_digits": str(card)[-4:],
+                "total_spent": total_card_spend,
+                "cashback": abs(round(total_card_spend / 100, 2)),
+            }
+        )
 
     logger.info("Функция возвращает отсортированные данные из файла")
     return cards_spend_list
 
 
-def get_top_transaction_list(transactions_list: list[dict]) -> list[dict]:
+def get_top_transaction_list(transactions_list: list[dict], fx_rates: Optional[FxRateStore] = None) -> list[dict]:
     """
     Функция для получения списка ТОП 5 транзакций по данным списка операций.
     Функция принимает дата фрейм, сортирует список транзакций, выводит первые 5 элементов списка.
+    Если передана таблица курсов, суммы в валюте пересчитываются в рубли по курсу на дату операции.
 
     :param transactions_list: Данные в формате дата фрейма
+    :param fx_rates: Таблица исторических курсов валют
     :return cards_spend_list: Список словарей в формате
            {
                "date": operation["Дата платежа"],
@@ -201,11 +334,11 @@ def get_top_transaction_list(transactions_list: list[dict]) -> list[dict]:
 
     logger.info(f"Вызов функции {get_top_transaction_list.__name__}")
 
-    top_operations_list = sorted(
-        transactions_list,
-        key=lambda x: int(x["Сумма операции с округлением"]),
-        reverse=True,
-    )[0:5]
+    if fx_rates is not None and len(transactions_list) > 0:
+        transactions_list = convert_transactions_to_rub(pd.DataFrame(transactions_list), fx_rates).to_dict("records")
+
+    # Суммы приведены к float при загрузке, отбираем 5 крупнейших без полной сортировки
+    top_operations_list = heapq.nlargest(5, transactions_list, key=itemgetter("Сумма операции с округлением"))
 
     response_top_transactions_list = []
 
@@ -223,13 +356,13 @@ def get_top_transaction_list(transactions_list: list[dict]) -> list[dict]:
     return response_top_transactions_list
 
 
-def get_currency_rates(user_settings: dict[Any, Any]) -> list:
+def get_currency_rates(user_settings: Union[UserSettings, dict[Any, Any], None] = None) -> list:
     """
     Функция для получения данных курсов валют.
     Принимает данные настроек пользователя и возвращает список курсов валют.
     Данные получает из сайта https://www.cbr-xml-daily.ru
 
-    :param user_settings: Словарь с настройками пользователя
+    :param user_settings: Настройки пользователя (объект или словарь), None - настройки из кэша
     :return request_list: Список словарей в формате
         {
             "currency": currency,
@@ -240,10 +373,14 @@ def get_currency_rates(user_settings: dict[Any, Any]) -> list:
     logger.info(f"Вызов функции {get_currency_rates.__name__}")
 
     # Получаем список валют из настроек пользователя
-    list_of_currencies = user_settings["user_currencies"]
+    list_of_currencies = UserSettings.from_value(user_settings).user_currencies
 
     # Получаем данные по курсам через API запрос
-    response = requests.get("https://www.cbr-xml-daily.ru/daily_json.js")
+    try:
+        response = requests.get(f"{get_cbr_base_url()}/daily_json.js", timeout=CBR_TIMEOUT)
+    except requests.RequestException as ex:
+        logger.error(f"Ошибка запроса курсов валют: {ex}")
+        return []
     data = response.json()
 
     # Создаем список словарей со заданным валютам
@@ -259,13 +396,13 @@ def get_currency_rates(user_settings: dict[Any, Any]) -> list:
     return request_list
 
 
-def get_stock_prices(user_settings: dict[Any, Any]) -> list[dict]:
+def get_stock_prices(user_settings: Union[UserSettings, dict[Any, Any], None] = None) -> list[dict]:
     """
     Функция для получения стоимости акций из S&P500.
     Принимает данные настроек пользователя и возвращает список стоимости акций API ответом с ресурса Alpha Vantage.
     Данные получает url - https://www.alphavantage.co/support/#api-key
 
-    :param user_settings: Словарь с настройками пользователя
+    :param user_settings: Настройки пользователя (объект или словарь), None - настройки из кэша
     :return request_list: Список словарей в формате
         {
             "stock": stock,
@@ -275,29 +412,16 @@ def get_stock_prices(user_settings: dict[Any, Any]) -> list[dict]:
 
     logger.info(f"Вызов функции {get_stock_prices.__name__}")
 
-    # Извлекаем ключ
-    api_key = os.getenv("API-key")
     # Получаем список компаний из данных настройками пользователя
-    list_of_stocks = user_settings["user_stocks"]
+    list_of_stocks = list(UserSettings.from_value(user_settings).user_stocks)
     # ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
 
-    stock_prices_list = []
-
-    for stock in list_of_stocks:
-        # Получаем данные по стоимости через API запрос
-        url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={stock}&apikey={api_key}"
-        request = requests.get(url)
-        data = request.json()
-
-        if request.status_code == 200:
-            stock_prices_list.append(
-                {
-                    "stock": stock,
-                    "price": data["Global Quote"]["05. price"],
-                }
-            )
-        else:
-            logger.error(f"Сайт по запросу компании {stock} не отвечает. Ответ {request.status_code}")
+    # Запросы выполняет планировщик с учетом лимитов API, при превышении лимита - последние известные котировки
+    quotes = get_quote_scheduler().get_quotes(list_of_stocks)
+
+    stock_prices_list = [
+        {"stock": stock, "price": quotes[stock]["price"]} for stock in list_of_stocks if stock in quotes
+    ]
 
     logger.info("Функция возвращает данные")
     return stock_prices_list
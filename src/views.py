@@ -2,8 +2,10 @@ import json
 import logging
 import os
 
-from utils import (get_cards_spends_list, get_currency_rates, get_greeting_massage, get_stock_prices,
-                   get_top_transaction_list, get_transactions_list_for_period, get_user_settings)
+from src.fx import get_fx_rate_store
+from src.utils import (get_cards_spends_list, get_currency_rates, get_greeting_massage, get_operations_path,
+                       get_stock_prices, get_top_transaction_list, get_transactions_list_for_period,
+                       get_user_settings)
 
 logger = logging.getLogger("views")
 logger.setLevel(logging.DEBUG)
@@ -46,17 +48,18 @@ def get_main_page_request(date_time_str: str) -> str:
     greeting_massage = get_greeting_massage()
 
     # Получаем данные из списка операций пользователя за указанный период
-    path_to_operations_file = os.path.join(os.path.abspath(__file__), os.pardir, os.pardir, "data", "operations.xlsx")
+    path_to_operations_file = get_operations_path()
     transactions_list = get_transactions_list_for_period(date_time_str, path_to_operations_file)
+    # Получаем таблицу исторических курсов для пересчета операций в валюте
+    fx_rates = get_fx_rate_store()
     # Получаем траты по каждой карте за указанный период
-    cards_spend_list = get_cards_spends_list(transactions_list)
+    cards_spend_list = get_cards_spends_list(transactions_list, fx_rates)
     # Получаем список Топ - 5 транзакций за указанный период
-    top_transaction_list = get_top_transaction_list(transactions_list)
-    # Получаем данные настроек аккаунта пользователя
+    top_transaction_list = get_top_transaction_list(transactions_list, fx_rates)
+    # Получаем данные настроек аккаунта пользователя (один раз для всех запросов к API)
     user_settings = get_user_settings()
     # Получаем список акций из S&P500
     stock_prices_list = get_stock_prices(user_settings)
-    user_settings = get_user_settings()
     # Получаем список курсов валют
     currency_rates = get_currency_rates(user_settings)
 
@@ -1,6 +1,33 @@
+from pathlib import Path
+from typing import Callable, Iterator
+
 import pandas
 import pytest
 
+import src.quotes
+import src.reports
+import src.settings
+import src.utils
+from src.storage import STORAGE_BACKENDS, PandasStorage, SQLiteStorage, TransactionStorage
+
+
+@pytest.fixture(autouse=True)
+def reports_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path_to_reports_dir = tmp_path / "reports"
+    monkeypatch.setattr(src.reports, "path_to_reports_dir", str(path_to_reports_dir))
+    return path_to_reports_dir
+
+
+@pytest.fixture(autouse=True)
+def quote_scheduler(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(src.quotes, "quote_scheduler", None)
+    monkeypatch.setattr(src.quotes, "path_to_quotes_cache", str(tmp_path / "stock_prices.json"))
+
+
+@pytest.fixture(autouse=True)
+def settings_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(src.settings, "settings_cache", None)
+
 
 @pytest.fixture
 def transactions_df() -> pandas.DataFrame:
@@ -223,3 +250,31 @@ def transactions_empty_df() -> pandas.DataFrame:
             "Сумма операции с округлением": [],
         }
     )
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def storage_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Тип хранилища операций: тест выполняется для каждого хранилища"""
+
+    monkeypatch.setenv("STORAGE_BACKEND", request.param)
+    monkeypatch.setattr(src.utils, "storages", {})
+    return str(request.param)
+
+
+@pytest.fixture
+def make_storage(storage_backend: str) -> Iterator[Callable[[pandas.DataFrame], TransactionStorage]]:
+    """Фабрика хранилищ операций выбранного типа"""
+
+    opened: list[SQLiteStorage] = []
+
+    def make(transactions: pandas.DataFrame) -> TransactionStorage:
+        if storage_backend == "pandas":
+            return PandasStorage(transactions)
+        sqlite_storage = SQLiteStorage()
+        sqlite_storage.load(transactions)
+        opened.append(sqlite_storage)
+        return sqlite_storage
+
+    yield make
+    for sqlite_storage in opened:
+        sqlite_storage.close()
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas
+import pytest
+
+from src.aggregation import ParallelStorage, get_chunks, map_reduce, map_sums_by_weekday, reduce_arrays
+from src.reports import spending_by_weekday
+from src.snapshot import write_snapshot
+
+
+@pytest.fixture
+def parallel_storage(transactions_df_persons: pandas.DataFrame, tmp_path: Path) -> ParallelStorage:
+    path_to_snapshot = str(tmp_path / "operations.snapshot")
+    write_snapshot(transactions_df_persons, path_to_snapshot)
+    return ParallelStorage(path_to_snapshot, max_workers=2, min_rows=0)
+
+
+def test_get_chunks() -> None:
+    dates = np.array(["2021-12-01", "2021-12-02", "2021-12-03", "2021-12-04"], dtype="datetime64[ns]")
+    start, stop = datetime(2021, 12, 2), datetime(2021, 12, 3)
+
+    assert get_chunks(dates, None, None, 2) == [(0, 2), (2, 4)]
+    assert get_chunks(dates, start, stop, 4) == [(1, 2), (2, 3)]
+    # Операции по убыванию даты, как в выписке
+    assert get_chunks(dates[::-1], start, stop, 1) == [(1, 3)]
+    # Неупорядоченные даты - делятся все строки, период фильтруется в частях
+    assert get_chunks(dates[[2, 0, 3, 1]], start, stop, 1) == [(0, 4)]
+    assert get_chunks(dates, datetime(2022, 1, 1), None, 2) == []
+
+
+def test_map_reduce_parallel_matches_sequential(parallel_storage: ParallelStorage) -> None:
+    results = [
+        map_reduce(
+            parallel_storage.path_to_snapshot,
+            map_sums_by_weekday,
+            reduce_arrays,
+            ["Сумма операции"],
+            max_workers=max_workers,
+            min_rows=0,
+        )
+        for max_workers in (1, 2)
+    ]
+    np.testing.assert_allclose(results[0][0], results[1][0])
+    np.testing.assert_array_equal(results[0][1], results[1][1])
+
+
+def test_spending_by_weekday_parallel_storage(
+    parallel_storage: ParallelStorage, transactions_df_persons: pandas.DataFrame
+) -> None:
+    assert spending_by_weekday(parallel_storage, "2022-01-31") == spending_by_weekday(
+        transactions_df_persons, "2022-01-31"
+    )
+
+
+def test_get_investment_savings(parallel_storage: ParallelStorage, transactions_df_persons: pandas.DataFrame) -> None:
+    spends = transactions_df_persons[
+        (transactions_df_persons["Статус"] == "OK") & (transactions_df_persons["Сумма операции"] < 0)
+    ]["Сумма операции"].abs()
+    expected = round(float(((100 - spends % 100) % 100).sum()), 2)
+
+    assert parallel_storage.get_investment_savings(100) == {"2021-12": expected}
+    assert parallel_storage.get_investment_savings(50, stop=datetime(2021, 11, 30)) == {}
+
+
+def test_get_top_spends(parallel_storage: ParallelStorage, transactions_df_persons: pandas.DataFrame) -> None:
+    top = parallel_storage.get_top_spends(2)
+    spends = transactions_df_persons[
+        (transactions_df_persons["Статус"] == "OK") & (transactions_df_persons["Сумма операции"] < 0)
+    ]
+    assert top["Сумма операции"].tolist() == spends["Сумма операции"].nsmallest(2).tolist()
+    assert json.loads(top[["Описание"]].to_json(orient="records"))[0]["Описание"] == spends.loc[
+        spends["Сумма операции"].idxmin(), "Описание"
+    ]
+
+
+def test_get_top_spends_during_rebuild(
+    parallel_storage: ParallelStorage, transactions_df_persons: pandas.DataFrame, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    expected = parallel_storage.get_top_spends(2)["Описание"].tolist()
+
+    # Снимок перестраивается с другим порядком строк после шага map-reduce
+    def map_reduce_then_rebuild(*args: Any, **kwargs: Any) -> Any:
+        result = map_reduce(*args, **kwargs)
+        write_snapshot(transactions_df_persons.iloc[::-1], parallel_storage.path_to_snapshot)
+        return result
+
+    monkeypatch.setattr("src.aggregation.map_reduce", map_reduce_then_rebuild)
+
+    assert parallel_storage.get_top_spends(2)["Описание"].tolist() == expected
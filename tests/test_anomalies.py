@@ -0,0 +1,71 @@
+import math
+
+import numpy
+import pandas
+import pytest
+
+from src.anomalies import AnomalyDetector, RunningStats
+
+
+def make_spends(amounts: list[float], card: str = "*7197", category: str = "Супермаркеты") -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "Дата платежа": "01.12.2021",
+            "Номер карты": card,
+            "Статус": "OK",
+            "Сумма операции": [-amount for amount in amounts],
+            "Категория": category,
+            "Описание": "Магнит",
+        }
+    )
+
+
+def test_running_stats_update_and_merge() -> None:
+    values = [1.0, 4.0, 9.0, 16.0, 25.0]
+
+    stats = RunningStats()
+    for value in values:
+        stats.update(value)
+    assert stats.mean == pytest.approx(numpy.mean(values))
+    assert stats.std == pytest.approx(numpy.std(values))
+
+    merged = RunningStats()
+    merged.merge(2, numpy.mean(values[:2]), numpy.var(values[:2]) * 2)
+    merged.merge(3, numpy.mean(values[2:]), numpy.var(values[2:]) * 3)
+    assert merged.count == 5
+    assert merged.mean == pytest.approx(stats.mean)
+    assert merged.m2 == pytest.approx(stats.m2)
+
+    assert RunningStats().std == 0.0
+
+
+def test_anomaly_detector_batch_matches_streaming() -> None:
+    transactions = pandas.concat([make_spends([100.0, 110.0, 90.0]), make_spends([5.0, 7.0], card="*4556")])
+
+    batch = AnomalyDetector()
+    batch.update(transactions)
+
+    streaming = AnomalyDetector()
+    for transaction in transactions.to_dict("records"):
+        streaming.add(transaction)
+
+    for column, column_stats in batch.stats.items():
+        assert column_stats.keys() == streaming.stats[column].keys()
+        for key, stats in column_stats.items():
+            assert stats.count == streaming.stats[column][key].count
+            assert math.isclose(stats.mean, streaming.stats[column][key].mean)
+            assert math.isclose(stats.m2, streaming.stats[column][key].m2, abs_tol=1e-9)
+
+
+def test_anomaly_detector_detect() -> None:
+    history = make_spends([100.0, 105.0, 95.0, 100.0, 102.0, 98.0, 101.0, 99.0, 100.0, 100.0])
+    detector = AnomalyDetector(threshold=3.0, min_count=10)
+    detector.update(history)
+
+    anomalies = detector.process(make_spends([101.0, 5000.0]))
+    # Трата, аномальная по карте и по категории, возвращается один раз
+    assert anomalies["Сумма траты"].tolist() == [5000.0]
+    assert sorted(anomalies["Группы"].iloc[0]) == ["Категория", "Номер карты"]
+
+    # Траты по новой карте без накопленной статистики не оцениваются
+    assert detector.detect(make_spends([5000.0], card="*1112", category="Такси")).empty
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas
+import pytest
+
+from src.budgets import Budget, BudgetAlert, BudgetMonitor, get_budgets_path, load_budgets
+from src.settings import SettingsError
+
+
+def test_budget_from_dict() -> None:
+    assert Budget.from_dict({"name": "Еда", "limit": "1000", "category": "Фастфуд", "thresholds": [1, 0.5]}) == Budget(
+        "Еда", 1000.0, "month", "Фастфуд", None, (0.5, 1.0)
+    )
+
+    for data in ({"name": "Еда"}, {"name": "Еда", "limit": 0}, {"name": "Еда", "limit": 10, "period": "year"}, []):
+        with pytest.raises(SettingsError):
+            Budget.from_dict(data)
+
+
+def test_load_budgets(tmp_path: Path) -> None:
+    path = tmp_path / "user1.budgets.json"
+    path.write_text(json.dumps([{"name": "Все", "limit": 100}]), encoding="utf-8")
+
+    assert get_budgets_path("user1").endswith("user1.budgets.json")
+    with patch("src.budgets.get_budgets_path", return_value=str(path)):
+        assert load_budgets("user1") == [Budget("Все", 100.0)]
+    with patch("src.budgets.get_budgets_path", return_value=str(tmp_path / "missing.json")):
+        assert load_budgets() == []
+    assert len(load_budgets()) > 0
+
+
+def test_budget_monitor_thresholds_and_periods() -> None:
+    received: list[BudgetAlert] = []
+    monitor = BudgetMonitor(
+        [
+            Budget("food", 1000.0, "month", category="Фастфуд"),
+            Budget("card", 500.0, "day", card="*7197", thresholds=(1.0,)),
+            Budget("week", 100.0, "week"),
+        ],
+        on_alert=received.append,
+    )
+
+    assert monitor.add(datetime(2021, 12, 1, 10), 50.0, "Супермаркеты", "*4556") == []
+    alerts = monitor.add(datetime(2021, 12, 1, 11), 900.0, "Фастфуд", "*7197")
+    assert [(alert.budget, alert.threshold) for alert in alerts] == [
+        ("food", 0.8),
+        ("card", 1.0),
+        ("week", 0.8),
+        ("week", 1.0),
+    ]
+    assert alerts[0] == BudgetAlert("food", "2021-12-01", 0.8, 900.0, 1000.0, "2021-12-01T11:00:00")
+    assert received == alerts
+
+    # Порог пересекается один раз за период, новый период начинается заново
+    assert monitor.add(datetime(2021, 12, 2), 10.0, "Фастфуд", "*7197") == []
+    alerts = monitor.add(datetime(2021, 12, 3), 600.0, "Фастфуд", "*7197")
+    assert [alert.budget for alert in alerts] == ["food", "card"]
+    assert monitor.add(datetime(2022, 1, 3), 10.0, "Фастфуд", None) == []
+    assert monitor.get_spent() == {"food": 10.0, "card": 600.0, "week": 10.0}
+
+    # Траты прошедшего периода на текущий период не влияют
+    assert monitor.add(datetime(2021, 12, 2), 5000.0, "Фастфуд", "*7197") == []
+    assert monitor.get_spent()["food"] == 10.0
+
+
+def test_process_transactions_matches_process(transactions_df_persons: pandas.DataFrame) -> None:
+    budgets = [Budget("all", 1000.0), Budget("transfers", 10000.0, category="Переводы")]
+    transactions = transactions_df_persons.copy()
+    transactions["Дата операции"] = pandas.to_datetime(transactions["Дата операции"], dayfirst=True)
+
+    alerts = BudgetMonitor(budgets).process_transactions(transactions)
+
+    monitor = BudgetMonitor(budgets)
+    expected = []
+    for transaction in transactions.sort_values("Дата операции", kind="stable").to_dict("records"):
+        expected.extend(monitor.process(transaction))
+    assert alerts == expected
+    assert [alert.budget for alert in alerts] == ["transfers", "transfers", "all", "all"]
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pandas
+import pytest
+
+from src.cashback import CashbackProgram, load_cashback_programs, simulate_cashback, simulate_cashback_by_month
+
+
+@pytest.fixture
+def spends() -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "Дата операции": pandas.to_datetime(
+                ["2021-11-03", "2021-11-20", "2021-12-01", "2021-12-05", "2021-12-07", "2021-12-09"]
+            ),
+            "Статус": ["OK", "OK", "OK", "OK", "FAILED", "OK"],
+            "Сумма операции": [-1000.0, -50.0, -2000.0, -400.0, -5000.0, 300.0],
+            "Категория": ["Супермаркеты", "Фастфуд", "Супермаркеты", "Топливо", "Супермаркеты", "Пополнения"],
+            "MCC": [5411.0, 5814.0, 5411.0, 5541.0, 5411.0, None],
+            "Кэшбэк": [10.0, None, 20.0, 4.0, None, None],
+        }
+    )
+
+
+def test_simulate_cashback_by_month(spends: pandas.DataFrame) -> None:
+    programs = [
+        CashbackProgram("flat"),
+        CashbackProgram(
+            "markets",
+            base_rate=0.0,
+            category_rates={"Супермаркеты": 0.05, "Топливо": 0.02},
+            mcc_rates={5541: 0.1},
+            monthly_cap=80.0,
+            min_amount=100.0,
+        ),
+        CashbackProgram("threshold", min_monthly_spend=2000.0),
+    ]
+
+    result = simulate_cashback_by_month(spends, programs)
+
+    assert list(result.columns) == ["2021-11", "2021-12"]
+    assert result.loc["flat"].tolist() == pytest.approx([10.5, 24.0])
+    # MCC важнее категории, трата 50 меньше min_amount, декабрь ограничен лимитом 80
+    assert result.loc["markets"].tolist() == pytest.approx([50.0, 80.0])
+    # В ноябре траты 1050 меньше порога
+    assert result.loc["threshold"].tolist() == pytest.approx([0.0, 24.0])
+
+
+def test_simulate_cashback(spends: pandas.DataFrame) -> None:
+    programs = [CashbackProgram("flat"), CashbackProgram("markets", base_rate=0.0, monthly_cap=10.0)]
+
+    result = simulate_cashback(spends, programs)
+
+    assert result.to_dict("records") == [
+        {"program": "flat", "cashback": 34.5, "capped_months": 0},
+        {"program": "markets", "cashback": 0.0, "capped_months": 0},
+    ]
+    assert simulate_cashback(spends.iloc[:0], programs)["cashback"].tolist() == [0.0, 0.0]
+
+
+def test_load_cashback_programs(tmp_path: Path) -> None:
+    path = tmp_path / "programs.json"
+    path.write_text(json.dumps([{"name": "АЗС", "mcc_rates": {"5541": 0.1}, "monthly_cap": 500}]), encoding="utf-8")
+
+    assert load_cashback_programs(str(path)) == [CashbackProgram("АЗС", mcc_rates={5541: 0.1}, monthly_cap=500.0)]
+    assert load_cashback_programs(str(tmp_path / "missing.json")) == []
+    assert len(load_cashback_programs()) > 0
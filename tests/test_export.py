@@ -0,0 +1,88 @@
+import json
+import os
+from pathlib import Path
+
+import pandas
+import pytest
+
+from src.export import export_transactions, get_available_export_formats, get_export_datasets, write_partitions
+from src.schema import normalize_transactions
+
+
+@pytest.fixture
+def two_months_df(transactions_df_persons: pandas.DataFrame) -> pandas.DataFrame:
+    december = normalize_transactions(transactions_df_persons)[0]
+    november = december.copy()
+    november["Дата операции"] = november["Дата операции"] - pandas.DateOffset(months=1)
+    two_months = pandas.concat([december, november], ignore_index=True)
+    return normalize_transactions(two_months)[0]
+
+
+def test_get_export_datasets(two_months_df: pandas.DataFrame) -> None:
+    datasets = get_export_datasets(two_months_df, limits=(10, 50))
+
+    assert set(datasets) == {"operations", "card_spends", "weekday", "investment_bank", "persons_transfers"}
+    assert sorted(datasets["operations"]["month"].unique()) == ["2021-11", "2021-12"]
+
+    card_spends = datasets["card_spends"].set_index(["month", "card"])
+    assert card_spends.loc[("2021-12", "*7197"), "total_spent"] == pytest.approx(-1.07 - 99.22 - 199.0 - 99.0)
+
+    savings = datasets["investment_bank"].set_index(["month", "limit"])["amount_saved"]
+    assert savings[("2021-12", 10)] == pytest.approx(8.93 + 0.78 + 1 + 1)
+
+    persons = datasets["persons_transfers"]
+    assert list(persons["Описание"]) == ["Константин Л."] * 4
+    assert list(persons["month"]) == ["2021-12", "2021-12", "2021-11", "2021-11"]
+
+
+def test_export_transactions_rewrites_changed_partitions(two_months_df: pandas.DataFrame, tmp_path: Path) -> None:
+    result = export_transactions(two_months_df, path=str(tmp_path))
+
+    assert result["operations"]["written"] == ["2021-11", "2021-12"]
+    partition = pandas.read_csv(tmp_path / "operations" / "month=2021-12" / "part.csv")
+    assert len(partition) == 6 and "month" not in partition.columns
+    with open(tmp_path / "operations" / "_manifest.json", encoding="utf-8") as manifest_file:
+        assert set(json.load(manifest_file)["partitions"]) == {"2021-11", "2021-12"}
+
+    november_file = tmp_path / "operations" / "month=2021-11" / "part.csv"
+    november_mtime = os.stat(november_file).st_mtime_ns
+    changed = two_months_df.copy()
+    changed.loc[0, "Сумма операции"] = -2.07
+    result = export_transactions(changed, path=str(tmp_path))
+
+    assert result["operations"] == {"written": ["2021-12"], "unchanged": ["2021-11"], "removed": []}
+    assert result["persons_transfers"]["written"] == []
+    assert os.stat(november_file).st_mtime_ns == november_mtime
+
+    december_only = changed[changed["Дата операции"] >= "2021-12-01"]
+    result = export_transactions(december_only, path=str(tmp_path))
+
+    assert result["operations"] == {"written": [], "unchanged": ["2021-12"], "removed": ["2021-11"]}
+    assert not (tmp_path / "operations" / "month=2021-11").exists()
+
+
+def test_write_partitions_parquet(two_months_df: pandas.DataFrame, tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+
+    datasets = get_export_datasets(two_months_df)
+    result = write_partitions(datasets["weekday"], "weekday", "parquet", str(tmp_path))
+
+    assert result["written"] == ["2021-11", "2021-12"]
+    assert len(pandas.read_parquet(tmp_path / "weekday" / "month=2021-12" / "part.parquet")) > 0
+
+
+def test_export_transactions_errors(transactions_empty_df: pandas.DataFrame, tmp_path: Path) -> None:
+    assert export_transactions(transactions_empty_df, path=str(tmp_path)) == {}
+    with pytest.raises(ValueError):
+        export_transactions(transactions_empty_df, file_format="xlsx", path=str(tmp_path))
+
+
+def test_export_parquet_without_engine(
+    two_months_df: pandas.DataFrame, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+
+    assert get_available_export_formats() == ("csv",)
+    with pytest.raises(ValueError, match="pyarrow"):
+        export_transactions(two_months_df, file_format="parquet", path=str(tmp_path))
+    assert not any(tmp_path.iterdir())
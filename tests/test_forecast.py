@@ -0,0 +1,76 @@
+import numpy as np
+import pandas
+import pytest
+
+from src.forecast import SpendingForecaster, get_monthly_spends
+
+
+@pytest.fixture
+def monthly_transactions() -> pandas.DataFrame:
+    generator = np.random.default_rng(0)
+    rows = 400
+    return pandas.DataFrame(
+        {
+            "Дата операции": pandas.Timestamp("2020-01-01")
+            + pandas.to_timedelta(np.sort(generator.integers(0, 500, rows)), unit="D"),
+            "Статус": np.where(generator.random(rows) < 0.05, "FAILED", "OK"),
+            "Сумма операции": -np.round(generator.uniform(10, 1000, rows), 2),
+            "Категория": generator.choice(["Супермаркеты", "Фастфуд", "Транспорт"], rows),
+            "Номер карты": generator.choice(["*7197", "*4556", None], rows),
+        }
+    )
+
+
+def test_get_monthly_spends(monthly_transactions: pandas.DataFrame) -> None:
+    keys, months, spends = get_monthly_spends(monthly_transactions, "Номер карты")
+
+    expected = (
+        monthly_transactions[monthly_transactions["Статус"] == "OK"]
+        .groupby(["Номер карты", monthly_transactions["Дата операции"].dt.strftime("%Y-%m")])["Сумма операции"]
+        .sum()
+        .abs()
+    )
+    assert set(keys) == {"*7197", "*4556"}
+    assert str(months[0]) == "2020-01" and len(months) == 17
+    for (card, month), total in expected.items():
+        assert spends[keys.get_loc(card), [str(m) for m in months].index(month)] == pytest.approx(total)
+
+
+def test_forecast_matches_per_series(monthly_transactions: pandas.DataFrame) -> None:
+    forecaster = SpendingForecaster("Категория", alpha=0.4, season=12, transactions=monthly_transactions)
+    forecast = forecaster.forecast()
+    spends = forecaster.spends
+
+    assert forecaster.next_month == "2021-06"
+    for category, row in spends.iterrows():
+        assert forecast.loc[category, "ses"] == pytest.approx(row.ewm(alpha=0.4, adjust=False).mean().iloc[-1])
+        assert forecast.loc[category, "seasonal_naive"] == pytest.approx(row["2020-06"])
+    assert forecast["ses"].is_monotonic_decreasing
+
+
+def test_forecast_incremental_update(monthly_transactions: pandas.DataFrame) -> None:
+    batch = SpendingForecaster("Категория", transactions=monthly_transactions)
+
+    dates = monthly_transactions["Дата операции"]
+    middle = monthly_transactions[(dates >= "2020-06-01") & (dates < "2021-01-01")]
+    late = monthly_transactions[dates >= "2021-01-01"]
+    early = monthly_transactions[dates < "2020-06-01"]
+    incremental = SpendingForecaster("Категория", transactions=middle[middle["Категория"] != "Транспорт"])
+    for part in (late, middle[middle["Категория"] == "Транспорт"], early):
+        incremental.update(part)
+
+    pandas.testing.assert_frame_equal(
+        incremental.spends.loc[batch.spends.index], batch.spends, check_exact=False
+    )
+    pandas.testing.assert_frame_equal(incremental.forecast().sort_index(), batch.forecast().sort_index())
+
+
+def test_forecast_empty_and_parameters(transactions_empty_df: pandas.DataFrame) -> None:
+    forecaster = SpendingForecaster(transactions=transactions_empty_df)
+
+    assert forecaster.next_month is None
+    assert forecaster.forecast().empty
+    with pytest.raises(ValueError):
+        SpendingForecaster("Описание")
+    with pytest.raises(ValueError):
+        SpendingForecaster(alpha=0)
@@ -0,0 +1,125 @@
+from datetime import date
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pandas
+import pytest
+
+from src.fx import CBR_TIMEOUT, FxRateStore, convert_transactions_to_rub, update_fx_rates, update_fx_rates_as_of
+from src.utils import get_cards_spends_list, get_top_transaction_list
+
+
+@pytest.fixture
+def fx_rates() -> FxRateStore:
+    return FxRateStore(
+        pandas.DataFrame(
+            {
+                "date": ["2021-12-01", "2021-12-03", "2021-12-01"],
+                "currency": ["USD", "USD", "EUR"],
+                "rate": [73.0, 74.0, 83.0],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def foreign_transactions() -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "Дата операции": [
+                "02.12.2021 10:00:00",
+                "04.12.2021 10:00:00",
+                "30.11.2021 10:00:00",
+                "02.12.2021 11:00:00",
+            ],
+            "Номер карты": ["*7197", "*7197", "*4556", "*4556"],
+            "Статус": "OK",
+            "Сумма операции": [-10.0, -10.0, -5.0, -100.0],
+            "Валюта операции": ["USD", "USD", "EUR", "RUB"],
+            "Сумма платежа": [-730.5, -740.5, -420.0, -100.0],
+            "Валюта платежа": "RUB",
+            "Сумма операции с округлением": [10.0, 10.0, 5.0, 100.0],
+            "Дата платежа": "05.12.2021",
+            "Категория": "Супермаркеты",
+            "Описание": ["Amazon", "Amazon", "Zara", "Магнит"],
+        }
+    )
+
+
+def test_get_rates(fx_rates: FxRateStore) -> None:
+    rates = fx_rates.get_rates(
+        pandas.Series(["USD", "USD", "EUR", "RUB", "TRY"]),
+        pandas.Series(["02.12.2021", "10.12.2021", "01.12.2021", "01.01.2000", "02.12.2021"]),
+    )
+    assert rates[:4].tolist() == [73.0, 74.0, 83.0, 1.0]
+    assert pandas.isna(rates[4])
+
+
+def test_convert_transactions_to_rub(fx_rates: FxRateStore, foreign_transactions: pandas.DataFrame) -> None:
+    converted = convert_transactions_to_rub(foreign_transactions, fx_rates)
+
+    # EUR до первой даты курса - берется сумма платежа в рублях
+    assert converted["Сумма операции"].tolist() == [-730.0, -740.0, -420.0, -100.0]
+    assert converted["Сумма операции с округлением"].tolist() == [730.0, 740.0, 420.0, 100.0]
+    assert set(converted["Валюта операции"]) == {"RUB"}
+    assert converted["Сумма операции (исходная)"].tolist() == [-10.0, -10.0, -5.0, -100.0]
+    assert foreign_transactions["Сумма операции"].tolist() == [-10.0, -10.0, -5.0, -100.0]
+
+
+def test_cards_and_top_in_rub(fx_rates: FxRateStore, foreign_transactions: pandas.DataFrame) -> None:
+    transactions_list = foreign_transactions.to_dict("records")
+
+    cards_spends = get_cards_spends_list(transactions_list, fx_rates)
+    assert sorted(cards_spends, key=lambda card: card["last_digits"]) == [
+        {"last_digits": "4556", "total_spent": -520.0, "cashback": 5.2},
+        {"last_digits": "7197", "total_spent": -1470.0, "cashback": 14.7},
+    ]
+    assert [operation["amount"] for operation in get_top_transaction_list(transactions_list, fx_rates)] == [
+        740.0,
+        730.0,
+        420.0,
+        100.0,
+    ]
+
+
+@patch("requests.get")
+def test_update_fx_rates(mock_get: Mock, tmp_path: Path, foreign_transactions: pandas.DataFrame) -> None:
+    path = str(tmp_path / "fx_rates.csv")
+    FxRateStore(pandas.DataFrame({"date": ["2021-12-02"], "currency": ["USD"], "rate": [73.5]})).to_csv(path)
+
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {
+        "Valute": {"USD": {"Value": 74.0, "Nominal": 1}, "TRY": {"Value": 55.0, "Nominal": 10}}
+    }
+
+    fx_rates = update_fx_rates(foreign_transactions, path)
+
+    # Запрашиваются только отсутствующие даты
+    assert mock_get.call_count == 2
+    assert mock_get.call_args_list[0].args[0] == "https://www.cbr-xml-daily.ru/archive/2021/11/30/daily_json.js"
+    assert mock_get.call_args_list[0].kwargs["timeout"] == CBR_TIMEOUT
+    assert set(FxRateStore.from_csv(path).rates["date"].dt.date) == {
+        date(2021, 11, 30),
+        date(2021, 12, 2),
+        date(2021, 12, 4),
+    }
+    assert set(fx_rates.rates["currency"]) == {"USD"}
+
+
+@patch("requests.get")
+def test_update_fx_rates_as_of(mock_get: Mock, tmp_path: Path) -> None:
+    path = str(tmp_path / "fx_rates.csv")
+
+    def get(url: str, timeout: tuple[float, float]) -> Mock:
+        # 31.10.2021 - воскресенье, последний курс установлен на субботу 30.10.2021
+        response = Mock(status_code=200 if url.endswith("/2021/10/30/daily_json.js") else 404)
+        response.json.return_value = {"Valute": {"USD": {"Value": 71.0, "Nominal": 1}}}
+        return response
+
+    mock_get.side_effect = get
+
+    fx_rates = update_fx_rates_as_of([date(2021, 10, 31)], ["USD"], path)
+
+    assert mock_get.call_count == 2
+    assert fx_rates.has_rate("USD", date(2021, 10, 31))
+    assert FxRateStore.from_csv(path).rates["rate"].tolist() == [71.0]
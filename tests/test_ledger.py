@@ -0,0 +1,111 @@
+import numpy as np
+import pandas
+import pytest
+
+from src.ledger import CardLedger, get_ledger_entries
+
+
+def make_transactions(rows: list[tuple[str, str, str, float]]) -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "Дата операции": [row[0] for row in rows],
+            "Номер карты": [row[1] for row in rows],
+            "Статус": [row[2] for row in rows],
+            "Сумма платежа": [row[3] for row in rows],
+        }
+    )
+
+
+@pytest.fixture
+def ledger_transactions() -> pandas.DataFrame:
+    generator = np.random.default_rng(3)
+    rows = 500
+    return pandas.DataFrame(
+        {
+            "Дата операции": pandas.Timestamp("2021-11-01")
+            + pandas.to_timedelta(generator.integers(0, 60 * 24 * 60, rows), unit="min"),
+            "Номер карты": generator.choice(["*7197", "*4556", None], rows),
+            "Статус": generator.choice(["OK", "OK", "OK", "FAILED"], rows),
+            "Сумма платежа": np.round(generator.uniform(-3000, 1000, rows), 2),
+        }
+    )
+
+
+def test_get_ledger_entries() -> None:
+    transactions = make_transactions(
+        [
+            ("02.12.2021 10:00:00", "*7197", "OK", -100.0),
+            ("01.12.2021 10:00:00", "*7197", "FAILED", -50.0),
+            ("01.12.2021 09:00:00", None, "OK", -10.0),
+            ("01.12.2021 08:00:00", "*4556", "OK", 500.0),
+        ]
+    )
+
+    entries = get_ledger_entries(transactions)
+
+    assert entries["card"].tolist() == ["*4556", "*7197"]
+    assert entries["amount"].tolist() == [500.0, -100.0]
+    assert entries["date"].is_monotonic_increasing
+
+
+def test_card_ledger_balances(ledger_transactions: pandas.DataFrame) -> None:
+    ledger = CardLedger(ledger_transactions, {"*4556": 1000.0})
+    entries = ledger.entries
+
+    # Остатки после каждого движения в цикле
+    balances = {"*7197": 0.0, "*4556": 1000.0}
+    expected = []
+    for card, amount in zip(entries["card"], entries["amount"]):
+        balances[card] += amount
+        expected.append(balances[card])
+
+    assert entries["date"].is_monotonic_increasing
+    assert entries["balance"].tolist() == pytest.approx(expected)
+    assert ledger.balance_at(entries["date"].iloc[-1]).to_dict() == pytest.approx(balances)
+    assert ledger.balance_at("2021-10-01").to_dict() == {"*4556": 1000.0, "*7197": 0.0}
+
+    moment = pandas.Timestamp("2021-12-01 12:00:00")
+    before = entries[entries["date"] <= moment]
+    assert ledger.balance_at(moment, ["*7197"])["*7197"] == pytest.approx(
+        before.loc[before["card"] == "*7197", "amount"].sum()
+    )
+
+
+def test_card_ledger_daily_balances() -> None:
+    ledger = CardLedger(
+        make_transactions(
+            [
+                ("01.12.2021 10:00:00", "*7197", "OK", -100.0),
+                ("01.12.2021 20:00:00", "*7197", "OK", -50.0),
+                ("03.12.2021 10:00:00", "*4556", "OK", 500.0),
+            ]
+        ),
+        {"*4556": 10.0},
+    )
+
+    daily_df = ledger.daily_balances()
+
+    assert list(daily_df.index.strftime("%Y-%m-%d")) == ["2021-12-01", "2021-12-02", "2021-12-03"]
+    assert daily_df["*7197"].tolist() == [-150.0, -150.0, -150.0]
+    assert daily_df["*4556"].tolist() == [10.0, 10.0, 510.0]
+
+    assert ledger.daily_balances("2021-12-02", "2021-12-04")["*4556"].tolist() == [10.0, 510.0, 510.0]
+
+
+@pytest.mark.parametrize("split", [0.3, 0.8])
+def test_card_ledger_update(ledger_transactions: pandas.DataFrame, split: float) -> None:
+    rebuilt = CardLedger(ledger_transactions)
+    ordered = ledger_transactions.sort_values("Дата операции", kind="stable")
+    position = int(len(ordered) * split)
+
+    # Добавление новых операций в конец истории
+    appended = CardLedger(ordered.iloc[:position])
+    appended.update(ordered.iloc[position:])
+    # Добавление операций задним числом
+    backdated = CardLedger(ordered.iloc[position:])
+    backdated.update(ordered.iloc[:position])
+
+    for ledger in (appended, backdated):
+        pandas.testing.assert_frame_equal(ledger.daily_balances(), rebuilt.daily_balances())
+        assert ledger.entries["balance"].iloc[-1] == pytest.approx(rebuilt.entries["balance"].iloc[-1])
+        assert ledger.balance_at("2021-12-15").to_dict() == pytest.approx(rebuilt.balance_at("2021-12-15").to_dict())
@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pandas
+import pytest
+
+from src.loaders import (SOURCE_COLUMN, filter_by_source, get_statement_paths, get_transactions_df_from_sources,
+                         is_statements_source)
+from src.utils import get_transactions_df
+
+
+@pytest.fixture
+def statements_dir(tmp_path: Path, transactions_df_persons: pandas.DataFrame) -> Path:
+    statements = transactions_df_persons.copy()
+    statements["Дата операции"] = [
+        "01.12.2021 23:40:34",
+        "01.12.2021 23:40:35",
+        "01.12.2021 23:40:36",
+        "01.12.2021 23:40:37",
+        "31.12.2021 00:12:53",
+        "30.12.2021 22:22:03",
+    ]
+    statements["Номер карты"] = ["*7197", "*7197", "*7197", "*7197", "*4556", "*4556"]
+
+    # Выгрузки пересекаются по операции от 01.12.2021 23:40:37
+    statements.iloc[0:4].to_excel(tmp_path / "card_7197.xlsx", index=False)
+    statements.iloc[3:6].to_excel(tmp_path / "card_4556.xlsx", index=False)
+    (tmp_path / "notes.txt").write_text("не выписка", encoding="utf-8")
+    return tmp_path
+
+
+def test_get_statement_paths(statements_dir: Path) -> None:
+    assert get_statement_paths(str(statements_dir)) == [
+        str(statements_dir / "card_4556.xlsx"),
+        str(statements_dir / "card_7197.xlsx"),
+    ]
+    assert get_statement_paths(str(statements_dir / "card_7*.xlsx")) == [str(statements_dir / "card_7197.xlsx")]
+    assert is_statements_source(str(statements_dir))
+    assert not is_statements_source(str(statements_dir / "card_7197.xlsx"))
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_get_transactions_df_from_sources(statements_dir: Path, max_workers: int) -> None:
+    transactions_df = get_transactions_df_from_sources(str(statements_dir), max_workers=max_workers)
+
+    assert len(transactions_df) == 6
+    assert transactions_df["Дата операции"].tolist() == [
+        "31.12.2021 00:12:53",
+        "30.12.2021 22:22:03",
+        "01.12.2021 23:40:37",
+        "01.12.2021 23:40:36",
+        "01.12.2021 23:40:35",
+        "01.12.2021 23:40:34",
+    ]
+    assert transactions_df[SOURCE_COLUMN].tolist() == [
+        "card_4556",
+        "card_4556",
+        "card_4556",
+        "card_7197",
+        "card_7197",
+        "card_7197",
+    ]
+
+
+def test_get_transactions_df_from_sources_repeated_operations(
+    tmp_path: Path, transactions_df_persons: pandas.DataFrame
+) -> None:
+    # Две одинаковые операции в одной выписке, одна из них повторяется в пересекающейся выписке
+    statement = transactions_df_persons.iloc[[0, 0, 1]]
+    statement.to_excel(tmp_path / "card_1.xlsx", index=False)
+    statement.iloc[[0, 2]].to_excel(tmp_path / "card_2.xlsx", index=False)
+
+    transactions_df = get_transactions_df_from_sources(str(tmp_path), max_workers=1)
+
+    assert len(transactions_df) == 3
+    assert transactions_df[SOURCE_COLUMN].tolist().count("card_1") == 3
+    assert len(get_transactions_df_from_sources(str(tmp_path / "card_1.xlsx"))) == 3
+
+
+def test_get_transactions_df_from_sources_filtered(statements_dir: Path) -> None:
+    transactions_df = get_transactions_df(str(statements_dir), sources=["card_7197"])
+
+    assert len(transactions_df) == 4
+    assert set(transactions_df[SOURCE_COLUMN]) == {"card_7197"}
+
+    assert get_transactions_df_from_sources(str(statements_dir / "*.csv")).empty
+
+
+def test_get_transactions_df_columns(statements_dir: Path) -> None:
+    transactions_df = get_transactions_df(
+        str(statements_dir / "card_7197.xlsx"), columns=["Дата операции", "Статус", "Сумма операции"]
+    )
+
+    assert list(transactions_df.columns) == ["Дата операции", "Статус", "Сумма операции"]
+    assert transactions_df["Дата операции"].dtype == "datetime64[ns]"
+    assert isinstance(transactions_df["Статус"].dtype, pandas.CategoricalDtype)
+    assert transactions_df["Сумма операции"].sum() == pytest.approx(-1.07 - 99.22 - 199.0 - 99.0)
+
+    # Дубликаты выписок определяются по всем колонкам, а не только по загружаемым
+    transactions_df = get_transactions_df(str(statements_dir), columns=["Статус"])
+
+    assert list(transactions_df.columns) == ["Статус", SOURCE_COLUMN]
+    assert len(transactions_df) == 6
+
+
+def test_filter_by_source(transactions_df: pandas.DataFrame) -> None:
+    assert filter_by_source(transactions_df, ["card_7197"]) is transactions_df
+
+    transactions_df[SOURCE_COLUMN] = ["a", "b", "a", "b"]
+    assert len(filter_by_source(transactions_df, ["a"])) == 2
+    assert len(filter_by_source(transactions_df, None)) == 4
@@ -0,0 +1,172 @@
+from pathlib import Path
+
+import pandas
+import pytest
+
+from src.loaders import SOURCE_COLUMN, get_statement_paths, get_transactions_df_from_sources
+from src.parsers import detect_format, read_operations_file, write_csv
+from src.schema import OPERATIONS_SCHEMA, SchemaError
+from src.utils import get_transactions_df
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+ENCODING:USASCII
+CHARSET:1251
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<CURDEF>RUB
+<BANKACCTFROM><ACCTID>40817810000000007197</BANKACCTFROM>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20211231
+<DTUSER>20211231001253
+<TRNAMT>-160,89
+<FITID>1
+<NAME>Колхоз &amp; Ко
+<SIC>5411
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20211230120000[+3:MSK]
+<TRNAMT>500.00
+<FITID>2
+<MEMO>Пополнение
+</STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+OFX_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<?OFX OFXHEADER="200" VERSION="220"?>
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD</CURDEF>
+<BANKACCTFROM><ACCTID>12344556</ACCTID></BANKACCTFROM>
+<BANKTRANLIST><STMTTRN><DTPOSTED>20211201</DTPOSTED><TRNAMT>-12.5</TRNAMT><NAME>Coffee</NAME></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF = """!Type:Bank
+D31.12.2021
+T-1,234.50
+PКолхоз
+LСупермаркеты
+^
+D12/30'21
+U500,00
+MПополнение
+^
+"""
+
+
+@pytest.fixture
+def statement_df(transactions_df: pandas.DataFrame) -> pandas.DataFrame:
+    # Даты операций в выгрузке банка - строки
+    statement = transactions_df.copy()
+    statement["Дата операции"] = statement["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")
+    statement["Кэшбэк"] = statement["Кэшбэк"].astype(float)
+    return statement
+
+
+def test_detect_format(tmp_path: Path, transactions_df: pandas.DataFrame) -> None:
+    transactions_df.to_excel(tmp_path / "statement.bin", index=False)
+    (tmp_path / "statement.dat").write_text(OFX_SGML, encoding="cp1251")
+    (tmp_path / "statement.xml").write_text(OFX_XML, encoding="utf-8")
+    (tmp_path / "statement.qif").write_text(QIF, encoding="utf-8")
+    (tmp_path / "statement.csv").write_text("Дата операции;Сумма операции\n", encoding="utf-8")
+    (tmp_path / "statement.pdf").write_text("%PDF", encoding="utf-8")
+
+    assert detect_format(str(tmp_path / "statement.bin")) == "xlsx"
+    assert detect_format(str(tmp_path / "statement.dat")) == "ofx"
+    assert detect_format(str(tmp_path / "statement.xml")) == "ofx"
+    assert detect_format(str(tmp_path / "statement.qif")) == "qif"
+    assert detect_format(str(tmp_path / "statement.csv")) == "csv"
+    with pytest.raises(SchemaError):
+        detect_format(str(tmp_path / "statement.pdf"))
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "cp1251"])
+def test_read_csv(tmp_path: Path, statement_df: pandas.DataFrame, encoding: str) -> None:
+    path = tmp_path / "statement.csv"
+    statement_df.to_csv(path, sep=";", decimal=",", index=False, encoding=encoding)
+
+    statement = read_operations_file(str(path))
+
+    pandas.testing.assert_frame_equal(
+        statement.astype(object), statement_df.astype(object), check_dtype=False, check_exact=False
+    )
+    assert isinstance(statement["Статус"].dtype, pandas.CategoricalDtype)
+
+    statement = read_operations_file(str(path), ["Дата операции", "Сумма операции", SOURCE_COLUMN])
+    assert list(statement.columns) == ["Дата операции", "Сумма операции"]
+    assert statement["Сумма операции"].tolist() == statement_df["Сумма операции"].tolist()
+
+
+def test_read_ofx(tmp_path: Path) -> None:
+    path = tmp_path / "statement.ofx"
+    path.write_text(OFX_SGML, encoding="cp1251")
+
+    statement = read_operations_file(str(path))
+
+    assert list(statement.columns) == list(OPERATIONS_SCHEMA)
+    assert statement["Дата операции"].tolist() == ["31.12.2021 00:12:53", "30.12.2021 12:00:00"]
+    assert statement["Дата платежа"].tolist() == ["31.12.2021", "30.12.2021"]
+    assert statement["Номер карты"].tolist() == ["*7197", "*7197"]
+    assert statement["Сумма операции"].tolist() == [-160.89, 500.0]
+    assert statement["Валюта операции"].tolist() == ["RUB", "RUB"]
+    assert statement["Описание"].tolist() == ["Колхоз & Ко", "Пополнение"]
+    assert statement["MCC"].tolist()[0] == 5411
+    assert statement["Категория"].isna().all()
+
+    path.write_text(OFX_XML, encoding="utf-8")
+    statement = read_operations_file(str(path), ["Дата операции", "Валюта платежа", "Описание"])
+
+    assert statement.to_dict("records") == [
+        {"Дата операции": "01.12.2021 00:00:00", "Валюта платежа": "USD", "Описание": "Coffee"}
+    ]
+
+
+def test_read_ofx_chunks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "statement.ofx"
+    path.write_text(OFX_SGML, encoding="cp1251")
+    expected = read_operations_file(str(path))
+
+    # Теги разрезаются границами блоков потокового чтения
+    monkeypatch.setattr("src.parsers.OFX_CHUNK_SIZE", 7)
+    pandas.testing.assert_frame_equal(read_operations_file(str(path)), expected)
+
+
+def test_read_qif(tmp_path: Path) -> None:
+    path = tmp_path / "statement.qif"
+    path.write_text(QIF, encoding="cp1251")
+
+    statement = read_operations_file(str(path))
+
+    assert statement["Дата операции"].tolist() == ["31.12.2021 00:00:00", "30.12.2021 00:00:00"]
+    assert statement["Сумма операции"].tolist() == [-1234.5, 500.0]
+    assert statement["Категория"].tolist()[0] == "Супермаркеты"
+    assert statement["Описание"].tolist() == ["Колхоз", "Пополнение"]
+    assert statement["Валюта операции"].tolist() == ["RUB", "RUB"]
+
+
+def test_get_transactions_df_mixed_formats(tmp_path: Path, statement_df: pandas.DataFrame) -> None:
+    statement_df.to_excel(tmp_path / "card_4556.xlsx", index=False)
+    write_csv(statement_df, str(tmp_path / "card_4556_copy.csv"))
+    (tmp_path / "account.ofx").write_text(OFX_SGML, encoding="cp1251")
+    (tmp_path / "cash.qif").write_text(QIF, encoding="utf-8")
+
+    assert len(get_statement_paths(str(tmp_path))) == 4
+
+    # Выгрузка CSV повторяет операции EXCEL - файла, дубликаты удаляются
+    transactions = get_transactions_df_from_sources(str(tmp_path), max_workers=1)
+    assert len(transactions) == len(statement_df) + 4
+
+    normalized = get_transactions_df(str(tmp_path), columns=["Дата операции", "Сумма операции"])
+    assert normalized["Дата операции"].dtype == "datetime64[ns]"
+    assert normalized["Дата операции"].is_monotonic_decreasing
+    assert set(normalized[SOURCE_COLUMN]) == {"card_4556", "account", "cash"}
+
+    single = get_transactions_df(str(tmp_path / "account.ofx"), columns=["Сумма операции"])
+    assert single["Сумма операции"].tolist() == [-160.89, 500.0]
@@ -0,0 +1,129 @@
+import json
+from datetime import date
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas
+import pytest
+
+from src.fx import FxRateStore
+from src.portfolio import PriceHistoryStore, get_monthly_savings, simulate_portfolio, update_price_history
+from src.quotes import ALPHA_VANTAGE_TIMEOUT
+from src.services import investment_bank
+
+
+@pytest.fixture
+def price_history() -> PriceHistoryStore:
+    return PriceHistoryStore(
+        pandas.DataFrame(
+            {
+                "date": ["2021-10-29", "2021-11-30", "2021-12-31", "2021-11-30", "2021-12-31"],
+                "symbol": ["AAPL", "AAPL", "AAPL", "AMZN", "AMZN"],
+                "close": [150.0, 165.0, 177.0, 3500.0, 3334.0],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def savings_transactions() -> pandas.DataFrame:
+    generator = np.random.default_rng(1)
+    rows = 300
+    return pandas.DataFrame(
+        {
+            "Дата операции": pandas.Timestamp("2021-09-01")
+            + pandas.to_timedelta(generator.integers(0, 120, rows), unit="D"),
+            "Сумма операции": -np.round(generator.uniform(1, 3000, rows), 2),
+        }
+    )
+
+
+def test_get_monthly_savings(savings_transactions: pandas.DataFrame) -> None:
+    savings = get_monthly_savings(savings_transactions, (10, 50, 100))
+    transactions_list = pandas.DataFrame(
+        {
+            "Дата операции": savings_transactions["Дата операции"].dt.strftime("%Y-%m-%d"),
+            "Сумма операции": savings_transactions["Сумма операции"],
+        }
+    ).to_dict("records")
+
+    assert list(savings.index.strftime("%Y-%m")) == ["2021-09", "2021-10", "2021-11", "2021-12"]
+    for month, row in savings.iterrows():
+        for limit in savings.columns:
+            expected = json.loads(investment_bank(month.strftime("%Y-%m"), transactions_list, limit))
+            assert row[limit] == pytest.approx(expected["amount_saved"], abs=0.01)
+
+
+def test_get_prices(price_history: PriceHistoryStore) -> None:
+    dates = np.array(["2021-09-30", "2021-11-15", "2021-12-31", "2022-01-31"], dtype="datetime64[D]")
+    prices = price_history.get_prices(["AAPL", "AMZN", "GOOGL"], dates)
+
+    np.testing.assert_array_equal(prices[:, 0], [np.nan, 150.0, 177.0, 177.0])
+    np.testing.assert_array_equal(prices[:, 1], [np.nan, np.nan, 3334.0, 3334.0])
+    assert np.isnan(prices[:, 2]).all()
+
+
+def test_simulate_portfolio(savings_transactions: pandas.DataFrame, price_history: PriceHistoryStore) -> None:
+    savings = get_monthly_savings(savings_transactions, (10, 100))
+    fx_rates = FxRateStore(pandas.DataFrame({"date": ["2021-09-01"], "currency": ["USD"], "rate": [75.0]}))
+    result = simulate_portfolio(savings, ["AAPL", "AMZN"], price_history, fx_rates)
+
+    # Расчет по месяцам в цикле: сентябрь - цен нет, деньги; октябрь - только AAPL; ноябрь, декабрь - поровну
+    month_prices = {"2021-10": {"AAPL": 150.0}, "2021-11": {"AAPL": 165.0, "AMZN": 3500.0}}
+    month_prices["2021-12"] = {"AAPL": 177.0, "AMZN": 3334.0}
+    for row, limit in enumerate(savings.columns):
+        shares = {"AAPL": 0.0, "AMZN": 0.0}
+        cash = 0.0
+        for month, amount in zip(savings.index.strftime("%Y-%m"), savings[limit]):
+            prices = month_prices.get(month, {})
+            if not prices:
+                cash += amount
+            for stock, price in prices.items():
+                shares[stock] += amount / len(prices) / (price * 75.0)
+
+        assert result["shares"][row] == pytest.approx([shares["AAPL"], shares["AMZN"]])
+        assert result["cash"][row] == pytest.approx(cash)
+        assert result["invested"][row][-1] == pytest.approx(savings[limit].sum())
+        assert result["value"][row][-1] == pytest.approx(
+            cash + (shares["AAPL"] * 177.0 + shares["AMZN"] * 3334.0) * 75.0
+        )
+
+
+@patch("requests.get")
+def test_update_price_history(mock_get: Mock, tmp_path: Path, price_history: PriceHistoryStore) -> None:
+    path = str(tmp_path / "stock_history.csv")
+    price_history.to_csv(path)
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {
+        "Monthly Time Series": {"2022-01-31": {"4. close": "174.78"}, "2021-12-31": {"4. close": "177.57"}}
+    }
+
+    updated = update_price_history(["AAPL", "AMZN"], path)
+
+    assert mock_get.call_count == 2
+    assert "TIME_SERIES_MONTHLY" in mock_get.call_args_list[0].args[0]
+    assert mock_get.call_args_list[0].kwargs["timeout"] == ALPHA_VANTAGE_TIMEOUT
+    reloaded = PriceHistoryStore.from_csv(path)
+    assert len(reloaded.prices) == len(updated.prices) == 7
+    assert reloaded.get_prices(["AAPL"], np.array(["2021-12-31"], dtype="datetime64[D]"))[0, 0] == 177.57
+
+    # Свежие ряды повторно не запрашиваются
+    mock_get.reset_mock()
+    reloaded.fetch(["AAPL", "AMZN"], stale_before=date(2022, 1, 1))
+    mock_get.assert_not_called()
+
+
+def test_simulate_portfolio_default_fx_rates(
+    savings_transactions: pandas.DataFrame, price_history: PriceHistoryStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    savings = get_monthly_savings(savings_transactions, (10,))
+    fx_rates = FxRateStore(pandas.DataFrame({"date": ["2021-11-01"], "currency": ["USD"], "rate": [75.0]}))
+    monkeypatch.setattr("src.portfolio.get_fx_rate_store", lambda: fx_rates)
+
+    result = simulate_portfolio(savings, ["AAPL"], price_history)
+
+    # Курс по умолчанию берется из файла курсов: в октябре курса еще нет, сумма остается деньгами
+    np.testing.assert_array_equal(np.isnan(result["prices"][:, 0]), [True, True, False, False])
+    assert result["prices"][-1, 0] == 177.0 * 75.0
+    assert result["cash"][0] == pytest.approx(savings[10].iloc[:2].sum())
@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import numpy as np
+import pandas
+import pytest
+
+from src.query import TransactionQuery, get_period_bounds
+from src.schema import normalize_transactions
+
+
+@pytest.fixture
+def transactions(transactions_df_persons: pandas.DataFrame) -> pandas.DataFrame:
+    return normalize_transactions(transactions_df_persons)[0]
+
+
+@pytest.fixture
+def query(transactions: pandas.DataFrame) -> TransactionQuery:
+    return TransactionQuery(transactions)
+
+
+def test_get_period_bounds() -> None:
+    dates = np.array(["2021-12-01", "2021-12-02", "2021-12-03", "2021-12-04"], dtype="datetime64[ns]")
+    start, stop = datetime(2021, 12, 2), datetime(2021, 12, 3)
+
+    assert get_period_bounds(dates, start, stop) == (1, 3)
+    assert get_period_bounds(dates[::-1], start, stop) == (1, 3)
+    assert get_period_bounds(dates, None, stop) == (0, 3)
+    assert get_period_bounds(dates[[2, 0, 3, 1]], start, stop) is None
+    assert get_period_bounds(dates[:0], start, stop) == (0, 0)
+    assert get_period_bounds(dates[::-1], start, stop, order=-1) == (1, 3)
+
+
+def test_query_frame_changed_in_place(transactions: pandas.DataFrame) -> None:
+    transactions = transactions.sort_values("Дата операции", ascending=False, ignore_index=True)
+    start, stop = datetime(2021, 12, 1), datetime(2021, 12, 31, 12)
+    query = TransactionQuery(transactions).period(start, stop)
+
+    def expected_count() -> int:
+        dates = transactions["Дата операции"]
+        return int(((dates >= start) & (dates <= stop)).sum())
+
+    assert len(query.collect()) == expected_count()
+
+    transactions.sort_values("Дата операции", inplace=True, ignore_index=True)
+    assert len(query.collect()) == expected_count()
+
+    transactions["Дата операции"] = transactions["Дата операции"].to_numpy()[::-1]
+    assert len(query.collect()) == expected_count()
+
+
+def test_query_is_lazy_and_immutable(query: TransactionQuery) -> None:
+    spends = query.status("OK").spends()
+
+    assert query.conditions == []
+    assert spends.conditions == [("Статус", "==", "OK"), ("Сумма операции", "<", 0)]
+    assert query.card(None) is query
+    assert spends.card("*7197").explain() == (
+        "scan -> filter Статус == 'OK' -> filter Сумма операции < 0 -> filter Номер карты == '*7197'"
+    )
+
+
+@pytest.mark.parametrize("order", [slice(None), slice(None, None, -1)])
+def test_query_filters_match_mask(transactions: pandas.DataFrame, order: slice) -> None:
+    transactions = transactions.sort_values("Дата операции", kind="stable").iloc[order]
+    start, stop = datetime(2021, 12, 1), datetime(2021, 12, 31, 12)
+
+    result = TransactionQuery(transactions).period(start, stop).status("OK").card("*7197").spends().collect()
+    expected = transactions[
+        (transactions["Дата операции"] >= start)
+        & (transactions["Дата операции"] <= stop)
+        & (transactions["Статус"] == "OK")
+        & (transactions["Номер карты"] == "*7197")
+        & (transactions["Сумма операции"] < 0)
+    ].reset_index(drop=True)
+
+    assert len(result) > 0
+    pandas.testing.assert_frame_equal(result, expected)
+
+
+def test_query_period_by_datetime_index(transactions: pandas.DataFrame) -> None:
+    transactions = transactions.set_index("Дата операции", drop=False).sort_index()
+    start, stop = datetime(2021, 12, 2), datetime(2021, 12, 31)
+
+    result = TransactionQuery(transactions).period(start).period(stop=stop).collect()
+
+    assert isinstance(result.index, pandas.DatetimeIndex)
+    pandas.testing.assert_frame_equal(result, transactions.loc[start:stop])
+
+
+def test_query_group_by_agg(query: TransactionQuery, transactions: pandas.DataFrame) -> None:
+    result = (
+        query.status("OK")
+        .spends()
+        .group_by("Категория")
+        .agg(total_spent=("Сумма операции", "sum"), count=("Сумма операции", "count"))
+        .collect()
+    )
+    spends = transactions[(transactions["Статус"] == "OK") & (transactions["Сумма операции"] < 0)]
+
+    assert list(result.columns) == ["Категория", "total_spent", "count"]
+    assert result.set_index("Категория")["total_spent"].to_dict() == pytest.approx(
+        spends.groupby("Категория", observed=True)["Сумма операции"].sum().to_dict()
+    )
+    assert query.spends().agg(count=("Сумма операции", "count")).collect()["count"].tolist() == [
+        int((transactions["Сумма операции"] < 0).sum())
+    ]
+
+
+def test_query_matches_select(query: TransactionQuery) -> None:
+    result = query.category("Переводы").matches("Описание", r"[А-ЯЁ][а-яе]+ [А-ЯЁ]\.").select("Описание").collect()
+
+    assert list(result.columns) == ["Описание"]
+    assert result["Описание"].tolist() == ["Константин Л.", "Константин Л."]
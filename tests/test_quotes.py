@@ -0,0 +1,99 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.quotes import QuoteScheduler, TokenBucket, get_quote_scheduler
+from src.stub_server import StubServer
+from src.utils import get_stock_prices
+
+
+def quote_response(price: str) -> Mock:
+    response = Mock()
+    response.status_code = 200
+    response.json.return_value = {"Global Quote": {"05. price": price}}
+    return response
+
+
+def test_token_bucket() -> None:
+    bucket = TokenBucket(2, 60.0)
+    bucket.take()
+    bucket.take()
+    assert 29 < bucket.wait_time() <= 30
+
+    bucket = TokenBucket(1, 0.05)
+    bucket.take()
+    time.sleep(0.06)
+    assert bucket.wait_time() == 0
+
+
+@patch("requests.get")
+def test_quote_scheduler_deduplicates_and_caches(mock_get: Mock) -> None:
+    mock_get.return_value = quote_response("150.00")
+    scheduler = QuoteScheduler()
+
+    quotes = scheduler.get_quotes(["AAPL", "AMZN", "AAPL"])
+    assert {symbol: quote["price"] for symbol, quote in quotes.items()} == {"AAPL": "150.00", "AMZN": "150.00"}
+    assert mock_get.call_count == 2
+
+    # Свежие котировки отдаются без запроса
+    assert scheduler.get_quotes(["AMZN"])["AMZN"]["stale"] is False
+    assert mock_get.call_count == 2
+
+
+def test_quote_scheduler_coalesces_in_flight_requests() -> None:
+    def slow_get(url: str, timeout: Any = None) -> Mock:
+        time.sleep(0.1)
+        return quote_response("150.00")
+
+    scheduler = QuoteScheduler()
+    results: list[dict[str, Any]] = []
+
+    with patch("requests.get", side_effect=slow_get) as mock_get:
+        threads = [threading.Thread(target=lambda: results.append(scheduler.get_quotes(["AAPL"]))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert mock_get.call_count == 1
+    assert [result["AAPL"]["price"] for result in results] == ["150.00"] * 5
+
+
+@patch("requests.get")
+def test_quote_scheduler_throttled(mock_get: Mock, tmp_path: Path) -> None:
+    path_to_cache = str(tmp_path / "stock_prices.json")
+    mock_get.return_value = quote_response("150.00")
+    QuoteScheduler(path_to_cache=path_to_cache).get_quotes(["AAPL"])
+
+    # Ответ API о превышении лимита - отдается последняя котировка из файла
+    mock_get.return_value.json.return_value = {"Note": "Thank you for using Alpha Vantage!"}
+    scheduler = QuoteScheduler(ttl=0, path_to_cache=path_to_cache)
+    quotes = scheduler.get_quotes(["AAPL", "TSLA"])
+    assert quotes == {"AAPL": {"price": "150.00", "timestamp": pytest.approx(time.time(), abs=5), "stale": True}}
+
+    # Локальный лимит исчерпан - запрос не выполняется
+    mock_get.reset_mock()
+    scheduler = QuoteScheduler(rate_limits=((1, 60.0),), ttl=0, path_to_cache=path_to_cache)
+    scheduler.get_quotes(["AAPL"])
+    assert scheduler.get_quotes(["AAPL"])["AAPL"]["stale"] is True
+    assert mock_get.call_count == 1
+
+
+def test_get_stock_prices_rate_limited() -> None:
+    user_settings = {"user_currencies": [], "user_stocks": ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]}
+
+    with StubServer(rate_limit=3) as stub_server, patch.dict(
+        "os.environ", {"ALPHA_VANTAGE_BASE_URL": stub_server.url}
+    ):
+        # Сервер отвечает о превышении лимита на 4-й и 5-й запросы, у этих тикеров нет котировок
+        first = get_stock_prices(user_settings)
+        assert len(first) == 3
+
+        # Лимит 5 запросов в минуту исчерпан - котировки отдаются из кэша без запросов
+        get_quote_scheduler().ttl = 0
+        assert get_stock_prices(user_settings) == first
+        assert stub_server.requests_count == 5
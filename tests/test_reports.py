@@ -1,14 +1,23 @@
 import json
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable
 
 import pandas
+import pytest
 
-from src.reports import spending_by_weekday
+from src.main import print_report_result
+from src.reports import (REPORTS, report, report_writer, run_report, spending_by_weekday, spending_forecast,
+                         spending_trend)
+from src.storage import TransactionStorage
 
 
 def test_spending_by_weekday(
-    transactions_df_persons: pandas.DataFrame, transactions_empty_df: pandas.DataFrame
+    transactions_df_persons: pandas.DataFrame,
+    transactions_empty_df: pandas.DataFrame,
+    make_storage: Callable[[pandas.DataFrame], TransactionStorage],
 ) -> None:
-    assert spending_by_weekday(transactions_df_persons, "2022-01-31") == json.dumps(
+    expected = json.dumps(
         {
             "Sunday": 0,
             "Monday": 0,
@@ -19,6 +28,103 @@ def test_spending_by_weekday(
             "Saturday": 0,
         }
     )
-    assert spending_by_weekday(transactions_empty_df, "2021-01-21") == json.dumps(
+    assert spending_by_weekday(transactions_df_persons, "2022-01-31") == expected
+    assert spending_by_weekday(make_storage(transactions_df_persons), "2022-01-31") == expected
+    assert spending_by_weekday(make_storage(transactions_empty_df), "2021-01-21") == json.dumps(
         {"Sunday": 0, "Monday": 0, "Tuesday": 0, "Wednesday": 0, "Thursday": 0, "Friday": 0, "Saturday": 0}
     )
+
+
+def test_spending_by_weekday_months(
+    transactions_df_persons: pandas.DataFrame, make_storage: Callable[[pandas.DataFrame], TransactionStorage]
+) -> None:
+    assert spending_by_weekday(make_storage(transactions_df_persons), "2022-01-30", months=1) == json.dumps(
+        {"Sunday": 0, "Monday": 0, "Tuesday": 0, "Wednesday": 0, "Thursday": 20000.0, "Friday": 800.0, "Saturday": 0}
+    )
+
+
+def test_spending_trend(transactions_df_persons: pandas.DataFrame, transactions_empty_df: pandas.DataFrame) -> None:
+    assert spending_trend(transactions_df_persons, "M", 3) == json.dumps(
+        [{"date": "2021-12-01", "spend": 21198.29, "rolling_mean": 21198.29, "cumulative": 21198.29}]
+    )
+    assert spending_trend(transactions_empty_df) == json.dumps([])
+
+
+def test_spending_forecast(transactions_df_persons: pandas.DataFrame, transactions_empty_df: pandas.DataFrame) -> None:
+    forecast = json.loads(spending_forecast(transactions_df_persons))
+
+    assert forecast["month"] == "2022-01"
+    assert forecast["categories"][0] == {"category": "Переводы", "seasonal_naive": 20800.0, "ses": 20800.0}
+    assert forecast["cards"] == [
+        {"card": "1", "seasonal_naive": 20800.0, "ses": 20800.0},
+        {"card": "*7197", "seasonal_naive": 398.29, "ses": 398.29},
+    ]
+    assert json.loads(spending_forecast(transactions_empty_df)) == {"month": None, "categories": [], "cards": []}
+
+
+def test_report_writes_file(transactions_df_persons: pandas.DataFrame, reports_dir: Path) -> None:
+    # Прямой вызов отчета файл не записывает
+    spending_by_weekday(transactions_df_persons, "2022-01-31")
+    report_writer.flush()
+    assert not (reports_dir / "spending_by_weekday.json").exists()
+
+    result = run_report("spending_by_weekday", transactions_df_persons, "2022-01-31").result()
+    report_writer.flush()
+
+    assert (reports_dir / "spending_by_weekday.json").read_text(encoding="utf-8") == result
+
+
+def test_report_csv_format(reports_dir: Path) -> None:
+    @report(file_name="weekly.csv", file_format="csv")
+    def weekly_report() -> str:
+        return json.dumps([{"week": "2021-12-06", "spend": 10.5}, {"week": "2021-12-13", "spend": 3.0}])
+
+    run_report("weekly_report").result()
+    report_writer.flush()
+
+    assert "weekly_report" in REPORTS
+    assert pandas.read_csv(reports_dir / "weekly.csv").to_dict("records") == [
+        {"week": "2021-12-06", "spend": 10.5},
+        {"week": "2021-12-13", "spend": 3.0},
+    ]
+
+    with pytest.raises(ValueError):
+        report(file_format="xml")
+
+
+def test_report_parquet_format(reports_dir: Path) -> None:
+    pytest.importorskip("pyarrow")
+
+    @report(file_format="parquet")
+    def parquet_report() -> str:
+        return json.dumps([{"category": "Супермаркеты", "spend": 10.5}])
+
+    run_report("parquet_report").result()
+    report_writer.flush()
+
+    assert pandas.read_parquet(reports_dir / "parquet_report.parquet").to_dict("records") == [
+        {"category": "Супермаркеты", "spend": 10.5}
+    ]
+
+
+def test_run_report(transactions_df_persons: pandas.DataFrame, reports_dir: Path) -> None:
+    future = run_report("spending_trend", transactions_df_persons, "M", 1)
+
+    assert json.loads(future.result())[0]["spend"] == 21198.29
+    report_writer.flush()
+    assert (reports_dir / "spending_trend.json").exists()
+
+    with pytest.raises(KeyError):
+        run_report("unknown_report")
+
+
+def test_print_report_result(capsys: pytest.CaptureFixture) -> None:
+    done: Future = Future()
+    done.set_result("[]")
+    failed: Future = Future()
+    failed.set_exception(ValueError("нет данных"))
+
+    print_report_result(done)
+    print_report_result(failed)
+
+    assert capsys.readouterr().out == "[]\nОшибка формирования отчета: нет данных\n"
@@ -0,0 +1,78 @@
+from unittest.mock import Mock, patch
+
+import pandas
+import pytest
+
+from src.schema import SchemaError, format_transactions, get_operation_dates, normalize_transactions
+from src.utils import get_transactions_list_for_period
+
+
+def test_normalize_transactions(transactions_df_persons: pandas.DataFrame) -> None:
+    normalized, bad_rows = normalize_transactions(transactions_df_persons)
+
+    assert normalized["Дата операции"].dtype == "datetime64[ns]"
+    assert normalized["Дата операции"].iloc[-1] == pandas.Timestamp("2021-12-30 22:22:03")
+    assert isinstance(normalized["Статус"].dtype, pandas.CategoricalDtype)
+    assert isinstance(normalized["Номер карты"].dtype, pandas.CategoricalDtype)
+    assert normalized["Кэшбэк"].dtype == float
+    assert normalized["Бонусы (включая кэшбэк)"].dtype == "Int64"
+    assert normalized["Номер карты"].tolist()[-1] == "1"
+    assert bad_rows.empty
+
+    # Повторная нормализация не выполняется
+    assert normalize_transactions(normalized)[0] is normalized
+    assert get_operation_dates(normalized) is normalized["Дата операции"]
+
+
+def test_normalize_transactions_bad_rows(transactions_df: pandas.DataFrame) -> None:
+    transactions = transactions_df.astype({"Дата операции": object, "Сумма операции": object, "MCC": object})
+    transactions.loc[0, "Дата операции"] = "32.12.2021 10:00:00"
+    transactions.loc[1, "Сумма операции"] = "сто"
+    transactions.loc[2, "MCC"] = "нет"
+
+    normalized, bad_rows = normalize_transactions(transactions)
+
+    assert bad_rows.to_dict("records") == [
+        {"row": 0, "column": "Дата операции", "value": "32.12.2021 10:00:00"},
+        {"row": 1, "column": "Сумма операции", "value": "сто"},
+        {"row": 2, "column": "MCC", "value": "нет"},
+    ]
+    # Строки без даты или суммы отбрасываются, остальные ошибки заменяются пропусками
+    assert len(normalized) == len(transactions) - 2
+    assert pandas.isna(normalized.loc[0, "MCC"])
+
+
+def test_normalize_transactions_missing_columns(transactions_df: pandas.DataFrame) -> None:
+    with pytest.raises(SchemaError, match="Статус"):
+        normalize_transactions(transactions_df.drop(columns=["Статус"]))
+
+
+def test_normalize_transactions_columns(transactions_df_persons: pandas.DataFrame) -> None:
+    transactions = transactions_df_persons[["Дата операции", "Статус", "Номер карты"]].astype({"Статус": "category"})
+    transactions["Номер карты"] = pandas.Categorical([7197, 7197, 7197, 7197, 1, 1])
+
+    normalized, bad_rows = normalize_transactions(transactions, ["Дата операции", "Статус", "Номер карты"])
+
+    assert list(normalized.columns) == ["Дата операции", "Статус", "Номер карты"]
+    assert normalized["Статус"].tolist() == ["OK"] * 6
+    assert normalized["Номер карты"].cat.categories.tolist() == ["1", "7197"]
+    assert bad_rows.empty
+    with pytest.raises(SchemaError, match="Сумма операции"):
+        normalize_transactions(transactions, ["Дата операции", "Сумма операции"])
+
+
+def test_format_transactions(transactions_df_persons: pandas.DataFrame) -> None:
+    normalized = normalize_transactions(transactions_df_persons)[0]
+
+    records = format_transactions(normalized)
+    assert records[-1]["Дата операции"] == "30.12.2021 22:22:03"
+    assert records[0]["Кэшбэк"] is None
+    assert format_transactions(normalized, date_format=None)[-1]["Дата операции"] == pandas.Timestamp(
+        "2021-12-30 22:22:03"
+    )
+
+
+@patch("pandas.read_excel")
+def test_get_transactions_list_for_period_schema_error(mock_read: Mock, transactions_df: pandas.DataFrame) -> None:
+    mock_read.return_value = transactions_df.drop(columns=["Сумма операции"])
+    assert get_transactions_list_for_period("2021-12-02 23:40:34", "data/operations.xlsx") == []
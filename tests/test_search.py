@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import numpy as np
+import pandas
+import pytest
+
+from src.search import TransactionSearchIndex, get_search_index, tokenize
+
+
+def make_transactions(rows: list[tuple[str, str, str]]) -> pandas.DataFrame:
+    return pandas.DataFrame(rows, columns=["Дата операции", "Описание", "Категория"])
+
+
+def test_tokenize() -> None:
+    assert tokenize("Яндекс.Такси, ЁЛКИ-палки 2021") == ["яндекс", "такси", "елки", "палки", "2021"]
+
+
+def test_search_index() -> None:
+    index = TransactionSearchIndex()
+    index.add(
+        make_transactions(
+            [
+                ("15.03.2021 10:00:00", "Яндекс Такси", "Такси"),
+                ("20.03.2021 10:00:00", "Яндекс Еда", "Фастфуд"),
+                ("05.01.2022 10:00:00", "Яндекс Такси", "Такси"),
+                ("06.01.2022 10:00:00", "Ситимобил", None),
+            ]
+        )
+    )
+
+    assert index.search("Яндекс Такси").tolist() == [0, 2]
+    assert index.search("яндекс такси", start="2021-01-01", stop="2021-12-31").tolist() == [0]
+    assert index.search("янд").tolist() == [0, 1, 2]
+    assert index.search("янд", prefix=False).tolist() == []
+    assert index.search("фастфуд").tolist() == [1]
+    assert index.search("", start="2022-01-06").tolist() == [3]
+
+    index.add(make_transactions([("07.01.2022 10:00:00", "Яндекс Такси", "Такси")]))
+    assert index.search("такси").tolist() == [0, 2, 4]
+
+
+def test_get_search_index_persisted(tmp_path: Path) -> None:
+    path_to_index = str(tmp_path / "operations.xlsx.index.npz")
+    transactions = make_transactions(
+        [("15.03.2021 10:00:00", "Яндекс Такси", "Такси"), ("20.03.2021 10:00:00", "Магнит", "Супермаркеты")]
+    )
+
+    get_search_index(transactions.iloc[:1], path_to_index)
+    index = get_search_index(transactions, path_to_index)
+    assert len(index) == 2
+    assert index.search("магнит").tolist() == [1]
+
+    assert len(TransactionSearchIndex.load(path_to_index)) == 2
+
+    # Индекс длиннее данных перестраивается
+    assert len(get_search_index(transactions.iloc[:1], path_to_index)) == 1
+
+
+def test_get_search_index_changed_statement(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    path_to_index = str(tmp_path / "operations.xlsx.index.npz")
+    transactions = make_transactions(
+        [("20.03.2021 10:00:00", "Магнит", "Супермаркеты"), ("15.03.2021 10:00:00", "Яндекс Такси", "Такси")]
+    )
+    get_search_index(transactions, path_to_index)
+
+    # Новая операция в начале выписки (сортировка от новых к старым) дописывается в индекс без перестроения
+    refreshed = pandas.concat(
+        [make_transactions([("21.03.2021 10:00:00", "Пятерочка", "Супермаркеты")]), transactions], ignore_index=True
+    )
+    with caplog.at_level("WARNING", logger="search"):
+        index = get_search_index(refreshed, path_to_index)
+    assert "перестроен" not in caplog.text
+    assert index.search("магнит").tolist() == [1]
+    assert index.search("такси").tolist() == [2]
+    assert index.search("пятерочка").tolist() == [0]
+    assert len(TransactionSearchIndex.load(path_to_index)) == 3
+
+    # Выписка заменена другой с тем же числом операций
+    replaced = make_transactions(
+        [
+            ("22.03.2021 10:00:00", "Лента", "Супермаркеты"),
+            ("21.03.2021 10:00:00", "Ситидрайв", "Каршеринг"),
+            ("20.03.2021 10:00:00", "Магнит", "Супермаркеты"),
+        ]
+    )
+    with caplog.at_level("WARNING", logger="search"):
+        index = get_search_index(replaced, path_to_index)
+    assert "перестроен" in caplog.text
+    assert index.search("магнит").tolist() == [2]
+    assert index.search("такси").tolist() == []
+    assert index.search("ситидрайв").tolist() == [1]
+
+
+def test_search_index_file_without_pickle(tmp_path: Path) -> None:
+    path_to_index = str(tmp_path / "operations.xlsx.index.npz")
+    transactions = make_transactions(
+        [("20.03.2021 10:00:00", "Магнит", "Супермаркеты"), ("15.03.2021 10:00:00", "Яндекс Такси", "Такси")]
+    )
+    get_search_index(transactions, path_to_index)
+
+    # Файл индекса читается без pickle, строки индекса упорядочены по дате операции
+    with np.load(path_to_index, allow_pickle=False) as data:
+        assert sorted(data.files) == ["dates", "fingerprints", "offsets", "rows", "tokens"]
+    loaded = TransactionSearchIndex.load(path_to_index)
+    assert loaded.search("такси").tolist() == [0]
+    assert loaded.search("магнит").tolist() == [1]
@@ -1,10 +1,19 @@
 import json
+from pathlib import Path
+from typing import Any
 from unittest.mock import Mock, patch
 
 import pandas
 import pytest
 
-from src.services import get_transactions_to_persons, investment_bank
+from src.budgets import Budget
+from src.cashback import CashbackProgram
+from src.fx import FxRateStore
+from src.portfolio import MarketDataError, PriceHistoryStore
+from src.schema import normalize_transactions
+from src.services import (get_anomalous_transactions, get_best_cashback_program, get_budget_alerts,
+                          get_card_balances, get_investment_portfolio, get_recurring_payments,
+                          get_transactions_to_persons, investment_bank, search_transactions)
 
 
 @patch("pandas.read_excel")
@@ -23,9 +32,9 @@ def test_get_transactions_to_persons(
                 "Валюта операции": "RUB",
                 "Сумма платежа": -800.0,
                 "Валюта платежа": "RUB",
-                "Кэшбэк": "1",
+                "Кэшбэк": 1.0,
                 "Категория": "Переводы",
-                "MCC": "1",
+                "MCC": 1.0,
                 "Описание": "Константин Л.",
                 "Бонусы (включая кэшбэк)": 0,
                 "Округление на инвесткопилку": 0,
@@ -40,9 +49,9 @@ def test_get_transactions_to_persons(
                 "Валюта операции": "RUB",
                 "Сумма платежа": -20000.0,
                 "Валюта платежа": "RUB",
-                "Кэшбэк": "1",
+                "Кэшбэк": 1.0,
                 "Категория": "Переводы",
-                "MCC": "1",
+                "MCC": 1.0,
                 "Описание": "Константин Л.",
                 "Бонусы (включая кэшбэк)": 0,
                 "Округление на инвесткопилку": 0,
@@ -68,3 +77,231 @@ def test_get_transactions_to_persons(
 def test_investment_bank(month: str, transactions_investment_list: list, limit: int, expected: dict) -> None:
     assert investment_bank(month, transactions_investment_list, limit) == json.dumps(expected)
     assert investment_bank("2021-12", [], 50) == json.dumps({"amount_saved": 0})
+
+
+def test_get_investment_portfolio(
+    transactions_investment_list: list, transactions_empty_df: pandas.DataFrame
+) -> None:
+    transactions = pandas.DataFrame(transactions_investment_list)
+    transactions["Дата операции"] = pandas.to_datetime(transactions["Дата операции"])
+    price_history = PriceHistoryStore(
+        pandas.DataFrame({"date": ["2021-11-30", "2021-12-31"], "symbol": ["AAPL", "AAPL"], "close": [40.0, 50.0]})
+    )
+
+    fx_rates = FxRateStore(pandas.DataFrame({"date": ["2021-12-01"], "currency": ["USD"], "rate": [80.0]}))
+
+    result = json.loads(
+        get_investment_portfolio(transactions, (50, 100), {"user_stocks": ["AAPL"]}, price_history, fx_rates)
+    )
+
+    assert result["valuation_date"] == "2021-12-31"
+    assert [portfolio["limit"] for portfolio in result["portfolios"]] == [50, 100]
+    portfolio = result["portfolios"][1]
+    assert portfolio["invested"] == 100.0 and portfolio["value"] == 100.0 and portfolio["profit"] == 0.0
+    # 100 рублей по цене 50 USD при курсе 80 рублей
+    assert portfolio["stocks"] == [{"stock": "AAPL", "shares": 0.025, "value": 100.0}]
+    assert portfolio["cash"] == 0.0
+    assert portfolio["months"] == [{"month": "2021-12", "invested": 100.0, "value": 100.0}]
+
+    # Без курса USD или цен акций результат не считается: все суммы остались бы деньгами
+    with pytest.raises(MarketDataError, match="USD"):
+        get_investment_portfolio(transactions, (100,), {"user_stocks": ["AAPL"]}, price_history, FxRateStore())
+    with pytest.raises(MarketDataError, match="AMZN"):
+        get_investment_portfolio(transactions, (100,), {"user_stocks": ["AMZN"]}, price_history, fx_rates)
+    assert json.loads(get_investment_portfolio(transactions_empty_df, (50,), {}))["portfolios"] == []
+
+
+@patch("requests.get")
+def test_get_investment_portfolio_empty_caches(
+    mock_get: Mock, transactions_investment_list: list, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.portfolio.path_to_price_history", str(tmp_path / "stock_history.csv"))
+    monkeypatch.setattr("src.fx.path_to_fx_rates", str(tmp_path / "fx_rates.csv"))
+    transactions = pandas.DataFrame(transactions_investment_list)
+    transactions["Дата операции"] = pandas.to_datetime(transactions["Дата операции"])
+
+    def get(url: str, timeout: Any) -> Mock:
+        response = Mock(status_code=200)
+        if "TIME_SERIES_MONTHLY" in url:
+            response.json.return_value = {"Monthly Time Series": {"2021-11-30": {"4. close": "50.0"}}}
+        elif url.endswith("/2021/12/31/daily_json.js"):
+            response.json.return_value = {"Valute": {"USD": {"Value": 80.0, "Nominal": 1}}}
+        else:
+            response.status_code = 404
+        return response
+
+    mock_get.side_effect = get
+
+    portfolio = json.loads(get_investment_portfolio(transactions, (100,), {"user_stocks": ["AAPL"]}))["portfolios"][0]
+
+    # Цены и курс на конец месяца догружены и сохранены в кэши
+    assert portfolio["stocks"] == [{"stock": "AAPL", "shares": 0.025, "value": 100.0}]
+    assert portfolio["cash"] == 0.0
+    assert (tmp_path / "stock_history.csv").exists() and (tmp_path / "fx_rates.csv").exists()
+
+    # Кэши пусты, а сервисы недоступны
+    (tmp_path / "stock_history.csv").unlink()
+    (tmp_path / "fx_rates.csv").unlink()
+    mock_get.side_effect = None
+    mock_get.return_value = Mock(status_code=404)
+    mock_get.return_value.json.return_value = {}
+    with pytest.raises(MarketDataError):
+        get_investment_portfolio(transactions, (100,), {"user_stocks": ["AAPL"]})
+
+
+def test_get_anomalous_transactions(
+    transactions_df: pandas.DataFrame, transactions_empty_df: pandas.DataFrame
+) -> None:
+    anomalies = json.loads(get_anomalous_transactions(transactions_df, threshold=1.4, min_count=4))
+
+    assert anomalies == [
+        {
+            "date": "01.12.2021 23:40:34",
+            "amount": 199.0,
+            "card": "*7197",
+            "category": "Дом и ремонт",
+            "description": "Строитель",
+            "groups": ["Номер карты"],
+            "z_score": 1.42,
+        }
+    ]
+    assert get_anomalous_transactions(transactions_empty_df) == json.dumps([])
+
+
+def test_get_anomalous_transactions_no_card() -> None:
+    amounts = [100.0, 105.0, 95.0, 100.0, 102.0, 98.0, 101.0, 99.0, 100.0, 100.0, 5000.0]
+    transactions = pandas.DataFrame(
+        {
+            "Дата операции": [f"{day:02d}.12.2021 12:00:00" for day in range(1, len(amounts) + 1)],
+            "Номер карты": ["*7197"] * (len(amounts) - 1) + [None],
+            "Статус": "OK",
+            "Сумма операции": [-amount for amount in amounts],
+            "Категория": "Супермаркеты",
+            "Описание": "Магнит",
+        }
+    )
+
+    anomalies = get_anomalous_transactions(transactions, threshold=3.0, min_count=10)
+
+    assert "NaN" not in anomalies
+    assert json.loads(anomalies) == [
+        {
+            "date": "11.12.2021 12:00:00",
+            "amount": 5000.0,
+            "card": None,
+            "category": "Супермаркеты",
+            "description": "Магнит",
+            "groups": ["Категория"],
+            "z_score": 3.16,
+        }
+    ]
+
+
+def test_get_recurring_payments(transactions_empty_df: pandas.DataFrame) -> None:
+    transactions = pandas.DataFrame(
+        {
+            "Дата операции": [
+                "01.10.2021 10:00:00",
+                "31.10.2021 10:00:00",
+                "30.11.2021 10:00:00",
+                "30.12.2021 10:00:00",
+                "05.10.2021 12:00:00",
+                "06.10.2021 12:00:00",
+                "20.12.2021 12:00:00",
+                "01.11.2021 09:00:00",
+            ],
+            "Статус": "OK",
+            "Сумма операции": [-299.0, -299.0, -299.0, -299.0, -150.0, -900.0, -40.0, -299.0],
+            "Описание": [
+                "Яндекс Плюс",
+                "ЯНДЕКС ПЛЮС 123",
+                "Яндекс Плюс",
+                "Яндекс Плюс",
+                "Магнит",
+                "Магнит",
+                "Магнит",
+                "Яндекс Плюс",
+            ],
+            "MCC": [5815.0, 5815.0, 5815.0, 5815.0, 5411.0, 5411.0, 5411.0, 4121.0],
+        }
+    )
+
+    assert json.loads(get_recurring_payments(transactions)) == [
+        {
+            "description": "Яндекс Плюс",
+            "mcc": 5815,
+            "count": 4,
+            "average_amount": 299.0,
+            "interval_days": 30,
+            "last_date": "30.12.2021",
+            "next_date": "29.01.2022",
+        }
+    ]
+    assert get_recurring_payments(transactions_empty_df) == json.dumps([])
+
+
+@patch("src.services.get_operations_path")
+@patch("pandas.read_excel")
+def test_search_transactions(
+    mock_read_excel: Mock, mock_operations_path: Mock, transactions_df: pandas.DataFrame, tmp_path: Path
+) -> None:
+    mock_read_excel.return_value = transactions_df
+    mock_operations_path.return_value = str(tmp_path / "operations.xlsx")
+
+    found = json.loads(search_transactions("дик", start="2021-12-01", stop="2021-12-01"))
+    assert [operation["Описание"] for operation in found] == ["Дикси"]
+    assert (tmp_path / "operations.xlsx.index.npz").exists()
+
+    assert json.loads(search_transactions("Дикси", start="2021-12-02")) == []
+
+
+def test_get_best_cashback_program(
+    transactions_df_persons: pandas.DataFrame, transactions_empty_df: pandas.DataFrame
+) -> None:
+    transactions = normalize_transactions(transactions_df_persons)[0]
+    programs = [CashbackProgram("flat"), CashbackProgram("markets", category_rates={"Супермаркеты": 0.05})]
+
+    result = json.loads(get_best_cashback_program(transactions, programs))
+
+    assert result["best_program"] == "markets"
+    assert [program["program"] for program in result["programs"]] == ["markets", "flat"]
+    assert json.loads(get_best_cashback_program(transactions_empty_df, programs))["programs"] == []
+
+
+def test_get_budget_alerts(
+    transactions_df_persons: pandas.DataFrame, transactions_empty_df: pandas.DataFrame
+) -> None:
+    transactions = normalize_transactions(transactions_df_persons)[0]
+    budgets = [Budget("Карта *7197", 300.0, "day", card="*7197", thresholds=(1.0,))]
+
+    assert json.loads(get_budget_alerts(transactions, budgets)) == [
+        {
+            "budget": "Карта *7197",
+            "period_start": "2021-12-01",
+            "threshold": 1.0,
+            "spent": 398.29,
+            "limit": 300.0,
+            "date": "2021-12-01T23:40:34",
+        }
+    ]
+    assert get_budget_alerts(transactions_empty_df, budgets) == json.dumps([])
+
+
+def test_get_card_balances(transactions_df: pandas.DataFrame, transactions_empty_df: pandas.DataFrame) -> None:
+    transactions = transactions_df.copy()
+    transactions.loc[3, "Дата операции"] = pandas.Timestamp("2021-12-03 10:00:00")
+
+    result = json.loads(get_card_balances(transactions, "2021-12-02 12:00:00", 2, opening_balances={"*7197": 500}))
+
+    assert result == {
+        "date": "2021-12-02 12:00:00",
+        "cards": [
+            {
+                "last_digits": "7197",
+                "balance": 200.71,
+                "daily": [{"date": "2021-12-01", "balance": 200.71}, {"date": "2021-12-02", "balance": 200.71}],
+            }
+        ],
+    }
+    assert json.loads(get_card_balances(transactions))["cards"][0]["balance"] == pytest.approx(-398.29)
+    assert json.loads(get_card_balances(transactions_empty_df))["cards"] == []
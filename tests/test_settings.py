@@ -0,0 +1,76 @@
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.settings import SettingsCache, SettingsError, UserSettings, get_settings_path
+from src.utils import get_user_settings
+
+
+def write_settings(path: Path, data: dict, mtime_ns: int) -> None:
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_user_settings_from_dict() -> None:
+    settings = UserSettings.from_dict({"user_currencies": ["USD", " EUR", "USD"]})
+
+    assert settings == UserSettings(("USD", "EUR"), ())
+    assert settings.to_dict() == {"user_currencies": ["USD", "EUR"], "user_stocks": []}
+    assert UserSettings.from_value(settings) is settings
+
+    with pytest.raises(SettingsError):
+        UserSettings.from_dict({"user_stocks": "AAPL"})
+    with pytest.raises(SettingsError):
+        UserSettings.from_dict(["USD"])
+
+
+def test_settings_cache_reloads_changed_file(tmp_path: Path) -> None:
+    path = tmp_path / "user_settings.json"
+    write_settings(path, {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}, 1_000_000_000)
+    cache = SettingsCache()
+
+    with patch("json.load", wraps=json.load) as mock_load:
+        first = cache.get(str(path))
+        assert cache.get(str(path)) is first
+        assert mock_load.call_count == 1
+
+        write_settings(path, {"user_currencies": ["EUR"], "user_stocks": ["AAPL"]}, 2_000_000_000)
+        assert cache.get(str(path)).user_currencies == ("EUR",)
+        assert mock_load.call_count == 2
+
+    # Ошибка в измененном файле - последние корректные настройки
+    write_settings(path, {"user_currencies": "EUR"}, 3_000_000_000)
+    assert cache.get(str(path)).user_currencies == ("EUR",)
+
+    path.unlink()
+    assert cache.get(str(path)) == UserSettings()
+    assert len(cache) == 0
+
+
+def test_settings_cache_many_users(tmp_path: Path) -> None:
+    cache = SettingsCache(max_entries=2)
+    paths = []
+    for number in range(3):
+        path = tmp_path / f"user{number}.json"
+        write_settings(path, {"user_stocks": [f"T{number}"]}, 1_000_000_000)
+        paths.append(str(path))
+
+    assert [cache.get(path).user_stocks for path in paths] == [("T0",), ("T1",), ("T2",)]
+    assert len(cache) == 2
+
+
+def test_get_settings_path() -> None:
+    assert get_settings_path("user-1").endswith(os.path.join("data", "users", "user-1.json"))
+
+    for user_id in ("../user_settings", "..", "a/b"):
+        with pytest.raises(SettingsError):
+            get_settings_path(user_id)
+
+
+def test_get_user_settings_cached() -> None:
+    with patch("json.load", return_value={"user_currencies": ["USD"], "user_stocks": []}) as mock_load:
+        assert get_user_settings() == get_user_settings() == {"user_currencies": ["USD"], "user_stocks": []}
+        assert mock_load.call_count == 1
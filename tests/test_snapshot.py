@@ -0,0 +1,144 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas
+import pytest
+
+from src.parsers import write_csv
+from src.snapshot import (SNAPSHOT_LOCK_TIMEOUT, SNAPSHOT_VERSION_PREFIX, get_snapshot, get_snapshot_path,
+                          get_snapshot_version_path, open_snapshot, snapshot_lock, write_snapshot)
+
+
+def sum_snapshot_column(path_to_snapshot: str, column: str) -> float:
+    return float(open_snapshot(path_to_snapshot, [column])[column].sum())
+
+
+def get_snapshot_rows(path_to_operations: str) -> int:
+    return len(get_snapshot(path_to_operations, ["Сумма операции"]))
+
+
+def get_versions(path_to_snapshot: str) -> list[str]:
+    return [name for name in os.listdir(path_to_snapshot) if name.startswith(SNAPSHOT_VERSION_PREFIX)]
+
+
+def test_write_and_open_snapshot(transactions_df: pandas.DataFrame, tmp_path: Path) -> None:
+    path_to_snapshot = str(tmp_path / "operations.snapshot")
+    write_snapshot(transactions_df, path_to_snapshot)
+
+    snapshot = open_snapshot(path_to_snapshot)
+    assert list(snapshot.columns) == list(transactions_df.columns)
+    assert snapshot["Дата операции"].dtype == "datetime64[ns]"
+    assert isinstance(snapshot["Категория"].dtype, pandas.CategoricalDtype)
+    pandas.testing.assert_frame_equal(
+        snapshot.astype({column: object for column in snapshot.select_dtypes("category").columns}),
+        transactions_df.astype({"Кэшбэк": float}),
+        check_dtype=False,
+    )
+
+    # Колонки отображены в память и доступны только для чтения
+    amounts = snapshot["Сумма операции"].to_numpy()
+    assert isinstance(amounts.base, np.memmap)
+    assert not snapshot["Категория"].cat.codes.to_numpy().flags.writeable
+    with pytest.raises(ValueError):
+        amounts[0] = 0
+
+    assert list(open_snapshot(path_to_snapshot, ["Статус", "Сумма операции"]).columns) == ["Статус", "Сумма операции"]
+
+
+def test_open_snapshot_in_worker_processes(transactions_df: pandas.DataFrame, tmp_path: Path) -> None:
+    path_to_snapshot = str(tmp_path / "operations.snapshot")
+    write_snapshot(transactions_df, path_to_snapshot)
+
+    with ProcessPoolExecutor(2) as executor:
+        sums = list(executor.map(sum_snapshot_column, [path_to_snapshot] * 2, ["Сумма операции"] * 2))
+
+    assert sums == [pytest.approx(transactions_df["Сумма операции"].sum())] * 2
+
+
+@patch("pandas.read_excel")
+def test_get_snapshot_rebuilds_stale(mock_read: Mock, transactions_df: pandas.DataFrame, tmp_path: Path) -> None:
+    mock_read.return_value = transactions_df
+    path_to_operations = tmp_path / "operations.xlsx"
+    path_to_operations.write_bytes(b"")
+
+    assert len(get_snapshot(str(path_to_operations))) == len(transactions_df)
+    assert os.path.isdir(get_snapshot_path(str(path_to_operations)))
+    assert len(get_snapshot(str(path_to_operations))) == len(transactions_df)
+    assert mock_read.call_count == 1
+
+    # Файл операций изменился - снимок перезаписывается
+    mock_read.return_value = transactions_df.iloc[:2]
+    mtime = os.path.getmtime(path_to_operations) + 10
+    os.utime(path_to_operations, (mtime, mtime))
+    assert len(get_snapshot(str(path_to_operations), ["Сумма операции"])) == 2
+    assert mock_read.call_count == 2
+
+
+def test_get_snapshot_statement_set_changed(transactions_df: pandas.DataFrame, tmp_path: Path) -> None:
+    path_to_statements = tmp_path / "statements"
+    path_to_statements.mkdir()
+    write_csv(transactions_df.iloc[:3], str(path_to_statements / "card_1.csv"))
+    write_csv(transactions_df.iloc[3:], str(path_to_statements / "card_2.csv"))
+    assert len(get_snapshot(str(path_to_statements))) == len(transactions_df)
+
+    # Удаленная выписка не меняет время изменения оставшихся файлов
+    os.remove(path_to_statements / "card_2.csv")
+    assert len(get_snapshot(str(path_to_statements))) == 3
+
+    # Добавленная выписка старше снимка
+    path_to_old = path_to_statements / "card_0.csv"
+    write_csv(transactions_df.iloc[3:4], str(path_to_old))
+    os.utime(path_to_old, (1000000000, 1000000000))
+    assert len(get_snapshot(str(path_to_statements))) == 4
+
+
+def test_write_snapshot_keeps_readers_consistent(transactions_df: pandas.DataFrame, tmp_path: Path) -> None:
+    path_to_snapshot = str(tmp_path / "operations.snapshot")
+    write_snapshot(transactions_df, path_to_snapshot)
+    first_version = get_snapshot_version_path(path_to_snapshot)
+    opened = open_snapshot(path_to_snapshot)
+
+    write_snapshot(transactions_df.iloc[:2], path_to_snapshot)
+    assert get_snapshot_version_path(path_to_snapshot) != first_version
+    assert len(open_snapshot(path_to_snapshot)) == 2
+    # Читатель, открывший снимок до записи, видит старую версию целиком
+    assert len(opened) == len(transactions_df)
+    assert len(open_snapshot(first_version)) == len(transactions_df)
+
+    # Хранятся только текущая и предыдущая версии
+    write_snapshot(transactions_df.iloc[:1], path_to_snapshot)
+    assert len(get_versions(path_to_snapshot)) == 2
+    assert not os.path.exists(first_version)
+
+
+def test_get_snapshot_parallel_rebuild(transactions_df: pandas.DataFrame, tmp_path: Path) -> None:
+    path_to_operations = str(tmp_path / "operations.xlsx")
+    transactions_df.to_excel(path_to_operations, index=False)
+
+    with ProcessPoolExecutor(4) as executor:
+        rows = list(executor.map(get_snapshot_rows, [path_to_operations] * 4))
+
+    assert rows == [len(transactions_df)] * 4
+    # Снимок перестроен одним процессом, остальные дождались блокировки и открыли его
+    assert len(get_versions(get_snapshot_path(path_to_operations))) == 1
+    assert not os.path.exists(get_snapshot_path(path_to_operations) + ".lock")
+
+
+def test_snapshot_lock(tmp_path: Path) -> None:
+    path_to_snapshot = str(tmp_path / "operations.snapshot")
+
+    with snapshot_lock(path_to_snapshot):
+        with pytest.raises(TimeoutError):
+            with snapshot_lock(path_to_snapshot, timeout=0.1):
+                pass
+
+    # Брошенная блокировка старше SNAPSHOT_LOCK_TIMEOUT удаляется
+    Path(path_to_snapshot + ".lock").write_text("0")
+    mtime = os.path.getmtime(path_to_snapshot + ".lock") - SNAPSHOT_LOCK_TIMEOUT - 10
+    os.utime(path_to_snapshot + ".lock", (mtime, mtime))
+    with snapshot_lock(path_to_snapshot, timeout=1):
+        assert os.path.exists(path_to_snapshot + ".lock")
+    assert not os.path.exists(path_to_snapshot + ".lock")
@@ -0,0 +1,112 @@
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import pandas
+import pytest
+
+from src.aggregation import ParallelStorage
+from src.snapshot import write_snapshot
+from src.storage import PandasStorage, SQLiteStorage, TransactionStorage
+from src.utils import get_storage, get_transactions_list_for_period
+
+
+@pytest.fixture(params=["pandas", "sqlite", "parallel"])
+def storage(
+    request: pytest.FixtureRequest, transactions_df_persons: pandas.DataFrame, tmp_path: Path
+) -> Iterator[TransactionStorage]:
+    transactions = transactions_df_persons.copy()
+    transactions.loc[1, "Статус"] = "FAILED"
+    transactions.loc[3, "Номер карты"] = "*4556"
+
+    if request.param == "pandas":
+        yield PandasStorage(transactions)
+    elif request.param == "parallel":
+        write_snapshot(transactions, str(tmp_path / "operations.snapshot"))
+        yield ParallelStorage(str(tmp_path / "operations.snapshot"), max_workers=2, min_rows=0)
+    else:
+        sqlite_storage = SQLiteStorage()
+        sqlite_storage.load(transactions)
+        yield sqlite_storage
+        sqlite_storage.close()
+
+
+def test_get_transactions(storage: TransactionStorage) -> None:
+    transactions = storage.get_transactions(datetime(2021, 12, 1), datetime(2021, 12, 30, 23, 59, 59))
+    assert transactions["Описание"].tolist() == ["Ситидрайв", "Строитель", "IP Yakubovskaya M.V.", "Константин Л."]
+    assert transactions["Дата операции"].iloc[-1] == pandas.Timestamp("2021-12-30 22:22:03")
+
+    assert storage.get_transactions(status="FAILED")["Описание"].tolist() == ["Дикси"]
+    assert storage.get_transactions(card="*4556")["Описание"].tolist() == ["IP Yakubovskaya M.V."]
+    assert storage.get_transactions(category="Переводы", start=datetime(2021, 12, 31))["Сумма операции"].tolist() == [
+        -800.0
+    ]
+    assert storage.get_transactions(stop=datetime(2021, 11, 30)).empty
+
+
+def test_get_spends_by_card(storage: TransactionStorage) -> None:
+    spends = storage.get_spends_by_card(datetime(2021, 12, 1), datetime(2021, 12, 31, 23, 59, 59))
+    assert spends.to_dict("records") == [
+        {"Номер карты": "*4556", "total_spent": -99.0, "count": 1},
+        {"Номер карты": "*7197", "total_spent": -200.07, "count": 2},
+        {"Номер карты": "1", "total_spent": -20800.0, "count": 2},
+    ]
+
+
+def test_get_spends_by_category(storage: TransactionStorage) -> None:
+    spends = storage.get_spends_by_category(stop=datetime(2021, 12, 2))
+    assert spends.to_dict("records") == [
+        {"Категория": "Дом и ремонт", "total_spent": -199.0, "count": 1},
+        {"Категория": "Каршеринг", "total_spent": -1.07, "count": 1},
+        {"Категория": "Фастфуд", "total_spent": -99.0, "count": 1},
+    ]
+
+
+def test_get_sums_by_weekday(storage: TransactionStorage) -> None:
+    sums = storage.get_sums_by_weekday(datetime(2021, 12, 1), datetime(2021, 12, 31, 23, 59, 59))
+    assert sums["weekday"].tolist() == [2, 3, 4]
+    assert sums["total"].tolist() == pytest.approx([-299.07, -20000.0, -800.0])
+    assert sums["count"].tolist() == [3, 1, 1]
+
+
+def test_get_transactions_list_for_period_sqlite(
+    tmp_path: Path, transactions_df: pandas.DataFrame, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path_to_operations = tmp_path / "operations.xlsx"
+    transactions_df.to_excel(path_to_operations, index=False)
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+
+    transactions = get_transactions_list_for_period("2021-12-02 23:40:34", str(path_to_operations))
+    assert [transaction["Описание"] for transaction in transactions] == [
+        "Ситидрайв",
+        "Дикси",
+        "Строитель",
+        "IP Yakubovskaya M.V.",
+    ]
+    assert (tmp_path / "operations.xlsx.sqlite").exists()
+    assert get_storage(str(path_to_operations)) is get_storage(str(path_to_operations))
+
+
+@pytest.mark.parametrize("backend", ["pandas", "sqlite"])
+def test_get_storage_changed_statement(tmp_path: Path, transactions_df: pandas.DataFrame, backend: str) -> None:
+    path_to_operations = tmp_path / "operations.xlsx"
+    transactions_df.to_excel(path_to_operations, index=False)
+    storage = get_storage(str(path_to_operations), backend)
+    assert len(storage.get_transactions()) == len(transactions_df)
+
+    # Выписка изменилась после открытия хранилища
+    transactions_df.iloc[:2].to_excel(path_to_operations, index=False)
+    modified = path_to_operations.stat().st_mtime + 10
+    os.utime(path_to_operations, (modified, modified))
+
+    assert len(get_storage(str(path_to_operations), backend).get_transactions()) == 2
+
+
+def test_storage_missing_method() -> None:
+    class IncompleteStorage(TransactionStorage):
+        def get_transactions(self, *args: object, **kwargs: object) -> pandas.DataFrame:
+            return pandas.DataFrame()
+
+    with pytest.raises(TypeError, match="abstract"):
+        IncompleteStorage()  # type: ignore[abstract]
@@ -0,0 +1,63 @@
+import time
+from typing import Any
+
+import pytest
+import requests
+
+from src.stub_server import StubServer, load_recorded_responses
+from src.utils import get_currency_rates, get_stock_prices
+
+
+def test_load_recorded_responses() -> None:
+    responses = load_recorded_responses()
+    assert responses["cbr_daily"]["Valute"]["USD"]["Value"] == 74.2926
+    assert responses["global_quote"]["AAPL"]["Global Quote"]["05. price"] == "177.5700"
+
+
+def test_stub_server_replays_responses() -> None:
+    with StubServer() as stub_server:
+        assert requests.get(f"{stub_server.url}/daily_json.js").json()["Valute"]["EUR"]["Value"] == 84.0695
+        assert requests.get(f"{stub_server.url}/archive/2021/12/30/daily_json.js").status_code == 200
+
+        quote = requests.get(f"{stub_server.url}/query?function=GLOBAL_QUOTE&symbol=MSFT&apikey=demo").json()
+        assert quote["Global Quote"]["05. price"] == "336.3200"
+        unknown = requests.get(f"{stub_server.url}/query?function=GLOBAL_QUOTE&symbol=XXXX&apikey=demo").json()
+        assert unknown == {"Global Quote": {}}
+
+        assert requests.get(f"{stub_server.url}/unknown").status_code == 404
+
+
+def test_stub_server_latency() -> None:
+    with StubServer(latency=0.2) as stub_server:
+        start = time.perf_counter()
+        requests.get(f"{stub_server.url}/daily_json.js")
+        assert time.perf_counter() - start >= 0.2
+
+
+def test_stub_server_errors_and_rate_limit() -> None:
+    with StubServer(error_rate=1.0) as stub_server:
+        assert requests.get(f"{stub_server.url}/daily_json.js").status_code == 500
+
+    with StubServer(rate_limit=1) as stub_server:
+        assert requests.get(f"{stub_server.url}/daily_json.js").status_code == 200
+        assert requests.get(f"{stub_server.url}/daily_json.js").status_code == 429
+        assert "Note" in requests.get(f"{stub_server.url}/query?function=GLOBAL_QUOTE&symbol=AAPL").json()
+        assert stub_server.requests_count == 3
+
+
+def test_base_urls_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    user_settings: dict[str, Any] = {"user_currencies": ["USD", "CNY"], "user_stocks": ["AAPL", "TSLA"]}
+
+    with StubServer() as stub_server:
+        monkeypatch.setenv("CBR_BASE_URL", stub_server.url)
+        monkeypatch.setenv("ALPHA_VANTAGE_BASE_URL", stub_server.url + "/")
+
+        assert get_currency_rates(user_settings) == [
+            {"currency": "USD", "rate": 74.2926},
+            {"currency": "CNY", "rate": 11.6503},
+        ]
+        assert get_stock_prices(user_settings) == [
+            {"stock": "AAPL", "price": "177.5700"},
+            {"stock": "TSLA", "price": "1056.7800"},
+        ]
+        assert stub_server.requests_count == 3
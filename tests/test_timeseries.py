@@ -0,0 +1,78 @@
+import pandas
+import pytest
+
+from src.timeseries import SpendingTimeSeries, get_daily_spends
+
+
+def make_transactions(rows: list[tuple[str, float]], status: str = "OK") -> pandas.DataFrame:
+    return pandas.DataFrame(
+        [{"Дата операции": date, "Статус": status, "Сумма операции": amount} for date, amount in rows]
+    )
+
+
+def test_get_daily_spends(transactions_df_persons: pandas.DataFrame) -> None:
+    daily = get_daily_spends(transactions_df_persons)
+
+    assert list(daily.index.strftime("%Y-%m-%d")) == [
+        f"2021-12-{day:02d}" for day in range(1, 31)
+    ] + ["2021-12-31"]
+    assert daily["2021-12-01"] == pytest.approx(398.29)
+    assert daily["2021-12-30"] == 20000.0
+    assert daily["2021-12-15"] == 0.0
+
+    assert get_daily_spends(make_transactions([("01.12.2021 10:00:00", -5.0)], status="FAILED")).empty
+
+
+def test_spending_time_series_frequencies() -> None:
+    transactions = make_transactions(
+        [
+            ("06.12.2021 10:00:00", -100.0),
+            ("07.12.2021 10:00:00", -50.0),
+            ("13.12.2021 10:00:00", -30.0),
+            ("13.12.2021 12:00:00", 1000.0),
+            ("03.01.2022 10:00:00", -20.0),
+        ]
+    )
+    time_series = SpendingTimeSeries(transactions)
+
+    weekly = time_series.series("W", window=2)
+    assert weekly.index[0] == pandas.Timestamp("2021-12-06")
+    assert weekly["spend"].iloc[:2].tolist() == [150.0, 30.0]
+    assert weekly["rolling_mean"].iloc[:2].tolist() == [150.0, 90.0]
+    assert weekly["cumulative"].iloc[-1] == 200.0
+
+    monthly = time_series.series("M", window=2)
+    assert monthly.index.tolist() == [pandas.Timestamp("2021-12-01"), pandas.Timestamp("2022-01-01")]
+    assert monthly["spend"].tolist() == [180.0, 20.0]
+    assert monthly["rolling_mean"].tolist() == [180.0, 100.0]
+
+    with pytest.raises(ValueError):
+        time_series.series("Y")
+
+
+@pytest.mark.parametrize("freq, window", [("D", 7), ("W", 3), ("M", 2)])
+def test_spending_time_series_update_matches_full_rebuild(freq: str, window: int) -> None:
+    history = make_transactions([("01.11.2021 10:00:00", -10.0), ("20.11.2021 10:00:00", -40.0)])
+    new_rows = make_transactions([("20.11.2021 18:00:00", -5.0), ("02.12.2021 10:00:00", -70.0)])
+
+    time_series = SpendingTimeSeries(history)
+    time_series.series(freq, window)
+    time_series.update(new_rows)
+
+    rebuilt = SpendingTimeSeries(pandas.concat([history, new_rows]))
+    pandas.testing.assert_frame_equal(time_series.series(freq, window), rebuilt.series(freq, window))
+
+
+def test_spending_time_series_update_before_history() -> None:
+    time_series = SpendingTimeSeries(make_transactions([("01.12.2021 10:00:00", -10.0)]))
+    time_series.series("D", 2)
+    time_series.update(make_transactions([("29.11.2021 10:00:00", -4.0)]))
+
+    daily = time_series.series("D", 2)
+    assert daily["spend"].tolist() == [4.0, 0.0, 10.0]
+    assert daily["cumulative"].tolist() == [4.0, 4.0, 14.0]
+
+
+def test_spending_time_series_empty(transactions_empty_df: pandas.DataFrame) -> None:
+    time_series = SpendingTimeSeries(transactions_empty_df)
+    assert time_series.series("M").empty
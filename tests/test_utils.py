@@ -1,9 +1,12 @@
 import unittest
+from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pandas
+import requests
 from freezegun import freeze_time
 
+from src.fx import CBR_TIMEOUT
 from src.utils import (get_cards_spends_list, get_currency_rates, get_greeting_massage, get_stock_prices,
                        get_top_transaction_list, get_transactions_list_for_period, get_user_settings)
 
@@ -32,36 +35,20 @@ def test_get_user_settings_file_error() -> None:
         assert get_user_settings() == {"user_currencies": [], "user_stocks": []}
 
 
-@patch("pandas.read_excel")
-def test_get_transactions_list_for_period(mock_get: Mock, transactions_df: pandas.DataFrame) -> None:
-
-    mock_get.return_value = pandas.DataFrame(transactions_df)
+def test_get_transactions_list_for_period(
+    storage_backend: str, tmp_path: Path, transactions_df: pandas.DataFrame, transactions_empty_df: pandas.DataFrame
+) -> None:
+    path_to_operations = tmp_path / "operations.xlsx"
+    transactions_df.to_excel(path_to_operations, index=False)
 
     assert get_transactions_list_for_period(
         "2021-12-02 23:40:34",
-        "data/operations.xlsx") == transactions_df.to_dict("records")
-
-    mock_get.return_value = pandas.DataFrame(
-        {
-            "Дата операции": [],
-            "Дата платежа": [],
-            "Номер карты": [],
-            "Статус": [],
-            "Сумма операции": [],
-            "Валюта операции": [],
-            "Сумма платежа": [],
-            "Валюта платежа": [],
-            "Кэшбэк": [],
-            "Категория": [],
-            "MCC": [],
-            "Описание": [],
-            "Бонусы (включая кэшбэк)": [],
-            "Округление на инвесткопилку": [],
-            "Сумма операции с округлением": [],
-        }
-    )
-
-    assert get_transactions_list_for_period("2021-12-02 23:40:34", "data/operations.xlsx") == []
+        str(path_to_operations)) == transactions_df.to_dict("records")
+
+    path_to_empty = tmp_path / "empty.xlsx"
+    transactions_empty_df.to_excel(path_to_empty, index=False)
+
+    assert get_transactions_list_for_period("2021-12-02 23:40:34", str(path_to_empty)) == []
 
 
 def test_get_cards_spends_list(transactions_df: pandas.DataFrame) -> None:
@@ -100,7 +87,7 @@ def test_get_currency_rates() -> None:
         assert get_currency_rates({"user_currencies": ["USD", "EUR"]}) == expected_result
 
         # Проверяем, что requests.get был вызван с правильным URL
-        mock_get.assert_called_once_with("https://www.cbr-xml-daily.ru/daily_json.js")
+        mock_get.assert_called_once_with("https://www.cbr-xml-daily.ru/daily_json.js", timeout=CBR_TIMEOUT)
 
     with patch("requests.get") as mock_get:
         # Настраиваем заглушку для requests.get
@@ -112,6 +99,9 @@ def test_get_currency_rates() -> None:
         assert get_currency_rates({"user_currencies": ["USD", "EUR"]}) == expected_result
         #
 
+    with patch("requests.get", side_effect=requests.Timeout("timeout")):
+        assert get_currency_rates({"user_currencies": ["USD", "EUR"]}) == []
+
 
 class TestStockPrices(unittest.TestCase):
     @patch("requests.get")